@@ -1,6 +1,7 @@
 # Updated app.py for CheckMate to match full pipeline and schema integration
 from __future__ import annotations
 
+import json
 import logging
 import os
 from pathlib import Path
@@ -9,12 +10,12 @@ from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv(Path(__file__).resolve().parent / ".env")
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from pydantic import ValidationError
-from checkmate.pipeline import run_pipeline
-from checkmate.scoring import compute_score
-from checkmate.render import render_output
-from checkmate.schemas import AnalyzeRequest
+from checkmate import metrics
+from checkmate.jobs import QueueFull, job_queue
+from checkmate.service import BATCH_MAX_URLS, analyze_batch, analyze_url, analyze_url_events
+from checkmate.schemas import AnalyzeBatchRequest, AnalyzeRequest
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger(__name__)
@@ -54,23 +55,35 @@ def home():
     return send_from_directory(".", "index.html")
 
 
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition for this worker process."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/analyze", methods=["POST", "OPTIONS"])
 def analyze():
     if request.method == "OPTIONS":
         return "", 204
+    with metrics.track_in_flight("analyze"):
+        response, status = _analyze()
+    metrics.REQUESTS_TOTAL.inc(endpoint="analyze", status=str(status))
+    return response, status
+
+
+def _analyze():
     try:
         data = request.get_json()
         if data is None:
             return jsonify({"status": "error", "error": "Request body must be JSON with a 'url' field."}), 400
         parsed = AnalyzeRequest(**data)
-        result = run_pipeline(parsed.url)
-
-        if result.status == "ok":
-            result = compute_score(result)
-
-        rendered = render_output(result)
-        logger.info("Analyze done url=%s -> website_type=%s", parsed.url, rendered.get("website_type"))
-        return jsonify(rendered)
+        refresh = parsed.refresh or request.args.get("refresh", "").lower() in ("1", "true", "yes")
+        rendered = analyze_url(parsed.url, refresh=refresh)
+        logger.info(
+            "Analyze done url=%s -> website_type=%s cache_hit=%s",
+            parsed.url, rendered.get("website_type"), rendered["cache"]["hit"],
+        )
+        return jsonify(rendered), 200
 
     except ValidationError:
         return jsonify({"status": "error", "error": "Invalid request: send JSON with a 'url' field."}), 400
@@ -78,6 +91,95 @@ def analyze():
         logger.exception("Analyze failed: %s", e)
         return jsonify({"status": "error", "error": str(e)}), 500
 
+@app.route("/analyze/stream", methods=["GET", "POST", "OPTIONS"])
+def analyze_stream():
+    """
+    Server-sent events: one event per pipeline stage as it finishes, then a final "score"
+    event carrying the same body /analyze returns. GET takes ?url= (EventSource), POST takes JSON.
+    """
+    if request.method == "OPTIONS":
+        return "", 204
+    data = request.get_json(silent=True) if request.method == "POST" else dict(request.args)
+    try:
+        parsed = AnalyzeRequest(**(data or {}))
+    except (ValidationError, TypeError):
+        return jsonify({"status": "error", "error": "Invalid request: send a 'url'."}), 400
+    refresh = parsed.refresh or request.args.get("refresh", "").lower() in ("1", "true", "yes")
+
+    def generate():
+        with metrics.track_in_flight("analyze_stream"):
+            for event, payload in analyze_url_events(parsed.url, refresh=refresh):
+                if payload is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        metrics.REQUESTS_TOTAL.inc(endpoint="analyze_stream", status="200")
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # keep reverse proxies from buffering the stream
+    return response
+
+
+@app.route("/analyze/batch", methods=["POST", "OPTIONS"])
+def analyze_batch_route():
+    """Stream one JSON line per URL as each analysis finishes (completion order, with input index)."""
+    if request.method == "OPTIONS":
+        return "", 204
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({"status": "error", "error": "Request body must be JSON with a 'urls' list."}), 400
+    try:
+        parsed = AnalyzeBatchRequest(**data)
+    except (ValidationError, TypeError):
+        return jsonify({"status": "error", "error": "Invalid request: send JSON with a 'urls' list."}), 400
+    if not parsed.urls:
+        return jsonify({"status": "error", "error": "'urls' must not be empty."}), 400
+    if len(parsed.urls) > BATCH_MAX_URLS:
+        return jsonify({"status": "error", "error": f"At most {BATCH_MAX_URLS} URLs per batch."}), 400
+
+    def generate():
+        with metrics.track_in_flight("analyze_batch"):
+            for line in analyze_batch(parsed.urls, concurrency=parsed.concurrency, refresh=parsed.refresh):
+                yield json.dumps(line) + "\n"
+        metrics.REQUESTS_TOTAL.inc(endpoint="analyze_batch", status="200")
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.route("/jobs", methods=["POST", "OPTIONS"])
+def create_job():
+    """Queue an analysis and return 202 with the job id; poll GET /jobs/<id> for the result."""
+    if request.method == "OPTIONS":
+        return "", 204
+    data = request.get_json(silent=True)
+    try:
+        parsed = AnalyzeRequest(**(data or {}))
+    except (ValidationError, TypeError):
+        return jsonify({"status": "error", "error": "Invalid request: send JSON with a 'url' field."}), 400
+    try:
+        job = job_queue.submit(parsed.url, refresh=parsed.refresh)
+    except QueueFull:
+        metrics.REQUESTS_TOTAL.inc(endpoint="jobs", status="503")
+        response = jsonify({"status": "error", "error": "Too many queued analyses. Try again shortly."})
+        response.headers["Retry-After"] = "30"
+        return response, 503
+    metrics.REQUESTS_TOTAL.inc(endpoint="jobs", status="202")
+    status_url = f"/jobs/{job['id']}"
+    response = jsonify({"job_id": job["id"], "status": job["status"], "status_url": status_url})
+    response.headers["Location"] = status_url
+    return response, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """Job status (queued/running/done/error); "result" holds the /analyze body once done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "error": "Unknown or expired job id."}), 404
+    return jsonify(job), 200
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     key = os.getenv("GEMINI_API_KEY", "").strip()
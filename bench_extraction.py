@@ -0,0 +1,132 @@
+"""
+Benchmark extract_page_features per HTML parser backend.
+
+Runs every page in tests/fixtures/pages (plus a large page built by repeating their
+bodies, since real sites are often 1-2 MB) through each installed backend and reports
+the median time and the speedup over html.parser, then the page text sent to Gemini per
+page: the whole clean text truncated to the budget versus main content plus boilerplate tail.
+With --processes N it also compares extraction throughput of N threads against an N-process
+extraction pool (CHECKMATE_EXTRACT_PROCESSES).
+
+    python bench_extraction.py [--repeat 5] [--scale 200] [--processes 4] [PAGE.html ...]
+"""
+import argparse
+import glob
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from checkmate import extract_pool
+from checkmate.modules.extraction import available_parsers, extract_page_features, prompt_text, truncate_clean_text
+from checkmate.pipeline import BOILERPLATE_PROMPT_CHARS, PAGE_TEXT_CHARS
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures", "pages")
+BASE_URL = "https://www.example.com/"
+
+
+def load_corpus(paths, scale):
+    pages = {}
+    bodies = []
+    for path in paths:
+        with open(path, "rb") as f:
+            html = f.read()
+        pages[os.path.basename(path)] = html
+        match = re.search(rb"<body[^>]*>(.*)</body>", html, re.S | re.I)
+        bodies.append(match.group(1) if match else html)
+    if scale > 0 and bodies:
+        pages[f"large (x{scale})"] = b"<html><head><title>Large page</title></head><body>" + b"".join(bodies) * scale + b"</body></html>"
+    return pages
+
+
+def bench(html, parser, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_page_features(html, BASE_URL, encoding="utf-8", parser=parser)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def prompt_sizes(html):
+    """Characters of page text sent to Gemini without and with main-content detection."""
+    features = extract_page_features(html, BASE_URL, encoding="utf-8")
+    whole = truncate_clean_text(
+        features["clean_text"], features["title"], features["headings"], blocks=features["blocks"]
+    )
+    sent = prompt_text(features, PAGE_TEXT_CHARS, BOILERPLATE_PROMPT_CHARS)
+    return len(whole), len(sent["truncated_text"]) + len(sent["boilerplate_text"])
+
+
+def throughput(html, workers, tasks, processes):
+    """Pages per second for tasks extractions of html submitted from workers threads."""
+    extract_pool.EXTRACT_PROCESSES = workers if processes else 0
+    body = memoryview(bytearray(html))
+
+    def run(_):
+        return extract_pool.extract(body, BASE_URL, "utf-8", timeout=600)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as threads:
+            if processes:
+                list(threads.map(run, range(workers)))  # start the worker processes
+            start = time.perf_counter()
+            list(threads.map(run, range(tasks)))
+            return tasks / (time.perf_counter() - start)
+    finally:
+        extract_pool.shutdown_pool()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("pages", nargs="*", help="HTML files (default: the test corpus)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--scale", type=int, default=200, help="repeat count for the synthetic large page (0 disables)")
+    ap.add_argument("--processes", type=int, default=0, help="compare N threads with an N-process pool (0 skips)")
+    args = ap.parse_args()
+
+    paths = args.pages or sorted(glob.glob(os.path.join(PAGES_DIR, "*.html")))
+    if not paths:
+        sys.exit("No pages to benchmark")
+    parsers = available_parsers()
+    pages = load_corpus(paths, args.scale)
+
+    fast = [p for p in parsers if p != "html.parser"]
+    print(f"{'page':32} {'KiB':>7} " + " ".join(f"{p:>12}" for p in parsers) + "".join(f" {p + ' speedup':>16}" for p in fast))
+    totals = {p: 0.0 for p in parsers}
+    for name, html in pages.items():
+        row = {p: bench(html, p, args.repeat) for p in parsers}
+        for p, seconds in row.items():
+            totals[p] += seconds
+        cells = " ".join(f"{row[p] * 1000:>10.2f}ms" for p in parsers)
+        speedups = "".join(f" {row['html.parser'] / row[p]:>15.2f}x" for p in fast)
+        print(f"{name:32} {len(html) / 1024:>7.1f} {cells}{speedups}")
+
+    print()
+    for p in parsers:
+        print(f"{p:12} total {totals[p] * 1000:9.2f}ms  speedup vs html.parser {totals['html.parser'] / totals[p]:.2f}x")
+
+    print()
+    print(f"{'page':32} {'whole text':>11} {'main+tail':>10} {'saved':>7}")
+    before_total = after_total = 0
+    for name, html in pages.items():
+        before, after = prompt_sizes(html)
+        before_total += before
+        after_total += after
+        print(f"{name:32} {before:>11} {after:>10} {1 - after / max(1, before):>6.0%}")
+    print(f"{'total':32} {before_total:>11} {after_total:>10} {1 - after_total / max(1, before_total):>6.0%}")
+
+    if args.processes > 0:
+        name, html = max(pages.items(), key=lambda item: len(item[1]))
+        tasks = args.processes * args.repeat
+        threaded = throughput(html, args.processes, tasks, processes=False)
+        pooled = throughput(html, args.processes, tasks, processes=True)
+        print()
+        print(f"{name}: {args.processes} threads {threaded:.2f} pages/s, "
+              f"{args.processes} processes {pooled:.2f} pages/s ({pooled / threaded:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
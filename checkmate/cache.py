@@ -0,0 +1,329 @@
+"""
+Small caches shared by the service layer.
+
+- TTLCache: thread-safe in-memory LRU with per-entry TTL
+- SQLiteCache: on-disk tier (JSON values) that survives restarts and is shared by
+  every gunicorn worker pointing at the same file
+- TieredCache: memory in front of disk
+- PageCache: fetched page bodies with their HTTP validators, for conditional re-fetches
+
+Values must be JSON-serializable for the disk tier. get() returns (value, stored_at)
+with stored_at in wall-clock seconds so ages are comparable across processes.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from checkmate.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+CacheEntry = Tuple[Any, float]
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 3600, name: Optional[str] = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.name:
+            record_cache(self.name, hit)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+            self._record(entry is not None)
+            return entry
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() if stored_at is None else stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteCache:
+    """One table of JSON values keyed by string. WAL mode lets several processes share the file."""
+
+    # Trim expired/excess rows every N writes rather than on every write
+    PRUNE_EVERY = 50
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = 3600,
+        max_entries: int = 10000,
+        name: Optional[str] = None,
+        table: str = "cache",
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.name = name
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_stored_at ON {self.table} (stored_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry: Optional[CacheEntry] = None
+        try:
+            row = self._connect().execute(
+                f"SELECT stored_at, value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and (self.ttl is None or time.time() - row[0] <= self.ttl):
+                entry = (json.loads(row[1]), row[0])
+        except Exception as exc:
+            logger.warning("SQLite cache read failed (%s): %s", self.path, exc)
+        if self.name:
+            record_cache(self.name, entry is not None)
+        return entry
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        try:
+            self._connect().execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, time.time() if stored_at is None else stored_at, json.dumps(value)),
+            )
+        except Exception as exc:
+            logger.warning("SQLite cache write failed (%s): %s", self.path, exc)
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except Exception as exc:
+            logger.warning("SQLite cache delete failed (%s): %s", self.path, exc)
+
+    def prune(self) -> None:
+        """Drop expired rows, then the oldest rows beyond max_entries."""
+        try:
+            conn = self._connect()
+            if self.ttl is not None:
+                conn.execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (time.time() - self.ttl,))
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        except Exception as exc:
+            logger.warning("SQLite cache prune failed (%s): %s", self.path, exc)
+
+    def clear(self) -> None:
+        try:
+            self._connect().execute(f"DELETE FROM {self.table}")
+        except Exception as exc:
+            logger.warning("SQLite cache clear failed (%s): %s", self.path, exc)
+
+
+class TieredCache:
+    """Memory LRU in front of an optional SQLite tier; disk hits are promoted to memory."""
+
+    def __init__(self, memory: TTLCache, disk: Optional[SQLiteCache] = None, name: Optional[str] = None):
+        self.memory = memory
+        self.disk = disk
+        self.name = name
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.set(key, entry[0], stored_at=entry[1])
+        if self.name:
+            record_cache(self.name, entry is not None)
+        return entry
+
+    def set(self, key: str, value: Any) -> None:
+        stored_at = time.time()
+        self.memory.set(key, value, stored_at=stored_at)
+        if self.disk is not None:
+            self.disk.set(key, value, stored_at=stored_at)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+class PageCache:
+    """
+    Fetched pages keyed by URL, stored with ETag / Last-Modified so the next fetch can be a
+    conditional request (a 304 is then served from here). Bounded by total body bytes;
+    the least recently used pages are evicted first.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, name: Optional[str] = "page"):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.name = name
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, final_url TEXT, status_code INTEGER, content_type TEXT, "
+            "encoding TEXT, etag TEXT, last_modified TEXT, body BLOB NOT NULL, "
+            "size INTEGER NOT NULL, stored_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored page for url (body as bytes plus metadata and validators), or None."""
+        try:
+            row = self._connect().execute(
+                "SELECT final_url, status_code, content_type, encoding, etag, last_modified, body, stored_at "
+                "FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        except Exception as exc:
+            logger.warning("Page cache read failed (%s): %s", self.path, exc)
+            return None
+        if row is None:
+            return None
+        keys = ("final_url", "status_code", "content_type", "encoding", "etag", "last_modified", "body", "stored_at")
+        return dict(zip(keys, row))
+
+    def set(
+        self,
+        url: str,
+        body: Any,
+        final_url: str,
+        status_code: int,
+        content_type: str,
+        encoding: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        now = time.time()
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO pages (url, final_url, status_code, content_type, encoding, etag, "
+                "last_modified, body, size, stored_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, final_url, status_code, content_type, encoding, etag, last_modified,
+                 sqlite3.Binary(body), len(body), now, now),
+            )
+        except Exception as exc:
+            logger.warning("Page cache write failed (%s): %s", self.path, exc)
+            return
+        self.evict()
+
+    def touch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Mark a page as revalidated (304), taking any refreshed validators."""
+        try:
+            self._connect().execute(
+                "UPDATE pages SET last_used = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, url),
+            )
+        except Exception as exc:
+            logger.warning("Page cache update failed (%s): %s", self.path, exc)
+
+    def record(self, hit: bool) -> None:
+        if self.name:
+            record_cache(self.name, hit)
+
+    def evict(self) -> None:
+        """Drop least recently used pages until the stored bodies fit in max_bytes."""
+        try:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            freed = 0
+            doomed = []
+            for url, size in conn.execute("SELECT url, size FROM pages ORDER BY last_used"):
+                doomed.append((url,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM pages WHERE url = ?", doomed)
+        except Exception as exc:
+            logger.warning("Page cache eviction failed (%s): %s", self.path, exc)
+
+    def total_bytes(self) -> int:
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def clear(self) -> None:
+        try:
+            self._connect().execute("DELETE FROM pages")
+        except Exception as exc:
+            logger.warning("Page cache clear failed (%s): %s", self.path, exc)
@@ -1,3 +1,226 @@
-# Placeholder for crawl logic
-def crawl_site(url: str):
-    pass
+"""
+Bounded same-site crawl used to find the site's key pages (contact/about/privacy/terms).
+
+Limits follow the PRD: max_pages=10, max_depth=2, 10s per page. Pages are fetched
+concurrently through safe_fetch (SSRF checks on every hop). The frontier is a priority
+queue so policy and contact pages are fetched before ordinary links, and the crawl stops
+as soon as the page budget or the time budget is spent.
+"""
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from checkmate.modules.extraction import make_soup
+from checkmate.safe_fetch import decode_body, safe_fetch
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 10
+MAX_DEPTH = 2
+PAGE_TIMEOUT_SECONDS = 10.0
+# Whole-crawl budget; the caller's deadline can shorten it further
+CRAWL_BUDGET_SECONDS = 20.0
+CRAWL_WORKERS = 4
+
+# Key pages in priority order (lower fetches first); labels are what missing_pages reports
+KEY_PAGE_PRIORITY: Dict[str, int] = {"privacy": 0, "terms": 0, "contact": 1, "about": 2}
+KEY_PAGE_LABELS: Dict[str, str] = {
+    "contact": "Contact",
+    "about": "About",
+    "privacy": "Privacy",
+    "terms": "Terms of Service",
+}
+OTHER_PAGE_PRIORITY = 10
+
+_KEY_PAGE_PATTERNS: Dict[str, re.Pattern] = {
+    "privacy": re.compile(r"privacy|datenschutz|data[-_ ]protection", re.I),
+    "terms": re.compile(r"terms|conditions|\btos\b|legal|user[-_ ]agreement", re.I),
+    "contact": re.compile(r"contact|kontakt|get[-_ ]in[-_ ]touch|customer[-_ ]service", re.I),
+    "about": re.compile(r"about|who[-_ ]we[-_ ]are|our[-_ ]story|impressum", re.I),
+}
+
+# Links that are never HTML pages
+_SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".zip", ".gz", ".mp3", ".mp4", ".avi", ".mov", ".xml", ".json", ".doc", ".docx",
+)
+
+FetchFn = Callable[..., Tuple[Optional[str], Optional[int], Optional[str], Optional[str]]]
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    depth: int
+    status_code: Optional[int] = None
+    # str from safe_fetch, or the start page's raw bytes (decoded with encoding)
+    content: Union[str, bytes, memoryview, None] = None
+    encoding: Optional[str] = None
+    title: Optional[str] = None
+    key_page: Optional[str] = None
+
+
+@dataclass
+class CrawlResult:
+    pages: List[CrawledPage] = field(default_factory=list)
+    # kind -> URL of the page that satisfied it
+    key_pages: Dict[str, str] = field(default_factory=dict)
+    missing_pages: List[str] = field(default_factory=list)
+    # "page_budget" / "time_budget" when the crawl stopped before the frontier was empty
+    stopped: Optional[str] = None
+
+
+def classify_key_page(url: str, anchor_text: str = "") -> Optional[str]:
+    """Which key page (privacy/terms/contact/about) a link points to, judged by path and anchor text."""
+    path = urlparse(url).path
+    for kind in ("privacy", "terms", "contact", "about"):
+        pattern = _KEY_PAGE_PATTERNS[kind]
+        if pattern.search(path) or (anchor_text and pattern.search(anchor_text)):
+            return kind
+    return None
+
+
+def _site_host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _normalize_link(base_url: str, href: str) -> Optional[str]:
+    href = (href or "").strip()
+    if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+        return None
+    absolute, _ = urldefrag(urljoin(base_url, href))
+    parsed = urlparse(absolute)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return None
+    if parsed.path.lower().endswith(_SKIP_EXTENSIONS):
+        return None
+    return absolute
+
+
+def _parse_page(page: "CrawledPage") -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """Title and (absolute url, anchor text) for every followable link on the page."""
+    soup = make_soup(decode_body(page.content, page.encoding))
+    page_url = page.url
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    links = []
+    for a in soup.find_all("a", href=True):
+        link = _normalize_link(page_url, a["href"])
+        if link:
+            links.append((link, a.get_text(" ", strip=True)))
+    return title, links
+
+
+def crawl_site(
+    url: str,
+    max_pages: int = MAX_PAGES,
+    max_depth: int = MAX_DEPTH,
+    timeout: float = PAGE_TIMEOUT_SECONDS,
+    budget: float = CRAWL_BUDGET_SECONDS,
+    root_content: Union[str, bytes, memoryview, None] = None,
+    root_encoding: Optional[str] = None,
+    root_status: Optional[int] = None,
+    fetch: FetchFn = safe_fetch,
+    workers: int = CRAWL_WORKERS,
+) -> CrawlResult:
+    """
+    Crawl url's site breadth-limited by max_depth and max_pages (the start page counts).
+    root_content lets the caller pass a start page it already fetched (str, or bytes plus root_encoding).
+    A key page counts as present if it was fetched with a 2xx status, or is linked but was not
+    reached before a budget ran out (so budget limits never produce a false "missing").
+    """
+    started = time.monotonic()
+    stop_at = started + max(0.0, budget)
+    site = _site_host(url)
+    result = CrawlResult()
+    seen: Set[str] = {urldefrag(url)[0]}
+    # (priority, depth, seq, url, key kind)
+    frontier: List[Tuple[int, int, int, str, Optional[str]]] = []
+    seq = itertools.count()
+
+    def add_page(page: CrawledPage) -> None:
+        result.pages.append(page)
+        # An error page at /contact or /privacy does not make the page present
+        ok = page.status_code is not None and 200 <= page.status_code < 300
+        if ok and page.key_page and page.key_page not in result.key_pages:
+            result.key_pages[page.key_page] = page.url
+        if page.depth >= max_depth or not page.content:
+            return
+        try:
+            page.title, links = _parse_page(page)
+        except Exception as exc:
+            logger.warning("Could not parse %s for links: %s", page.url, exc)
+            return
+        for link, text in links:
+            if link in seen or _site_host(link) != site:
+                continue
+            seen.add(link)
+            kind = classify_key_page(link, text)
+            priority = KEY_PAGE_PRIORITY[kind] if kind else OTHER_PAGE_PRIORITY
+            heapq.heappush(frontier, (priority, page.depth + 1, next(seq), link, kind))
+
+    def fetch_page(link: str, depth: int, kind: Optional[str]) -> CrawledPage:
+        page_timeout = max(1.0, min(timeout, stop_at - time.monotonic()))
+        content, status_code, _content_type, final_url = fetch(link, timeout=page_timeout)
+        return CrawledPage(url=final_url or link, depth=depth, status_code=status_code, content=content, key_page=kind)
+
+    if root_content is None:
+        root = fetch_page(url, 0, None)
+    else:
+        root = CrawledPage(
+            url=url, depth=0, status_code=root_status, content=root_content, encoding=root_encoding
+        )
+    root.key_page = classify_key_page(root.url)
+    add_page(root)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="checkmate-crawl")
+    running: Dict[Future, Tuple[str, Optional[str]]] = {}
+    attempted = 1
+    try:
+        while frontier or running:
+            while frontier and len(running) < workers and attempted < max_pages:
+                _, depth, _, link, kind = heapq.heappop(frontier)
+                # Copy contextvars so fetch timings land in the caller's request timings
+                future = executor.submit(contextvars.copy_context().run, fetch_page, link, depth, kind)
+                running[future] = (link, kind)
+                attempted += 1
+            if not running:
+                break
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                result.stopped = "time_budget"
+                break
+            done, _ = wait(list(running), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                link, kind = running.pop(future)
+                try:
+                    page = future.result()
+                except Exception as exc:
+                    logger.info("Crawl fetch failed for %s: %s", link, exc)
+                    page = CrawledPage(url=link, depth=0, key_page=kind)
+                if page.content:
+                    add_page(page)
+        if result.stopped is None and frontier and attempted >= max_pages:
+            result.stopped = "page_budget"
+    finally:
+        # Do not wait on stragglers once a budget is spent
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    unreached = {entry[4] for entry in frontier} | {kind for _, kind in running.values()}
+    for kind in ("contact", "about", "privacy", "terms"):
+        if kind not in result.key_pages and kind not in unreached:
+            result.missing_pages.append(KEY_PAGE_LABELS[kind])
+    logger.info(
+        "Crawled %s: %d pages in %.1fs, missing=%s, stopped=%s",
+        url, len(result.pages), time.monotonic() - started, result.missing_pages, result.stopped,
+    )
+    return result
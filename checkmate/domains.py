@@ -0,0 +1,64 @@
+"""
+Process-wide registered-domain lookup ("shop.example.co.uk" -> "example.co.uk").
+
+Every module that groups hosts by site goes through registered_domain(): link
+classification in extraction, URLhaus feed parsing, WHOIS and typosquat checks. The
+public suffix list is the snapshot bundled with tldextract, loaded once at import and
+never refreshed over the network. Results are memoized per hostname in a bounded LRU,
+so a link-heavy page or a large feed costs one suffix lookup per distinct host.
+"""
+from __future__ import annotations
+
+import functools
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+import tldextract
+
+DOMAIN_CACHE_SIZE = int(os.getenv("CHECKMATE_DOMAIN_CACHE_SIZE", "65536"))
+
+# cache_dir=None and no suffix_list_urls: use the bundled snapshot, never download or write a cache
+_extractor = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
+# Load the suffix list now rather than on the first request
+_extractor("example.com")
+
+
+def hostname(value: Optional[str]) -> str:
+    """Lowercase hostname of a URL, netloc or bare "host/path" (no port, userinfo or trailing dot)."""
+    value = (value or "").strip()
+    if not value:
+        return ""
+    try:
+        parts = urlsplit(value if "//" in value else "//" + value)
+        host = parts.hostname or ""
+    except ValueError:
+        return ""
+    return host.rstrip(".")
+
+
+@functools.lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def _registered_domain_for_host(host: str) -> Optional[str]:
+    extracted = _extractor(host)
+    if not extracted.suffix or not extracted.domain:
+        return None
+    return f"{extracted.domain}.{extracted.suffix}"
+
+
+def registered_domain(value: Optional[str]) -> Optional[str]:
+    """
+    "domain.suffix" for a URL, netloc or bare hostname, lowercased; None for IP addresses,
+    hosts without a public suffix (localhost, intranet names) and unparseable input.
+    """
+    host = hostname(value)
+    if not host:
+        return None
+    return _registered_domain_for_host(host)
+
+
+def cache_info():
+    return _registered_domain_for_host.cache_info()
+
+
+def clear_cache() -> None:
+    _registered_domain_for_host.cache_clear()
@@ -0,0 +1,166 @@
+"""
+Optional process pool for HTML extraction.
+
+extract_page_features and the prompt-text truncation are pure-Python CPU work that holds
+the GIL, so in a threaded worker one large page stalls every other request. With
+CHECKMATE_EXTRACT_PROCESSES > 0 they run in that many worker processes instead; the
+network-bound stages stay on the pipeline's threads. 0 (the default) runs them inline.
+
+Each task carries its own time limit, enforced in the worker with SIGALRM where available: a
+page that runs past it fails in its worker and frees it, without touching the other tasks in
+the pool.
+
+The page goes in as bytes (the fetch buffer itself when the view covers all of it, so the
+parent makes no copy before pickling) and comes back as a compact dict: text that can be
+rebuilt from the page blocks is dropped in the worker and rejoined here. This module only
+imports extraction so workers stay light (no threat-intel refresh, no Gemini client).
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Union
+
+from checkmate.modules.extraction import extract_page_features, prompt_text
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_PROCESSES = int(os.getenv("CHECKMATE_EXTRACT_PROCESSES", "0"))
+# Seconds one page may take in a worker; the request deadline can shorten it further
+EXTRACT_TASK_TIMEOUT_SECONDS = float(os.getenv("CHECKMATE_EXTRACT_TIMEOUT", "10"))
+
+# Feature keys that are joins of "blocks" and are rebuilt in the parent
+_DERIVED_KEYS = ("clean_text", "main_text", "boilerplate_text")
+
+Body = Union[bytes, bytearray, memoryview, str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # fork() from a threaded server can copy held locks into the child
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pool = ProcessPoolExecutor(max_workers=EXTRACT_PROCESSES, mp_context=context)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes; the next offloaded extraction starts a new pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Shut pool down if it is still the current one (another thread may have replaced it already)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class TaskTimeout(Exception):
+    """Raised inside a worker when a task runs past its time limit."""
+
+
+def _raise_task_timeout(signum, frame):
+    raise TaskTimeout()
+
+
+def _run_limited(fn, seconds: float, *args):
+    """Worker side: fn(*args), interrupted after seconds so a stuck page does not hold the worker."""
+    limited = seconds > 0 and hasattr(signal, "setitimer")
+    if limited:
+        signal.signal(signal.SIGALRM, _raise_task_timeout)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn(*args)
+    finally:
+        if limited:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _payload(body: Body) -> Body:
+    # A memoryview cannot be pickled; its underlying buffer can, without a copy here
+    if isinstance(body, memoryview):
+        whole = body.obj if isinstance(body.obj, (bytes, bytearray)) else None
+        if whole is not None and body.c_contiguous and body.nbytes == len(whole):
+            return whole
+        return body.tobytes()
+    return body
+
+
+def _extract(body: Body, base_url: str, encoding: Optional[str], max_chars: int, boilerplate_chars: int) -> Dict[str, Any]:
+    features = extract_page_features(body, base_url=base_url, encoding=encoding)
+    return {"features": features, **prompt_text(features, max_chars, boilerplate_chars)}
+
+
+def _extract_compact(
+    body: Body, base_url: str, encoding: Optional[str], max_chars: int, boilerplate_chars: int
+) -> Dict[str, Any]:
+    """Worker side: _extract without the text that _expand can rebuild."""
+    extracted = _extract(body, base_url, encoding, max_chars, boilerplate_chars)
+    for key in _DERIVED_KEYS:
+        del extracted["features"][key]
+    return extracted
+
+
+def _expand(extracted: Dict[str, Any]) -> Dict[str, Any]:
+    features = extracted["features"]
+    blocks = features["blocks"]
+    main_set = set(features["main_blocks"])
+    features["clean_text"] = " ".join(blocks)
+    features["main_text"] = " ".join(blocks[i] for i in features["main_blocks"])
+    features["boilerplate_text"] = " ".join(text for i, text in enumerate(blocks) if i not in main_set)
+    return extracted
+
+
+def extract(
+    body: Body,
+    base_url: str,
+    encoding: Optional[str] = None,
+    max_chars: int = 12000,
+    boilerplate_chars: int = 1000,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    {"features": extract_page_features(...), **prompt_text(...)} for one page, in a worker
+    process when the pool is enabled. timeout (default EXTRACT_TASK_TIMEOUT_SECONDS) bounds the
+    wait for a worker, and the worker stops the task once it has run that long;
+    concurrent.futures.TimeoutError is raised when it runs out. If the pool is broken the page
+    is extracted inline instead.
+    """
+    if EXTRACT_PROCESSES <= 0 or not body:
+        return _extract(body, base_url, encoding, max_chars, boilerplate_chars)
+    timeout = EXTRACT_TASK_TIMEOUT_SECONDS if timeout is None else timeout
+    pool = _get_pool()
+    try:
+        future = pool.submit(
+            _run_limited, _extract_compact, timeout,
+            _payload(body), base_url, encoding, max_chars, boilerplate_chars,
+        )
+        try:
+            return _expand(future.result(timeout=timeout))
+        except FutureTimeout:
+            # Drop it if it is still queued; a running task is stopped by its own time limit
+            future.cancel()
+            raise
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start fresh next time, this page runs here
+        logger.warning("Extraction pool broke; restarting it")
+        _discard_pool(pool)
+        return _extract(body, base_url, encoding, max_chars, boilerplate_chars)
@@ -0,0 +1,166 @@
+"""
+Asynchronous analysis jobs: POST /jobs enqueues a URL and returns at once, a bounded
+worker pool runs the analysis, GET /jobs/<id> reports status and the rendered result.
+
+Web workers only touch the in-memory job table, so slow Gemini calls no longer hold
+a gunicorn worker for the whole analysis. With CHECKMATE_JOB_DB set, job records are
+mirrored to SQLite so any worker process can answer GET /jobs/<id>.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from checkmate.cache import SQLiteCache
+from checkmate.metrics import JOBS_QUEUED, JOBS_TOTAL
+from checkmate.service import analyze_url
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("CHECKMATE_JOB_WORKERS", "4"))
+# Jobs waiting for a worker beyond this are rejected (HTTP 503) instead of piling up
+JOB_QUEUE_DEPTH = int(os.getenv("CHECKMATE_JOB_QUEUE_DEPTH", "100"))
+# Finished jobs are kept this long after completion, then forgotten
+JOB_RETENTION_SECONDS = float(os.getenv("CHECKMATE_JOB_RETENTION_SECONDS", "3600"))
+JOB_DB = os.getenv("CHECKMATE_JOB_DB", "").strip()
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_ERROR = "error"
+FINISHED = (JOB_DONE, JOB_ERROR)
+
+
+class QueueFull(Exception):
+    """Raised by submit() when JOB_QUEUE_DEPTH jobs are already waiting."""
+
+
+class JobQueue:
+    def __init__(
+        self,
+        runner: Callable[..., Dict[str, Any]],
+        workers: int = JOB_WORKERS,
+        max_queued: int = JOB_QUEUE_DEPTH,
+        retention: float = JOB_RETENTION_SECONDS,
+        store: Optional[SQLiteCache] = None,
+    ):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self.retention = retention
+        self.store = store
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module (tests, CLI scripts) starts no threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="checkmate-job")
+        return self._executor
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        if self.store is not None:
+            self.store.set(job["id"], job)
+
+    def _purge(self, now: float) -> None:
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job["status"] in FINISHED and now - job["finished_at"] > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, url: str, refresh: bool = False) -> Dict[str, Any]:
+        """Enqueue an analysis and return a copy of the new job record. Raises QueueFull."""
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            if self._queued >= self.max_queued:
+                raise QueueFull(f"{self._queued} jobs already queued")
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": JOB_QUEUED,
+                "url": url,
+                "submitted_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job["id"]] = job
+            self._queued += 1
+            snapshot = copy.deepcopy(job)
+        JOBS_QUEUED.inc()
+        self._save(snapshot)
+        self._get_executor().submit(self._run, job["id"], refresh)
+        return snapshot
+
+    def _run(self, job_id: str, refresh: bool) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._queued -= 1
+            if job is None:
+                return
+            job["status"] = JOB_RUNNING
+            job["started_at"] = time.time()
+            snapshot = copy.deepcopy(job)
+        JOBS_QUEUED.dec()
+        self._save(snapshot)
+
+        result: Optional[Dict[str, Any]] = None
+        error: Optional[str] = None
+        try:
+            result = self.runner(job["url"], refresh=refresh)
+        except Exception as exc:
+            logger.exception("Job %s failed for %s: %s", job_id, job["url"], exc)
+            error = str(exc) or type(exc).__name__
+
+        with self._lock:
+            job["status"] = JOB_ERROR if error is not None else JOB_DONE
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.time()
+            snapshot = copy.deepcopy(job)
+        JOBS_TOTAL.inc(status=snapshot["status"])
+        self._save(snapshot)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of the job record, or None if unknown or past retention."""
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return copy.deepcopy(job)
+        if self.store is not None:
+            entry = self.store.get(job_id)
+            if entry is not None:
+                return entry[0]
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job["status"] == JOB_RUNNING)
+            return {"queued": self._queued, "running": running, "retained": len(self._jobs)}
+
+
+def _build_store() -> Optional[SQLiteCache]:
+    if not JOB_DB:
+        return None
+    try:
+        return SQLiteCache(JOB_DB, ttl=JOB_RETENTION_SECONDS, table="jobs")
+    except Exception as exc:
+        logger.warning("Job store disabled (%s): %s", JOB_DB, exc)
+        return None
+
+
+job_queue = JobQueue(analyze_url, store=_build_store())
@@ -0,0 +1,208 @@
+"""
+One-pass multi-keyword scanner shared by extraction, website-type heuristics and scoring.
+
+All terms of all families are compiled into a single regex shaped like a character trie,
+so the text is scanned once no matter how many families or terms there are, and every
+hit carries its position for evidence. Terms match whole words; a leading or trailing
+"*" lets a term be part of a longer word on that side ("password*" matches "passwords",
+"*storm*" matches "thunderstorm"). Spaces in a term match any run of whitespace.
+
+The table is KEYWORD_FAMILIES; CHECKMATE_KEYWORDS_FILE may point to a JSON object of
+{family: [terms]} whose families replace or extend the defaults.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_FAMILIES: Dict[str, Tuple[str, ...]] = {
+    # Sensitive-info requests (extraction keyword_hits)
+    "password": ("password*",),
+    "login_prompt": ("enter", "login", "log in", "sign in"),
+    "cvv": ("cvv", "security code"),
+    "ssn": ("ssn", "social security"),
+    "credit_card": ("credit card*", "card number*"),
+    "payment_pressure": ("limited time", "act now", "urgent*", "expires soon"),
+    # Blocks kept first when page text is truncated for Gemini
+    "priority_block": (
+        "contact*", "privacy", "terms", "copyright", "address*", "phone*", "email*", "e-mail*", "refund*",
+        "policy", "policies", "return policy", "returns",
+    ),
+    # Risk titles treated as topic safety rather than site safety for news sites (scoring)
+    "content_safety": (
+        "content safety", "topic safety", "dangerous topic*", "dangerous content", "unsafe content",
+        "extreme weather", "extreme cold", "extreme heat", "*storm*", "hurricane*", "tornado*",
+        "earthquake*", "wildfire*", "*flood*", "disaster*",
+    ),
+    # Website-type heuristics (gemini_page)
+    "company_signal": (
+        "career", "careers", "about us", "contact us", "join us", "open role", "open roles", "our team",
+        "product and services", "products and services", "investor relations", "press release",
+        "department", "departments", "internship", "internships", "culture", "who we are", "what we do",
+    ),
+    "news_signal": (
+        "breaking news", "latest news", "headline", "reported", "reporting", "journalist", "newsroom",
+        "news alert", "top stories", "local news", "world news", "politics", "sports", "weather", "traffic",
+    ),
+}
+
+KEYWORDS_FILE = os.getenv("CHECKMATE_KEYWORDS_FILE", "").strip()
+
+_END = ""  # trie key marking the end of a term
+
+
+class KeywordHit(NamedTuple):
+    family: str
+    term: str
+    start: int
+    end: int
+
+
+class _Variant(NamedTuple):
+    open_start: bool
+    open_end: bool
+    families: Tuple[str, ...]
+
+
+def _lower(text: str) -> str:
+    """
+    text.lower() with one character out per character in, so match offsets stay valid for text.
+    "İ" is the only character that lowercases to two ("i" plus a combining dot); it becomes "i".
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower()[0] for char in text)
+
+
+def _parse_term(raw: str) -> Tuple[str, bool, bool]:
+    term = " ".join(_lower(raw).split())
+    open_start, open_end = term.startswith("*"), term.endswith("*")
+    return term.strip("*").strip(), open_start, open_end
+
+
+def _trie_regex(node: Dict[str, dict]) -> str:
+    branches = []
+    for char in sorted(key for key in node if key != _END):
+        piece = r"\s+" if char == " " else re.escape(char)
+        branches.append(piece + _trie_regex(node[char]))
+    # Longer terms are tried first so the regex returns the longest term at each start
+    if _END in node:
+        branches.append("")
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+def _raw_length(matched: str, length: int) -> int:
+    """Characters of matched covering the first length characters of its whitespace-collapsed form."""
+    i = count = 0
+    while count < length and i < len(matched):
+        if matched[i].isspace():
+            while i < len(matched) and matched[i].isspace():
+                i += 1
+        else:
+            i += 1
+        count += 1
+    return i
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordScanner:
+    def __init__(self, table: Mapping[str, Iterable[str]]):
+        self.families = tuple(table)
+        # term -> [(open start, open end, families)]
+        variants: Dict[str, Dict[Tuple[bool, bool], Tuple[str, ...]]] = {}
+        trie: Dict[str, dict] = {}
+        for family, terms in table.items():
+            for raw in terms:
+                term, open_start, open_end = _parse_term(raw)
+                if not term:
+                    continue
+                by_shape = variants.setdefault(term, {})
+                families = by_shape.get((open_start, open_end), ())
+                if family not in families:
+                    by_shape[(open_start, open_end)] = families + (family,)
+                node = trie
+                for char in term:
+                    node = node.setdefault(char, {})
+                node[_END] = True
+        self._variants: Dict[str, List[_Variant]] = {
+            term: [_Variant(s, e, families) for (s, e), families in by_shape.items()]
+            for term, by_shape in variants.items()
+        }
+        # The regex returns the longest term at a position; every shorter term starting
+        # there is a prefix of it, so each match expands to all of its prefix terms
+        self._prefixes: Dict[str, List[str]] = {
+            term: sorted((other for other in variants if term.startswith(other)), key=len) for term in variants
+        }
+        # Word boundaries are checked per hit rather than in the regex: a pattern that starts with
+        # the trie's first characters lets re skip straight to candidate positions
+        body = _trie_regex(trie) if trie else None
+        self._pattern: Optional[re.Pattern] = re.compile(body) if body else None
+
+    def scan(
+        self, text: str, families: Optional[Iterable[str]] = None, max_hits: Optional[int] = None
+    ) -> Dict[str, List[KeywordHit]]:
+        """Hits per family (only families with hits), in text order; max_hits caps each family's list."""
+        hits: Dict[str, List[KeywordHit]] = {}
+        if not text or self._pattern is None:
+            return hits
+        wanted = frozenset(families) if families is not None else None
+        haystack = _lower(text)
+        size = len(text)
+        search = self._pattern.search
+        match = search(haystack)
+        while match is not None:
+            start = match.start()
+            # Both terms and haystack went through _lower, so the match is a trie term as is
+            matched = match.group()
+            starts_word = start == 0 or not _is_word_char(text[start - 1])
+            for term in self._prefixes.get(" ".join(matched.split()), ()):
+                end = start + _raw_length(matched, len(term))
+                ends_word = end == size or not _is_word_char(text[end])
+                for variant in self._variants[term]:
+                    if not (starts_word or variant.open_start) or not (ends_word or variant.open_end):
+                        continue
+                    for family in variant.families:
+                        if wanted is not None and family not in wanted:
+                            continue
+                        family_hits = hits.setdefault(family, [])
+                        if max_hits is None or len(family_hits) < max_hits:
+                            family_hits.append(KeywordHit(family, term, start, end))
+            # Resume one character later so overlapping terms ("social security code") are all found
+            match = search(haystack, start + 1)
+        return hits
+
+    def present(self, text: str, families: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        """Families with at least one hit in text."""
+        return frozenset(self.scan(text, families, max_hits=1))
+
+
+def load_keyword_table(path: str = KEYWORDS_FILE) -> Dict[str, Tuple[str, ...]]:
+    """KEYWORD_FAMILIES updated with the families in the JSON file at path (if any)."""
+    table = dict(KEYWORD_FAMILIES)
+    if not path:
+        return table
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            extra = json.load(handle)
+        for family, terms in extra.items():
+            if isinstance(terms, str) or not all(isinstance(term, str) for term in terms):
+                raise ValueError(f"terms for {family!r} must be a list of strings")
+            table[family] = tuple(terms)
+    except (OSError, ValueError, AttributeError, TypeError) as exc:
+        logger.warning("Ignoring keyword file %s: %s", path, exc)
+        return dict(KEYWORD_FAMILIES)
+    return table
+
+
+keyword_scanner = KeywordScanner(load_keyword_table())
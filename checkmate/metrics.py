@@ -0,0 +1,342 @@
+"""
+In-process latency and counter metrics.
+
+Two consumers:
+- per request: timings for each pipeline stage and external call, collected via a
+  context variable and attached to AnalysisResult.debug["timings"]
+- per process: Prometheus text-format counters/histograms served from GET /metrics
+
+Deliberately dependency-free (no prometheus_client); each gunicorn worker reports its own numbers.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [
+        '%s="%s"' % (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in pairs
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = row
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        with self._lock:
+            row = self._values.get(self._key(labels))
+            return row[-1] if row else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines: List[str] = []
+        for key, row in items:
+            for i, bound in enumerate(self.buckets):
+                le = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{le} {_format_value(row[i])}")
+            inf = _format_labels(self.label_names, key, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{inf} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {_format_value(row[-1])}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """collector() runs before every render, to refresh gauges that mirror other state."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded values (tests)."""
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "checkmate_stage_duration_seconds",
+    "Pipeline stage latency by stage and outcome.",
+    labels=("stage", "outcome"),
+))
+EXTERNAL_CALL_SECONDS = REGISTRY.register(Histogram(
+    "checkmate_external_call_duration_seconds",
+    "Latency of outbound calls (page fetch, Gemini, WHOIS, TLS probe, feed download).",
+    labels=("call", "outcome"),
+))
+GEMINI_429_TOTAL = REGISTRY.register(Counter(
+    "checkmate_gemini_429_total",
+    "Gemini responses rejected with 429 / RESOURCE_EXHAUSTED.",
+))
+CACHE_REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "checkmate_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss).",
+    labels=("cache", "result"),
+))
+COALESCED_TOTAL = REGISTRY.register(Counter(
+    "checkmate_coalesced_requests_total",
+    "Analyses answered by waiting on an identical in-flight analysis.",
+))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "checkmate_requests_total",
+    "Handled API requests by endpoint and HTTP status.",
+    labels=("endpoint", "status"),
+))
+JOBS_QUEUED = REGISTRY.register(Gauge(
+    "checkmate_jobs_queued",
+    "Async analysis jobs waiting for a worker.",
+))
+JOBS_TOTAL = REGISTRY.register(Counter(
+    "checkmate_jobs_total",
+    "Finished async analysis jobs by final status.",
+    labels=("status",),
+))
+FETCH_BYTES_TOTAL = REGISTRY.register(Counter(
+    "checkmate_fetch_bytes_total",
+    "Page body bytes fetched: kind=wire (as received, possibly compressed) or decoded.",
+    labels=("kind",),
+))
+HTTP_POOL = REGISTRY.register(Gauge(
+    "checkmate_http_pool",
+    "Shared fetch connection pool: hosts, connections_opened, requests, idle_connections, active_fetches.",
+    labels=("stat",),
+))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "checkmate_in_flight_requests",
+    "API requests currently being processed.",
+    labels=("endpoint",),
+))
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS_TOTAL.inc(cache=cache, result="hit" if hit else "miss")
+
+
+# -----------------------------
+# Per-request timings
+# -----------------------------
+
+class Timings:
+    """Durations collected while serving one request (stages + external calls)."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self.stages[stage] = {"seconds": round(seconds, 4), "outcome": outcome}
+
+    def add_call(self, call: str, seconds: float, outcome: str) -> None:
+        with self._lock:
+            self.calls.append({"call": call, "seconds": round(seconds, 4), "outcome": outcome})
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_seconds": round(time.monotonic() - self.started, 4),
+                "stages": dict(self.stages),
+                "calls": list(self.calls),
+            }
+
+
+_current: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar("checkmate_timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Start a per-request timing scope; nested scopes reuse the outer one."""
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+    timings = Timings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def observe_stage(stage: str, seconds: float, outcome: str) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage, outcome=outcome)
+    timings = _current.get()
+    if timings is not None:
+        timings.add_stage(stage, seconds, outcome)
+
+
+@contextmanager
+def timed_call(call: str) -> Iterator[None]:
+    """Time one outbound call; outcome is "ok" or the exception class name."""
+    start = time.monotonic()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException as exc:
+        outcome = type(exc).__name__
+        raise
+    finally:
+        seconds = time.monotonic() - start
+        EXTERNAL_CALL_SECONDS.observe(seconds, call=call, outcome=outcome)
+        timings = _current.get()
+        if timings is not None:
+            timings.add_call(call, seconds, outcome)
+
+
+@contextmanager
+def track_in_flight(endpoint: str) -> Iterator[None]:
+    IN_FLIGHT.inc(endpoint=endpoint)
+    try:
+        yield
+    finally:
+        IN_FLIGHT.dec(endpoint=endpoint)
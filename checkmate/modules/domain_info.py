@@ -2,21 +2,12 @@ from __future__ import annotations
 
 from datetime import date, datetime
 from typing import Any, Dict, Optional
-from urllib.parse import urlparse
 
-import tldextract
 import whois
 
-
-def _normalize_registered_domain(value: str) -> Optional[str]:
-    if not value:
-        return None
-    parsed = urlparse(value)
-    host = parsed.netloc or parsed.path
-    extracted = tldextract.extract(host)
-    if not extracted.suffix:
-        return None
-    return f"{extracted.domain}.{extracted.suffix}".lower()
+from checkmate.domains import registered_domain as _registered_domain
+from checkmate.metrics import timed_call
+from checkmate.replay import replayable
 
 
 def _coerce_date(value: Any) -> Optional[str]:
@@ -31,8 +22,18 @@ def _coerce_date(value: Any) -> Optional[str]:
     return None
 
 
-def get_domain_info(url_or_domain: str) -> Dict[str, Optional[str]]:
-    registered_domain = _normalize_registered_domain(url_or_domain)
+@replayable("whois", key=lambda domain, timeout=10: domain)
+def _whois_lookup(domain: str, timeout: float = 10) -> Dict[str, Optional[str]]:
+    with timed_call("whois"):
+        result = whois.whois(domain, timeout=max(1, int(timeout)))
+    return {
+        "creation_date": _coerce_date(getattr(result, "creation_date", None)),
+        "registrar": getattr(result, "registrar", None),
+    }
+
+
+def get_domain_info(url_or_domain: str, timeout: float = 10) -> Dict[str, Optional[str]]:
+    registered_domain = _registered_domain(url_or_domain)
     creation_date = None
     registrar = None
     whois_error = None
@@ -46,9 +47,9 @@ def get_domain_info(url_or_domain: str) -> Dict[str, Optional[str]]:
         }
 
     try:
-        result = whois.whois(registered_domain)
-        creation_date = _coerce_date(getattr(result, "creation_date", None))
-        registrar = getattr(result, "registrar", None)
+        result = _whois_lookup(registered_domain, timeout=timeout)
+        creation_date = result["creation_date"]
+        registrar = result["registrar"]
     except Exception as exc:
         whois_error = str(exc)
 
@@ -1,14 +1,513 @@
+import datetime
+import json
+import os
 import re
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional, Set, Tuple, Union
 from urllib.parse import urlparse
-import tldextract
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, CData, FeatureNotFound, NavigableString, Tag
 import phonenumbers
 
-def extract_page_features(html: str, base_url: str) -> Dict[str, Any]:
+try:  # optional: htmldate is the last-resort publication-date finder
+    from htmldate import find_date
+except ImportError:
+    find_date = None
+
+from checkmate.domains import hostname, registered_domain
+from checkmate.keywords import keyword_scanner
+
+logger = logging.getLogger(__name__)
+
+# BeautifulSoup tree builders we support, fastest first. "auto" picks the first one installed;
+# html.parser (pure Python, always available) is kept for compatibility.
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+
+def _configured_parser(value: str) -> str:
+    """CHECKMATE_HTML_PARSER, checked once at import: an unknown name warns and becomes "auto"."""
+    name = value.strip().lower() or "auto"
+    if name != "auto" and name not in PARSER_BACKENDS:
+        logger.warning(
+            "Unknown CHECKMATE_HTML_PARSER %r (expected auto, %s); using auto", value, ", ".join(PARSER_BACKENDS)
+        )
+        return "auto"
+    return name
+
+
+HTML_PARSER = _configured_parser(os.getenv("CHECKMATE_HTML_PARSER", "auto"))
+
+
+def available_parsers() -> List[str]:
+    """Backends from PARSER_BACKENDS that can be used in this environment."""
+    available = []
+    for name in PARSER_BACKENDS:
+        try:
+            BeautifulSoup("", name)
+        except FeatureNotFound:
+            continue
+        available.append(name)
+    return available
+
+
+def resolve_parser(name: Optional[str] = None) -> str:
+    """
+    Backend to use for name (default CHECKMATE_HTML_PARSER). "auto" is the fastest available one;
+    an explicit backend that is not installed falls back to html.parser with a warning.
+    Only an explicit name can be unknown (ValueError); HTML_PARSER is validated at import.
+    """
+    name = (name or HTML_PARSER).lower()
+    available = _AVAILABLE_PARSERS
+    if name == "auto":
+        return available[0]
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser {name!r}; expected one of auto, {', '.join(PARSER_BACKENDS)}")
+    if name not in available:
+        logger.warning("HTML parser %s is not installed; using html.parser", name)
+        return "html.parser"
+    return name
+
+
+def make_soup(html: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse html with the configured backend (see resolve_parser)."""
+    return BeautifulSoup(html, resolve_parser(parser))
+
+
+_AVAILABLE_PARSERS = available_parsers()
+
+# Contact extraction: default region for numbers written without a country code, and caps on
+# how many distinct phones/emails (and digit windows) one page may yield
+PHONE_REGION = os.getenv("CHECKMATE_PHONE_REGION", "US").strip().upper() or "US"
+MAX_PHONES = int(os.getenv("CHECKMATE_MAX_PHONES", "20"))
+MAX_EMAILS = int(os.getenv("CHECKMATE_MAX_EMAILS", "50"))
+MAX_PHONE_WINDOWS = 2000
+
+_EMAIL_LOCAL_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-")
+_EMAIL_DOMAIN = re.compile(r"[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+_EMAIL_MAX_LOCAL = 64
+_EMAIL_MAX_DOMAIN = 255
+# A run of at least 7 digits (the shortest dialable number with a country code) with the
+# separators people put in phone numbers; runs that are plainly dates are not candidates.
+# Starting on a digit lets re skip ahead; a leading "+" or "(" falls inside the context.
+_PHONE_CANDIDATE = re.compile(r"\d(?:[\s().\-/]{0,3}\d){6,20}")
+_DATE_LIKE = re.compile(r"\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{4}")
+# Text kept around each run so phonenumbers still sees "+", "tel:", extensions and neighbours
+_PHONE_CONTEXT = 16
+# Touching windows are merged up to this size, so a numeric table is matched in pieces
+_PHONE_MAX_WINDOW = 512
+
+
+def _find_emails(text: str, limit: int = MAX_EMAILS) -> List[str]:
+    """
+    Distinct addresses matching [local]@[domain].[tld], found by jumping between "@" signs
+    instead of running the pattern at every offset. Matches do not overlap, as with re.findall.
+    """
+    emails: List[str] = []
+    seen = set()
+    floor = 0
+    at = text.find("@")
+    while at != -1 and len(emails) < limit:
+        start = at
+        lowest = max(floor, at - _EMAIL_MAX_LOCAL)
+        while start > lowest and text[start - 1] in _EMAIL_LOCAL_CHARS:
+            start -= 1
+        domain = _EMAIL_DOMAIN.match(text, at + 1, at + 1 + _EMAIL_MAX_DOMAIN) if start < at else None
+        if domain is not None:
+            email = text[start:domain.end()]
+            if email not in seen:
+                seen.add(email)
+                emails.append(email)
+            floor = domain.end()
+        at = text.find("@", max(at + 1, floor))
+    return sorted(emails)
+
+
+def _phone_windows(text: str) -> List[Tuple[int, int]]:
+    """Spans of text around digit runs that could be phone numbers, merged when they touch."""
+    windows: List[Tuple[int, int]] = []
+    for match in _PHONE_CANDIDATE.finditer(text):
+        if _DATE_LIKE.fullmatch(match.group()):
+            continue
+        start = max(0, match.start() - _PHONE_CONTEXT)
+        end = min(len(text), match.end() + _PHONE_CONTEXT)
+        if windows and start <= windows[-1][1] and end - windows[-1][0] <= _PHONE_MAX_WINDOW:
+            windows[-1] = (windows[-1][0], end)
+        elif len(windows) >= MAX_PHONE_WINDOWS:
+            break
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def _find_phones(text: str, region: str = PHONE_REGION, limit: int = MAX_PHONES) -> List[str]:
+    """Distinct E.164 numbers; phonenumbers only sees the windows around digit runs."""
+    phones = set()
+    checked = set()
+    for start, end in _phone_windows(text):
+        window = text[start:end]
+        # Headers/footers repeat the same number; each distinct window is matched once
+        if window in checked:
+            continue
+        checked.add(window)
+        try:
+            for match in phonenumbers.PhoneNumberMatcher(window, region):
+                phones.add(phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164))
+        except Exception:
+            continue  # Fail soft
+        if len(phones) >= limit:
+            break
+    return sorted(phones)[:limit]
+
+
+# Priority truncation: numeric claims ("40% off", "$1,200", "3 million users") and sentence breaks
+_NUMERIC_CLAIM = re.compile(
+    r"[$€£¥]\s?\d|\d[\d,.]*\s?(?:%|percent\b|per cent\b|million\b|billion\b|thousand\b)", re.I
+)
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Leftover budget below this is not worth a partial block
+_MIN_PARTIAL_BLOCK = 80
+
+# Keyword families behind keyword_hits, and how many hit positions per family are kept as evidence
+SENSITIVE_KEYWORD_FAMILIES = ("password", "login_prompt", "cvv", "ssn", "credit_card", "payment_pressure")
+KEYWORD_EVIDENCE_LIMIT = 5
+
+# Main-content detection (link density and text length per block, then neighbour context).
+# Blocks mostly made of link text are menus; long blocks of prose are content.
+_LINK_DENSITY_BOILERPLATE = 0.5
+_LINK_DENSITY_PROSE = 0.33
+_SHORT_BLOCK = 70
+_LONG_BLOCK = 200
+_MIN_PROSE_WORDS = 10
+_SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+_BOILERPLATE, _MAIN, _NEAR_MAIN, _SHORT, _HEADING = range(5)
+
+# Publication date: JSON-LD, meta tags, <time> and the URL are read from the walk already done;
+# only when none of them has a date is htmldate run, on at most DATE_FALLBACK_CHARS of the page
+DATE_FALLBACK_CHARS = int(os.getenv("CHECKMATE_DATE_FALLBACK_CHARS", "200000"))
+_DATE_META_NAMES = frozenset({
+    "article:published_time", "og:published_time", "datepublished", "date", "dc.date", "dc.date.issued",
+    "dcterms.created", "dcterms.date", "dcterms.issued", "pubdate", "publishdate", "publish-date", "publish_date",
+    "article.published", "sailthru.date", "parsely-pub-date", "citation_publication_date", "citation_date",
+})
+# Lower ranks win; sources of equal rank are taken in page order
+_DATE_RANK_JSON_LD, _DATE_RANK_META, _DATE_RANK_TIME_PUBLISHED, _DATE_RANK_TIME, _DATE_RANK_URL = range(5)
+_DATE_SOURCES = {
+    _DATE_RANK_JSON_LD: "json_ld",
+    _DATE_RANK_META: "meta",
+    _DATE_RANK_TIME_PUBLISHED: "time",
+    _DATE_RANK_TIME: "time",
+    _DATE_RANK_URL: "url",
+}
+_JSON_LD_DATE_KEYS = ("datePublished", "dateCreated", "uploadDate")
+_DATE_VALUE = re.compile(r"(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})|(?<!\d)(\d{4})(\d{2})(\d{2})(?!\d)")
+_URL_DATE = re.compile(r"/((?:19|20)\d{2})[/-](\d{1,2})[/-](\d{1,2})(?=[/_-]|$)")
+_MIN_DATE_YEAR = 1995
+
+# Subtrees that never contribute text, links, headings or meta; the walk does not enter them
+_DROP_TAGS = frozenset({"script", "style", "noscript", "iframe", "svg"})
+# Page chrome: entered for headings and meta only (their text and links are boilerplate)
+_CHROME_TAGS = frozenset({"nav", "footer", "header"})
+_HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+_META_NAMES = frozenset({"description", "og:title", "og:description", "keywords"})
+# Exact types get_text() counts as text (Comment, Doctype, Script etc. subclass NavigableString)
+_TEXT_TYPES = (NavigableString, CData)
+# Elements that start a new line of text; clean_text is also kept as these blocks
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "br", "caption", "dd", "details", "dialog", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "form", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol",
+    "p", "pre", "section", "summary", "table", "td", "th", "tr", "ul",
+})
+_HEADING_BLOCK_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+_CLOSE_HEADING = object()
+_END_BLOCK = object()
+_END_LINK = object()
+
+
+class _Block(NamedTuple):
+    text: str
+    link_chars: int
+    heading: bool
+
+
+class _PageWalk:
+    """
+    Title, headings, meta, hrefs and visible text strings gathered in one depth-first walk.
+    _DROP_TAGS subtrees are skipped, _CHROME_TAGS subtrees only feed headings and meta,
+    and the tree is left unmodified. visited counts the nodes touched; block_starts are the
+    indexes into text_parts where a block-level element opens or closes, heading_starts
+    those where a heading opens, and link_parts the text_parts inside <a> elements.
+    """
+
+    __slots__ = (
+        "title", "headings", "meta", "hrefs", "text_parts", "block_starts", "heading_starts", "link_parts",
+        "json_ld", "date_candidates", "visited",
+    )
+
+    def __init__(self, soup: BeautifulSoup):
+        self.title: Optional[str] = None
+        self.headings: List[str] = []
+        self.meta: Dict[str, str] = {}
+        self.hrefs: List[str] = []
+        self.text_parts: List[str] = []
+        self.block_starts: List[int] = []
+        self.heading_starts: Set[int] = set()
+        self.link_parts: Set[int] = set()
+        # Raw JSON-LD scripts, and (rank, value) publication-date candidates from meta/<time>
+        self.json_ld: List[str] = []
+        self.date_candidates: List[Tuple[int, str]] = []
+        self.visited = 0
+        self._walk(soup)
+
+    def blocks(self) -> List[_Block]:
+        """Visible text per block, whitespace-normalized; joined with spaces the texts are clean_text."""
+        parts = self.text_parts
+        link_parts = self.link_parts
+        blocks = []
+        previous = 0
+        for boundary in self.block_starts + [len(parts)]:
+            if boundary > previous:
+                text = " ".join(" ".join(parts[previous:boundary]).split())
+                if text:
+                    link_chars = sum(len(parts[i].strip()) for i in range(previous, boundary) if i in link_parts)
+                    blocks.append(_Block(text, link_chars, previous in self.heading_starts))
+                previous = boundary
+        return blocks
+
+    def _walk(self, root: Tag) -> None:
+        seen_title = False
+        heading_parts: List[List[str]] = []
+        open_headings: List[List[str]] = []
+        text_parts = self.text_parts
+        block_starts = self.block_starts
+        link_parts = self.link_parts
+        link_depth = 0
+        # (node, inside chrome); _CLOSE_HEADING entries end the innermost open heading,
+        # _END_BLOCK / _END_LINK entries mark where a block-level element's / link's text ends
+        stack = [(child, False) for child in reversed(root.contents)]
+        visited = 0
+        while stack:
+            node, chrome = stack.pop()
+            if node is _CLOSE_HEADING:
+                open_headings.pop()
+                continue
+            if node is _END_BLOCK:
+                block_starts.append(len(text_parts))
+                continue
+            if node is _END_LINK:
+                link_depth -= 1
+                continue
+            visited += 1
+            if type(node) in _TEXT_TYPES:
+                if not chrome:
+                    if link_depth:
+                        link_parts.add(len(text_parts))
+                    text_parts.append(node)
+                if open_headings:
+                    stripped = node.strip()
+                    if stripped:
+                        for parts in open_headings:
+                            parts.append(stripped)
+                continue
+            if not isinstance(node, Tag):
+                continue
+            name = node.name
+            if name in _DROP_TAGS:
+                if name == "script" and node.attrs.get("type", "").lower() == "application/ld+json" and node.string:
+                    self.json_ld.append(node.string)
+                continue
+            if name in _BLOCK_TAGS:
+                block_starts.append(len(text_parts))
+                stack.append((_END_BLOCK, chrome))
+                if name in _HEADING_BLOCK_TAGS:
+                    self.heading_starts.add(len(text_parts))
+            if name in _CHROME_TAGS:
+                chrome = True
+            elif name in _HEADING_TAGS:
+                parts: List[str] = []
+                heading_parts.append(parts)
+                open_headings.append(parts)
+                stack.append((_CLOSE_HEADING, chrome))
+            elif name == "meta":
+                self._add_meta(node.attrs)
+            elif name == "a":
+                href = node.attrs.get("href")
+                if href is not None and not chrome:
+                    self.hrefs.append(href)
+                link_depth += 1
+                stack.append((_END_LINK, chrome))
+            elif name == "title" and not seen_title:
+                seen_title = True
+                self.title = node.string.strip() if node.string else None
+            elif name == "time" and not chrome:
+                # Header/footer clocks show today's date, not the article's
+                value = node.attrs.get("datetime")
+                if value:
+                    published = "pubdate" in node.attrs or node.attrs.get("itemprop") == "datePublished"
+                    self.date_candidates.append((_DATE_RANK_TIME_PUBLISHED if published else _DATE_RANK_TIME, value))
+            children = node.contents
+            if children:
+                stack.extend((child, chrome) for child in reversed(children))
+        self.visited = visited
+        self.headings = [text for text in ("".join(parts) for parts in heading_parts) if text]
+
+    def _add_meta(self, attrs: Dict[str, Any]) -> None:
+        name = attrs.get("name") or attrs.get("property")
+        content = attrs.get("content")
+        if content and (name or attrs.get("itemprop") or "").lower() in _DATE_META_NAMES:
+            self.date_candidates.append((_DATE_RANK_META, content))
+        if name and content:
+            name_lower = name.lower()
+            if name_lower in _META_NAMES:
+                self.meta[name_lower] = content.strip()
+
+
+def _normalize_date(value: str) -> Optional[str]:
+    """YYYY-MM-DD for the first date in value, if it is a real calendar date that is not in the future."""
+    match = _DATE_VALUE.search(value)
+    if match is None:
+        return None
+    year, month, day = (int(group) for group in match.groups() if group is not None)
+    try:
+        found = datetime.date(year, month, day)
+    except ValueError:
+        return None
+    # A day of slack for time zones ahead of ours
+    if found.year < _MIN_DATE_YEAR or found > datetime.date.today() + datetime.timedelta(days=1):
+        return None
+    return found.isoformat()
+
+
+def _json_ld_dates(raw: str) -> List[str]:
+    """Publication-date values in one JSON-LD script, most specific key first."""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return []
+    found: Dict[str, List[str]] = {key: [] for key in _JSON_LD_DATE_KEYS}
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            for key in _JSON_LD_DATE_KEYS:
+                if isinstance(item.get(key), str):
+                    found[key].append(item[key])
+            # Nested entities (@graph, mainEntity, ...) are searched after the outer one
+            stack.extend(reversed([value for value in item.values() if isinstance(value, (dict, list))]))
+    return [value for key in _JSON_LD_DATE_KEYS for value in found[key]]
+
+
+def _publication_date(page: _PageWalk, base_url: str, html: str) -> Tuple[Optional[str], Optional[str]]:
+    """(YYYY-MM-DD, source) for the page's publication date, or (None, None)."""
+    candidates = [(_DATE_RANK_JSON_LD, value) for raw in page.json_ld for value in _json_ld_dates(raw)]
+    candidates.extend(page.date_candidates)
+    url_match = _URL_DATE.search(urlparse(base_url).path)
+    if url_match:
+        candidates.append((_DATE_RANK_URL, "-".join(url_match.groups())))
+    # sorted() is stable, so equal ranks stay in page order
+    for rank, value in sorted(candidates, key=lambda candidate: candidate[0]):
+        date = _normalize_date(value)
+        if date:
+            return date, _DATE_SOURCES[rank]
+    if find_date is None or DATE_FALLBACK_CHARS <= 0:
+        return None, None
+    try:
+        date = find_date(
+            html[:DATE_FALLBACK_CHARS], extensive_search=False, original_date=True, url=base_url,
+            min_date=f"{_MIN_DATE_YEAR}-01-01",
+        )
+    except Exception as exc:
+        logger.debug("htmldate failed for %s: %s", base_url, exc)
+        return None, None
+    date = _normalize_date(date) if date else None
+    return (date, "htmldate") if date else (None, None)
+
+
+def _initial_class(block: _Block) -> int:
+    length = len(block.text)
+    density = block.link_chars / length
+    if density > _LINK_DENSITY_BOILERPLATE:
+        return _BOILERPLATE
+    if block.heading:
+        return _HEADING
+    if length < _SHORT_BLOCK:
+        return _SHORT
+    if density > _LINK_DENSITY_PROSE:
+        return _BOILERPLATE
+    if length >= _LONG_BLOCK:
+        return _MAIN
+    if len(block.text.split()) >= _MIN_PROSE_WORDS and _SENTENCE_END.search(block.text):
+        return _NEAR_MAIN
+    return _SHORT
+
+
+def _neighbours(classes: List[int], decided: Tuple[int, ...]) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Per block, indexes of the nearest blocks before and after it whose class is in decided."""
+    before: List[Optional[int]] = []
+    last = None
+    for index, cls in enumerate(classes):
+        before.append(last)
+        if cls in decided:
+            last = index
+    after: List[Optional[int]] = [None] * len(classes)
+    last = None
+    for index in range(len(classes) - 1, -1, -1):
+        after[index] = last
+        if classes[index] in decided:
+            last = index
+    return list(zip(before, after))
+
+
+def _main_block_indexes(blocks: List[_Block]) -> List[int]:
+    """
+    Indexes of the blocks that make up the page's main content. Each block is first judged on
+    its own (link density, length, sentence-like prose); undecided blocks then take the verdict
+    of their neighbours: medium prose is main unless boilerplate blocks enclose it, short text
+    follows the nearer of the main/boilerplate blocks around it, and a heading is main when the
+    block it introduces is. A page with no main block at all is returned whole.
+    """
+    classes = [_initial_class(block) for block in blocks]
+    resolved = list(classes)
+    neighbours = _neighbours(classes, (_BOILERPLATE, _MAIN, _NEAR_MAIN))
+    for index, cls in enumerate(classes):
+        if cls == _NEAR_MAIN:
+            before, after = neighbours[index]
+            enclosed = before is not None and after is not None and classes[before] == classes[after] == _BOILERPLATE
+            resolved[index] = _BOILERPLATE if enclosed else _MAIN
+    classes = resolved
+    resolved = list(classes)
+    neighbours = _neighbours(classes, (_BOILERPLATE, _MAIN))
+    for index, cls in enumerate(classes):
+        if cls == _SHORT:
+            before, after = neighbours[index]
+            if before is None or (after is not None and after - index < index - before):
+                nearest = after
+            else:
+                nearest = before
+            resolved[index] = _MAIN if nearest is not None and classes[nearest] == _MAIN else _BOILERPLATE
+    classes = resolved
+    following = None
+    for index in range(len(classes) - 1, -1, -1):
+        if classes[index] == _HEADING:
+            classes[index] = _MAIN if following == _MAIN else _BOILERPLATE
+        else:
+            following = classes[index]
+    main = [index for index, cls in enumerate(classes) if cls == _MAIN]
+    return main or list(range(len(blocks)))
+
+
+def extract_page_features(
+    html: Union[str, bytes, memoryview],
+    base_url: str,
+    encoding: Optional[str] = None,
+    parser: Optional[str] = None,
+    phone_region: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Extracts features from HTML for analysis.
+    html may be raw page bytes (e.g. safe_fetch's buffer) decoded with encoding (default UTF-8).
+    parser overrides CHECKMATE_HTML_PARSER for this call ("auto", "lxml" or "html.parser").
+    phone_region is the region for numbers without a country code (default CHECKMATE_PHONE_REGION).
     """
     if not html:
         return {
@@ -16,57 +515,50 @@ def extract_page_features(html: str, base_url: str) -> Dict[str, Any]:
             "headings": [],
             "meta": {},
             "clean_text": "",
+            "blocks": [],
+            "main_text": "",
+            "boilerplate_text": "",
+            "main_blocks": [],
             "links_internal": [],
             "links_external": [],
             "emails": [],
             "phones": [],
-            "keyword_hits": {}
+            "keyword_hits": {},
+            "keyword_evidence": {},
+            "published_date": None,
+            "published_date_source": None,
         }
 
-    soup = BeautifulSoup(html, 'html.parser')
+    if not isinstance(html, str):
+        # str() decodes straight from the buffer; no intermediate bytes copy
+        html = str(html, encoding or "utf-8", "replace")
+    soup = make_soup(html, parser)
 
-    # 1. Title
-    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    # 1-4. Title, headings, meta tags and clean text in a single walk of the tree.
+    # Scripts, styles, nav, footer etc. are skipped to reduce noise; comments are never text.
+    page = _PageWalk(soup)
+    title = page.title
+    headings = page.headings
+    meta = page.meta
+    segments = page.blocks()
+    blocks = [segment.text for segment in segments]
+    clean_text = ' '.join(blocks)
 
-    # 2. Headings
-    headings = []
-    for h in soup.find_all(['h1', 'h2', 'h3']):
-        text = h.get_text(strip=True)
-        if text:
-            headings.append(text)
-
-    # 3. Meta tags
-    meta = {}
-    for tag in soup.find_all('meta'):
-        name = tag.get('name') or tag.get('property')
-        content = tag.get('content')
-        if name and content:
-            name_lower = name.lower()
-            if name_lower in ['description', 'og:title', 'og:description', 'keywords']:
-                meta[name_lower] = content.strip()
-
-    # 4. Clean Text (Deterministic)
-    # Remove scripts, styles, nav, footer, etc. to reduce noise
-    for element in soup(['script', 'style', 'nav', 'footer', 'header', 'noscript', 'iframe', 'svg']):
-        element.decompose()
-    
-    # Remove comments
-    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
-        comment.extract()
-
-    # Get text and normalize whitespace
-    text = soup.get_text(separator=' ')
-    clean_text = ' '.join(text.split())
+    # 4b. Main content vs boilerplate (menus, link lists, banners), by block
+    main_blocks = _main_block_indexes(segments)
+    main_set = set(main_blocks)
+    main_text = ' '.join(blocks[i] for i in main_blocks)
+    boilerplate_text = ' '.join(text for i, text in enumerate(blocks) if i not in main_set)
 
     # 5. Links Classification
     links_internal = []
     links_external = []
     
-    base_ext = tldextract.extract(base_url)
-    base_domain = f"{base_ext.domain}.{base_ext.suffix}"
+    # Hosts without a public suffix (localhost, IPs) are compared as-is
+    base_domain = registered_domain(base_url) or hostname(base_url)
 
-    for a in soup.find_all('a', href=True):
-        href = a['href'].strip()
+    for href in page.hrefs:
+        href = href.strip()
         if not href or href.startswith(('javascript:', 'mailto:', 'tel:')):
             continue
 
@@ -88,9 +580,8 @@ def extract_page_features(html: str, base_url: str) -> Dict[str, Any]:
             links_internal.append(abs_url)
         else:
             # Absolute link
-            href_ext = tldextract.extract(href)
-            href_domain = f"{href_ext.domain}.{href_ext.suffix}"
-            
+            href_domain = registered_domain(href) or hostname(href)
+
             if href_domain == base_domain:
                 links_internal.append(href)
             else:
@@ -99,81 +590,152 @@ def extract_page_features(html: str, base_url: str) -> Dict[str, Any]:
     links_internal = sorted(list(set(links_internal)))
     links_external = sorted(list(set(links_external)))
 
-    # 6. Emails (Regex)
-    # Simple regex for emails
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    emails = sorted(list(set(re.findall(email_pattern, clean_text))))
+    # 6. Emails (only around "@" signs)
+    emails = _find_emails(clean_text)
 
-    # 7. Phones (phonenumbers lib)
-    phones = []
-    try:
-        # We search in the raw text or clean text. Clean text is safer.
-        # "US" is a default region, might need to be smarter or generic
-        for match in phonenumbers.PhoneNumberMatcher(clean_text, "US"):
-            phones.append(phonenumbers.format_number(match.number, phonenumbers.PhoneNumberFormat.E164))
-    except Exception:
-        pass # Fail soft
-    phones = sorted(list(set(phones)))
-
-    # 8. Keyword Hits (Sensitive info)
-    text_lower = clean_text.lower()
+    # 7. Phones (phonenumbers lib, only on windows around digit runs)
+    phones = _find_phones(clean_text, (phone_region or PHONE_REGION).upper())
+
+    # 8. Keyword Hits (Sensitive info), all families in one scan; positions are offsets into clean_text
+    found = keyword_scanner.scan(clean_text, SENSITIVE_KEYWORD_FAMILIES, max_hits=KEYWORD_EVIDENCE_LIMIT)
     keyword_hits = {
-        "asks_password": "password" in text_lower and ("enter" in text_lower or "login" in text_lower),
-        "asks_cvv": "cvv" in text_lower or "security code" in text_lower,
-        "asks_ssn": "ssn" in text_lower or "social security" in text_lower,
-        "asks_credit_card": "credit card" in text_lower or "card number" in text_lower,
-        "payment_pressure_terms": any(term in text_lower for term in ["limited time", "act now", "urgent", "expires soon"])
+        "asks_password": "password" in found and "login_prompt" in found,
+        "asks_cvv": "cvv" in found,
+        "asks_ssn": "ssn" in found,
+        "asks_credit_card": "credit_card" in found,
+        "payment_pressure_terms": "payment_pressure" in found
     }
+    keyword_evidence = {
+        family: [{"term": hit.term, "start": hit.start, "end": hit.end} for hit in hits]
+        for family, hits in found.items()
+    }
+
+    # 9. Publication date (structured data from the walk, then a bounded htmldate pass)
+    published_date, published_date_source = _publication_date(page, base_url, html)
 
     return {
         "title": title,
         "headings": headings,
         "meta": meta,
         "clean_text": clean_text,
+        "blocks": blocks,
+        "main_text": main_text,
+        "boilerplate_text": boilerplate_text,
+        "main_blocks": main_blocks,
         "links_internal": links_internal,
         "links_external": links_external,
         "emails": emails,
         "phones": phones,
-        "keyword_hits": keyword_hits
+        "keyword_hits": keyword_hits,
+        "keyword_evidence": keyword_evidence,
+        "published_date": published_date,
+        "published_date_source": published_date_source,
     }
 
-def truncate_clean_text(text: str, title: Optional[str] = None, headings: List[str] = None, max_chars: int = 12000) -> str:
+def _is_priority_block(block: str) -> bool:
+    """Blocks worth keeping first: contact/legal/refund wording, emails, phone numbers, numeric claims."""
+    return (
+        "@" in block
+        or bool(keyword_scanner.scan(block, ("priority_block",), max_hits=1))
+        or _NUMERIC_CLAIM.search(block) is not None
+        or _PHONE_CANDIDATE.search(block) is not None
+    )
+
+
+def _cut_at_word(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return cut[:space] if space > 0 else cut
+
+
+def truncate_clean_text(
+    text: str,
+    title: Optional[str] = None,
+    headings: List[str] = None,
+    max_chars: int = 12000,
+    blocks: Optional[List[str]] = None,
+) -> str:
     """
     Truncates text to max_chars while preserving important sections.
     Strategy:
     1. Keep Title + Headings (high signal)
-    2. Scan for paragraphs with contact/legal keywords or numbers
+    2. Keep blocks with contact/legal keywords, emails, phone numbers or numeric claims
     3. Fill remaining space with the start of the text
+    Text that already fits is returned unchanged. Otherwise the chosen blocks are emitted in
+    page order, one per line, each block at most once. blocks are the page's block-level
+    segments (extract_page_features' "blocks"); without them the text is split into sentences.
+    Every step is a single pass over the blocks.
     """
     if len(text) <= max_chars:
         return text
 
-    important_keywords = ["contact", "privacy", "terms", "copyright", "address", "phone", "email", "refund", "policy"]
-    
     # Build priority content
     priority_parts = []
-    
     if title:
         priority_parts.append(f"TITLE: {title}")
-    
     if headings:
         priority_parts.append("HEADINGS: " + " | ".join(headings[:10])) # limit headings
+    header = "\n".join(priority_parts)[:max_chars]
+    # Each block costs its length plus the newline before it; without a header the first block has none
+    budget = max_chars - len(header) if header else max_chars + 1
 
-    # Split text into chunks (e.g. paragraphs or roughly by newlines if preserved, but clean_text is space-joined)
-    # Since clean_text is space-joined, we can't easily split by paragraph. 
-    # We'll use a sliding window or sentence splitting if possible, 
-    # but for robustness/speed, let's just take the first N chars as the base, 
-    # and maybe search for keywords in the *rest* to append?
-    
-    # Actually, the prompt says: "keep paragraphs that contain contact/legal keywords".
-    # But our `clean_text` function flattened everything to single spaces.
-    # To do this right, we should have preserved some structure in `clean_text` or re-parse.
-    # Given the constraint of the previous function returning a flat string, 
-    # we will stick to a simpler truncation: First N chars.
-    
-    # Ideally, we would modify extract_page_features to return text with \n for paragraphs.
-    # Let's assume we can just take the first max_chars for now to be safe and deterministic.
-    # If we want to be smarter, we need the structure.
-    
-    # Let's just return the first max_chars.
-    return text[:max_chars]
+    if not blocks:
+        blocks = _SENTENCE_BREAK.split(text)
+    chosen: Dict[int, str] = {}
+    seen = set()
+
+    def take(index: int, block: str) -> bool:
+        nonlocal budget
+        if len(block) + 1 > budget:
+            return False
+        chosen[index] = block
+        seen.add(block)
+        budget -= len(block) + 1
+        return True
+
+    # Priority blocks first (page order), then the start of the page until the budget runs out
+    for index, block in enumerate(blocks):
+        if block not in seen and _is_priority_block(block):
+            take(index, block)
+    for index, block in enumerate(blocks):
+        if index in chosen or block in seen:
+            continue
+        if not take(index, block):
+            if budget > _MIN_PARTIAL_BLOCK:
+                take(index, _cut_at_word(block, budget - 1))
+            break
+
+    lines = [header] if header else []
+    lines.extend(chosen[index] for index in sorted(chosen))
+    return "\n".join(lines)
+
+
+def prompt_text(page_features: Dict[str, Any], max_chars: int = 12000, boilerplate_chars: int = 1000) -> Dict[str, Any]:
+    """
+    Page text for Gemini from extract_page_features' output: the main content within
+    max_chars, plus a boilerplate tail of at most boilerplate_chars (contact/legal lines first).
+    truncated reports whether main content had to be cut.
+    """
+    blocks = page_features.get("blocks", [])
+    main_indexes = page_features.get("main_blocks", range(len(blocks)))
+    main_set = set(main_indexes)
+    boilerplate_text = truncate_clean_text(
+        page_features.get("boilerplate_text", ""),
+        max_chars=boilerplate_chars,
+        blocks=[text for i, text in enumerate(blocks) if i not in main_set],
+    )
+    main_text = page_features.get("main_text", page_features.get("clean_text", ""))
+    truncated_text = truncate_clean_text(
+        main_text,
+        page_features.get("title"),
+        page_features.get("headings", []),
+        max_chars=max_chars - len(boilerplate_text),
+        blocks=[blocks[i] for i in main_indexes],
+    )
+    return {
+        "truncated_text": truncated_text,
+        "boilerplate_text": boilerplate_text,
+        "truncated": truncated_text != main_text,
+    }
@@ -5,6 +5,10 @@ import ssl
 from typing import Dict, Optional
 from urllib.parse import urlparse
 
+from checkmate.metrics import timed_call
+from checkmate.replay import replayable
+from checkmate.safe_fetch import resolve_safe_ip
+
 
 def _format_issuer(issuer) -> Optional[str]:
     if not issuer:
@@ -16,11 +20,14 @@ def _format_issuer(issuer) -> Optional[str]:
     return ", ".join(parts) if parts else None
 
 
-def _get_certificate_info(hostname: str, port: int = 443) -> Dict[str, Optional[str]]:
+def _get_certificate_info(
+    hostname: str, port: int = 443, timeout: float = 10, ip: Optional[str] = None
+) -> Dict[str, Optional[str]]:
     context = ssl.create_default_context()
     context.check_hostname = True
     context.verify_mode = ssl.CERT_REQUIRED
-    with socket.create_connection((hostname, port), timeout=10) as sock:
+    # Connect to the address safe_fetch already validated; SNI and the name check still use hostname
+    with socket.create_connection((ip or hostname, port), timeout=timeout) as sock:
         with context.wrap_socket(sock, server_hostname=hostname) as ssock:
             cert = ssock.getpeercert()
     return {
@@ -29,7 +36,8 @@ def _get_certificate_info(hostname: str, port: int = 443) -> Dict[str, Optional[
     }
 
 
-def check_security(url: str) -> Dict[str, Optional[str]]:
+@replayable("tls", key=lambda url, timeout=10: url)
+def check_security(url: str, timeout: float = 10) -> Dict[str, Optional[str]]:
     parsed = urlparse(url)
     uses_https = parsed.scheme.lower() == "https"
     if not uses_https:
@@ -51,8 +59,19 @@ def check_security(url: str) -> Dict[str, Optional[str]]:
             "error": "missing_hostname",
         }
 
+    ip = resolve_safe_ip(hostname)
+    if ip is None:
+        return {
+            "uses_https": True,
+            "cert_valid": False,
+            "cert_issuer": None,
+            "cert_expiry": None,
+            "error": "unresolvable_or_blocked_host",
+        }
+
     try:
-        cert_info = _get_certificate_info(hostname, parsed.port or 443)
+        with timed_call("tls_probe"):
+            cert_info = _get_certificate_info(hostname, parsed.port or 443, timeout=timeout, ip=ip)
         return {
             "uses_https": True,
             "cert_valid": True,
@@ -13,7 +13,10 @@ from typing import Dict, List, Optional, Set, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
 import requests
-import tldextract
+
+from checkmate.domains import registered_domain
+from checkmate.metrics import timed_call
+from checkmate.replay import replayable
 
 URLHAUS_CSV_URL = "https://urlhaus.abuse.ch/downloads/csv_online/"
 CACHE_FILENAME = "threat_intel_cache.json"
@@ -47,16 +50,6 @@ def _normalize_url(url: str) -> Optional[str]:
     return normalized
 
 
-def _extract_registered_domain(url: str) -> Optional[str]:
-    parts = urlsplit(url)
-    if not parts.netloc:
-        return None
-    extracted = tldextract.extract(parts.netloc)
-    if not extracted.suffix:
-        return None
-    return f"{extracted.domain}.{extracted.suffix}".lower()
-
-
 def parse_urlhaus_csv(csv_text: str) -> Tuple[Set[str], Set[str]]:
     url_set: Set[str] = set()
     domain_set: Set[str] = set()
@@ -69,7 +62,7 @@ def parse_urlhaus_csv(csv_text: str) -> Tuple[Set[str], Set[str]]:
         if not normalized:
             continue
         url_set.add(normalized)
-        domain = _extract_registered_domain(normalized)
+        domain = registered_domain(normalized)
         if domain:
             domain_set.add(domain)
     return url_set, domain_set
@@ -112,11 +105,17 @@ _cache = _load_cache_from_disk()
 _background_started = False
 
 
+@replayable("feed", key=lambda url: url)
+def _download_feed(url: str) -> str:
+    with timed_call("urlhaus_feed"):
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+    return response.text
+
+
 def refresh_cache() -> bool:
     try:
-        response = requests.get(URLHAUS_CSV_URL, timeout=10)
-        response.raise_for_status()
-        url_set, domain_set = parse_urlhaus_csv(response.text)
+        url_set, domain_set = parse_urlhaus_csv(_download_feed(URLHAUS_CSV_URL))
         if not url_set:
             raise ValueError("URLhaus returned empty feed")
         new_cache = ThreatIntelCache(
@@ -163,7 +162,7 @@ def match_url(url: str, cache: Optional[ThreatIntelCache] = None) -> Dict[str, o
             "provider_hits": [],
             "last_updated": None,
         }
-    domain = _extract_registered_domain(normalized)
+    domain = registered_domain(normalized)
     with _cache_lock:
         active_cache = cache or _cache
         url_match = normalized in active_cache.url_set
@@ -2,16 +2,7 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 
-import tldextract
-
-
-def _normalize_domain(value: Optional[str]) -> Optional[str]:
-    if not value:
-        return None
-    extracted = tldextract.extract(value)
-    if not extracted.suffix:
-        return None
-    return f"{extracted.domain}.{extracted.suffix}".lower()
+from checkmate import domains
 
 
 def _levenshtein_distance(a: str, b: str) -> int:
@@ -37,8 +28,8 @@ def _levenshtein_distance(a: str, b: str) -> int:
 
 
 def check_typosquat(registered_domain: Optional[str], claimed_brand_domain: Optional[str]) -> Dict[str, Optional[object]]:
-    normalized_registered = _normalize_domain(registered_domain)
-    normalized_claimed = _normalize_domain(claimed_brand_domain)
+    normalized_registered = domains.registered_domain(registered_domain)
+    normalized_claimed = domains.registered_domain(claimed_brand_domain)
 
     if not normalized_registered or not normalized_claimed:
         return {
@@ -1,14 +1,34 @@
 # Updated pipeline.py based on full CheckMate project context
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
+from checkmate.cache import SQLiteCache, TieredCache, TTLCache
+from checkmate import extract_pool
+from checkmate.crawl import CrawlResult, crawl_site
+from checkmate.domains import registered_domain
+from checkmate.metrics import collect_timings, observe_stage
 from checkmate.schemas import AnalysisResult, RiskItem, PageSummary
-from checkmate.safe_fetch import safe_fetch
-from checkmate.modules.extraction import extract_page_features, truncate_clean_text
+from checkmate.singleflight import SingleFlight
+from checkmate.safe_fetch import fetch_document, safe_fetch
+from checkmate.scoring import compute_score
+from checkmate.stages import (
+    STATUS_OK,
+    STATUS_SKIPPED,
+    Deadline,
+    SkipStage,
+    Stage,
+    StageContext,
+    StageOutcome,
+    run_stages,
+)
+from checkmate.modules.extraction import PHONE_REGION, prompt_text, resolve_parser
 from checkmate.modules.domain_info import get_domain_info
 from checkmate.modules.security_check import check_security
 from checkmate.modules.threat_intel import match_url
@@ -23,35 +43,121 @@ logger = logging.getLogger(__name__)
 
 SAFE_PAGE_LIMIT = 5
 
+# Shared, bounded pool for the network-bound stages (WHOIS, TLS, threat intel, Gemini classify).
+# Sized so a handful of concurrent requests can overlap without unbounded thread growth.
+PIPELINE_MAX_WORKERS = int(os.getenv("CHECKMATE_PIPELINE_WORKERS", "8"))
 
-def run_pipeline(url: str) -> AnalysisResult:
-    result = AnalysisResult(status="ok", url=url)
+# Whole-request budget; the frontend gives up at 90s so we must answer well before that.
+REQUEST_BUDGET_SECONDS = float(os.getenv("CHECKMATE_REQUEST_BUDGET_SECONDS", "75"))
 
-    # Safe Fetch
-    content, status_code, content_type, final_url = safe_fetch(url)
-    if not content:
-        result.status = "na"
-        result.missing_pages.append(url)
-        return result
+# Per-stage timeouts (seconds); each is further clamped by the request deadline.
+STAGE_TIMEOUTS: Dict[str, float] = {
+    "fetch": 15.0,
+    "crawl": 25.0,
+    "extract": 15.0,
+    "classify": 25.0,
+    "page_analysis": 60.0,
+    "domain": 15.0,
+    "security": 12.0,
+    "threat_intel": 5.0,
+    "scoring": 5.0,
+}
 
-    result.status = "ok"
-    result.pages_analyzed.append(
-        PageSummary(
-            url=final_url or url,
-            status_code=status_code,
-            title=None,
-            extracted_date=None
-        )
-    )
+# User-facing names for limitations when a stage does not complete
+STAGE_LABELS: Dict[str, str] = {
+    "crawl": "Site crawl",
+    "extract": "Content extraction",
+    "classify": "Website type classification",
+    "page_analysis": "Page analysis",
+    "domain": "Domain registration lookup",
+    "security": "TLS certificate check",
+    "threat_intel": "Threat intel lookup",
+    "scoring": "Scoring",
+}
 
-    # Feature Extraction
-    page_features = extract_page_features(content, base_url=url)
-    truncated_text = truncate_clean_text(
-        page_features.get("clean_text", ""),
-        page_features.get("title"),
-        page_features.get("headings", [])
-    )
+# Limitation added when the page text sent to Gemini was truncated to its character budget
+# (debug["content_truncated"] carries the same fact for clients that match on codes)
+CONTENT_TRUNCATED = "Page text was long; only the most relevant sections were analyzed."
+# Page text budget for Gemini, and the part of it boilerplate (menus, link lists) may take
+PAGE_TEXT_CHARS = 12000
+BOILERPLATE_PROMPT_CHARS = int(os.getenv("CHECKMATE_BOILERPLATE_CHARS", "1000"))
+
+# Extracted features by hash of the page body (+ base URL), so byte-identical pages are parsed once
+EXTRACT_CACHE_TTL_SECONDS = float(os.getenv("CHECKMATE_EXTRACT_CACHE_TTL", "86400"))
+EXTRACT_CACHE_MAX_ENTRIES = int(os.getenv("CHECKMATE_EXTRACT_CACHE_SIZE", "128"))
+# Path to a SQLite file for the shared on-disk tier; empty disables it
+EXTRACT_CACHE_DB = os.getenv("CHECKMATE_EXTRACT_CACHE_DB", "").strip()
+# Bump when extract_page_features' output changes so older disk entries are not served
+EXTRACT_CACHE_VERSION = "2"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _build_extract_cache() -> TieredCache:
+    memory = TTLCache(maxsize=EXTRACT_CACHE_MAX_ENTRIES, ttl=EXTRACT_CACHE_TTL_SECONDS)
+    disk = None
+    if EXTRACT_CACHE_DB:
+        try:
+            disk = SQLiteCache(EXTRACT_CACHE_DB, ttl=EXTRACT_CACHE_TTL_SECONDS, table="extracted_features")
+        except Exception as exc:
+            logger.warning("Extraction cache disk tier disabled (%s): %s", EXTRACT_CACHE_DB, exc)
+    return TieredCache(memory, disk, name="extract")
+
+
+extract_cache = _build_extract_cache()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PIPELINE_MAX_WORKERS,
+                thread_name_prefix="checkmate-stage",
+            )
+        return _executor
+
+
+def _concurrency_enabled() -> bool:
+    return os.getenv("CHECKMATE_CONCURRENT_PIPELINE", "1").strip() != "0"
 
+
+class SharedWork:
+    """
+    Memo for domain-level stage results shared by several pipeline runs (e.g. one batch).
+    The first run for a key computes it; concurrent runs wait for that result instead of
+    repeating the WHOIS lookup or TLS handshake.
+    """
+
+    def __init__(self) -> None:
+        self._values: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def get(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+
+        def compute() -> Any:
+            value = fn()
+            with self._lock:
+                self._values[key] = value
+            return value
+
+        value, _ = self._flight.do(repr(key), compute)
+        return value
+
+
+def _shared(ctx: StageContext, key: Any, fn: Callable[[], Any]) -> Any:
+    shared: Optional[SharedWork] = ctx.options.get("shared")
+    if shared is None:
+        return fn()
+    return shared.get(key, fn)
+
+
+def _classify_website_type(url: str, page_features: dict, timeout: Optional[float] = None) -> str:
     # Prefer Gemini classification when configured; use domain heuristic only as a fallback.
     website_type = None
     if not os.getenv("GEMINI_API_KEY", "").strip():
@@ -64,64 +170,300 @@ def run_pipeline(url: str) -> AnalysisResult:
             page_url=url,
             page_title=page_features.get("title"),
             text_snippet=text_snippet,
+            timeout=timeout,
         )
         logger.info("website_type=%s (from classifier for %s)", website_type, url)
     # Normalize to a known type (classifier can return unexpected value on parse failure)
     if website_type not in ("functional", "statistical", "news_historical", "company"):
         website_type = "news_historical"
-    result.website_type = website_type
-    result.debug["website_type"] = website_type
+    return website_type
 
-    # Gemini Analysis
-    gemini_result = analyze_page_with_gemini(
-        page_url=url,
+
+# -----------------------------
+# Stages
+# -----------------------------
+
+def _budget(ctx: StageContext, seconds: float) -> float:
+    # Never hand a zero timeout to sockets/clients (0 means non-blocking there)
+    return max(1.0, ctx.deadline.clamp(seconds))
+
+
+def _stage_fetch(ctx: StageContext) -> Dict[str, Any]:
+    fetched = fetch_document(ctx.url, timeout=_budget(ctx, 10))
+    if fetched is None or not fetched.body:
+        raise SkipStage("fetch failed")
+    # body stays a memoryview over the one download buffer; consumers decode it themselves
+    return {
+        "body": fetched.body,
+        "encoding": fetched.encoding,
+        "status_code": fetched.status_code,
+        "content_type": fetched.content_type,
+        "final_url": fetched.final_url,
+    }
+
+
+def _stage_crawl(ctx: StageContext) -> CrawlResult:
+    # Start from the page fetch already downloaded; crawl_site stops itself before the stage timeout
+    fetched = ctx.value("fetch")
+    return crawl_site(
+        fetched["final_url"] or ctx.url,
+        budget=ctx.deadline.clamp(STAGE_TIMEOUTS["crawl"] - 5),
+        root_content=fetched["body"],
+        root_encoding=fetched["encoding"],
+        root_status=fetched["status_code"],
+        fetch=safe_fetch,
+    )
+
+
+def _extract_cache_key(body: Any, base_url: str, encoding: Optional[str]) -> str:
+    # Everything besides the bytes that changes the output: base URL (link classification),
+    # encoding, parser backend and default phone region
+    digest = hashlib.sha256()
+    for part in (EXTRACT_CACHE_VERSION, base_url, encoding or "", resolve_parser(), PHONE_REGION):
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(body.encode("utf-8") if isinstance(body, str) else body)
+    return digest.hexdigest()
+
+
+def _stage_extract(ctx: StageContext) -> Dict[str, Any]:
+    """
+    Page features and the Gemini page text. Features come from extract_cache when the same
+    bytes were seen before (no parsing; cached dicts are shared, do not mutate); otherwise
+    extraction and truncation run together, in the process pool when it is enabled.
+    """
+    fetched = ctx.value("fetch")
+    body, encoding = fetched["body"], fetched["encoding"]
+    key = _extract_cache_key(body, ctx.url, encoding)
+    entry = extract_cache.get(key)
+    if entry is not None:
+        page_features = entry[0]
+        return {"features": page_features, **prompt_text(page_features, PAGE_TEXT_CHARS, BOILERPLATE_PROMPT_CHARS)}
+    extracted = extract_pool.extract(
+        body,
+        ctx.url,
+        encoding,
+        PAGE_TEXT_CHARS,
+        BOILERPLATE_PROMPT_CHARS,
+        timeout=_budget(ctx, extract_pool.EXTRACT_TASK_TIMEOUT_SECONDS),
+    )
+    extract_cache.set(key, extracted["features"])
+    return extracted
+
+
+def _stage_classify(ctx: StageContext) -> str:
+    features = ctx.value("extract")["features"]
+    return _classify_website_type(ctx.url, features, timeout=_budget(ctx, STAGE_TIMEOUTS["classify"]))
+
+
+def _stage_page_analysis(ctx: StageContext) -> Dict[str, Any]:
+    extracted = ctx.value("extract")
+    page_features = extracted["features"]
+    return analyze_page_with_gemini(
+        page_url=ctx.url,
         page_title=page_features.get("title"),
-        clean_text=truncated_text,
+        clean_text=extracted["truncated_text"],
+        boilerplate_text=extracted["boilerplate_text"],
         extracted_emails=page_features.get("emails", []),
         extracted_phones=page_features.get("phones", []),
-        extracted_date=None,
+        extracted_date=page_features.get("published_date"),
         link_stats={
             "internal_links": len(page_features.get("links_internal", [])),
             "external_links": len(page_features.get("links_external", []))
         },
+        timeout=_budget(ctx, STAGE_TIMEOUTS["page_analysis"]),
     )
 
-    result.debug["gemini"] = gemini_result
-    for lim in gemini_result.get("limitations", []):
-        if lim and "Gemini page analysis failed" in lim:
-            lim = "Page analysis could not be completed (API error). Check server log for details."
-        result.limitations.append(lim)
-
-    # Attach Gemini page type and risks (skip any Gemini-failure risk so it never appears in Risks & warnings)
-    def _is_gemini_failure_risk(r: dict) -> bool:
-        title = (r.get("title") or "").lower()
-        code = (r.get("code") or "").upper()
-        return "gemini page analysis failed" in title or code == "GEMINI_FAILED"
-    gemini_risks = [r for r in gemini_result.get("risks", []) if not _is_gemini_failure_risk(r)]
-    result.risks.extend([
-        RiskItem(
-            severity=r["severity"],
-            code=r["code"],
-            title=r["title"],
-            evidence=[
-                {
-                    "message": snippet,
-                    "snippet": snippet,
-                } for snippet in r.get("evidence_snippets", [])
-            ],
+
+def _stage_domain(ctx: StageContext) -> Dict[str, Any]:
+    # WHOIS is per registered domain, so URLs on the same site can share one lookup
+    key = ("domain", registered_domain(ctx.url) or ctx.url)
+    return _shared(ctx, key, lambda: get_domain_info(ctx.url, timeout=_budget(ctx, 10)))
+
+
+def _stage_security(ctx: StageContext) -> Dict[str, Any]:
+    # The certificate belongs to the host, not the registered domain (sub.example.com may differ)
+    parsed = urlparse(ctx.url)
+    key = ("security", parsed.scheme.lower(), (parsed.hostname or "").lower(), parsed.port)
+    return _shared(ctx, key, lambda: check_security(ctx.url, timeout=_budget(ctx, 10)))
+
+
+def _stage_threat_intel(ctx: StageContext) -> Dict[str, Any]:
+    return match_url(ctx.url)
+
+
+def _stage_scoring(ctx: StageContext) -> AnalysisResult:
+    return compute_score(_assemble_result(ctx))
+
+
+def build_stages(score: bool = False) -> List[Stage]:
+    """The pipeline graph. Deterministic checks wait only for a successful fetch."""
+    stages = [
+        Stage("fetch", _stage_fetch, timeout=STAGE_TIMEOUTS["fetch"]),
+        Stage("crawl", _stage_crawl, deps=("fetch",), timeout=STAGE_TIMEOUTS["crawl"]),
+        Stage("extract", _stage_extract, deps=("fetch",), timeout=STAGE_TIMEOUTS["extract"]),
+        Stage("classify", _stage_classify, deps=("extract",), timeout=STAGE_TIMEOUTS["classify"]),
+        Stage("page_analysis", _stage_page_analysis, deps=("extract",), timeout=STAGE_TIMEOUTS["page_analysis"]),
+        Stage("domain", _stage_domain, deps=("fetch",), timeout=STAGE_TIMEOUTS["domain"]),
+        Stage("security", _stage_security, deps=("fetch",), timeout=STAGE_TIMEOUTS["security"]),
+        Stage("threat_intel", _stage_threat_intel, deps=("fetch",), timeout=STAGE_TIMEOUTS["threat_intel"]),
+    ]
+    if score:
+        others = tuple(s.name for s in stages)
+        stages.append(Stage("scoring", _stage_scoring, after=others, timeout=STAGE_TIMEOUTS["scoring"]))
+    return stages
+
+
+# -----------------------------
+# Result assembly
+# -----------------------------
+
+def _stage_limitation(name: str, outcome: StageOutcome) -> Optional[str]:
+    label = STAGE_LABELS.get(name)
+    if label is None or outcome.status == STATUS_OK:
+        return None
+    if outcome.status == STATUS_SKIPPED:
+        # Skipped because an upstream stage did not finish; that stage already reported it
+        return None
+    if outcome.status == "timeout":
+        return f"{label} skipped: time budget exceeded."
+    return f"{label} could not be completed."
+
+
+def _is_gemini_failure_risk(r: dict) -> bool:
+    title = (r.get("title") or "").lower()
+    code = (r.get("code") or "").upper()
+    return "gemini page analysis failed" in title or code == "GEMINI_FAILED"
+
+
+def _assemble_result(ctx: StageContext) -> AnalysisResult:
+    """Merge stage outputs into an AnalysisResult in a fixed order, independent of finish order."""
+    url = ctx.url
+    result = AnalysisResult(status="ok", url=url)
+    result.debug["stages"] = {name: o.status for name, o in ctx.outcomes.items() if name != "scoring"}
+
+    # Safe Fetch
+    fetched = ctx.value("fetch")
+    if not fetched:
+        result.status = "na"
+        result.missing_pages.append(url)
+        return result
+
+    result.status = "ok"
+    extracted = ctx.value("extract")
+    result.pages_analyzed.append(
+        PageSummary(
+            url=fetched["final_url"] or url,
+            status_code=fetched["status_code"],
+            title=None,
+            extracted_date=extracted["features"].get("published_date") if extracted else None
         )
-        for r in gemini_risks
-    ])
+    )
+
+    # Crawl: other pages visited and which key pages (contact/about/privacy/terms) are absent
+    crawl: Optional[CrawlResult] = ctx.value("crawl")
+    if crawl is not None:
+        for page in crawl.pages[1:]:
+            result.pages_analyzed.append(
+                PageSummary(url=page.url, status_code=page.status_code, title=page.title)
+            )
+        result.missing_pages.extend(crawl.missing_pages)
+        result.debug["crawl"] = {"key_pages": crawl.key_pages, "stopped": crawl.stopped}
+
+    # Website type (classification)
+    website_type = ctx.value("classify")
+    if website_type is not None:
+        result.website_type = website_type
+        result.debug["website_type"] = website_type
+
+    # Gemini Analysis
+    gemini_result = ctx.value("page_analysis")
+    if gemini_result is not None:
+        result.debug["gemini"] = gemini_result
+        for lim in gemini_result.get("limitations", []):
+            if lim and "Gemini page analysis failed" in lim:
+                lim = "Page analysis could not be completed (API error). Check server log for details."
+            result.limitations.append(lim)
+
+        # Attach Gemini page type and risks (skip any Gemini-failure risk so it never appears in Risks & warnings)
+        gemini_risks = [r for r in gemini_result.get("risks", []) if not _is_gemini_failure_risk(r)]
+        result.risks.extend([
+            RiskItem(
+                severity=r["severity"],
+                code=r["code"],
+                title=r["title"],
+                evidence=[
+                    {
+                        "message": snippet,
+                        "snippet": snippet,
+                    } for snippet in r.get("evidence_snippets", [])
+                ],
+            )
+            for r in gemini_risks
+        ])
+
+    # Page text was cut down to the Gemini budget (priority blocks kept)
+    if extracted is not None:
+        result.debug["content_truncated"] = bool(extracted.get("truncated"))
+        if result.debug["content_truncated"]:
+            result.limitations.append(CONTENT_TRUNCATED)
 
     # Domain Info
-    domain_info = get_domain_info(url)
-    result.domain_info = domain_info
+    result.domain_info = ctx.value("domain", {})
 
     # Security
-    security_info = check_security(url)
-    result.security_info = security_info
+    result.security_info = ctx.value("security", {})
 
     # Threat Intel
-    result.threat_intel = match_url(url)
+    result.threat_intel = ctx.value("threat_intel", {})
+
+    for name, outcome in ctx.outcomes.items():
+        lim = _stage_limitation(name, outcome)
+        if lim:
+            result.limitations.append(lim)
+
+    return result
+
+
+def run_pipeline(
+    url: str,
+    concurrent: Optional[bool] = None,
+    deadline: Optional[Deadline] = None,
+    score: bool = False,
+    shared: Optional[SharedWork] = None,
+    on_stage: Optional[Callable[[StageOutcome], None]] = None,
+) -> AnalysisResult:
+    """
+    Fetch, extract and analyze one URL by running the stage graph from build_stages().
+    With concurrent=True (default, CHECKMATE_CONCURRENT_PIPELINE=0 disables) independent stages
+    run on a shared pool; results are merged into the AnalysisResult in the same order either way.
+    deadline defaults to REQUEST_BUDGET_SECONDS; stages that do not fit are skipped with a limitation.
+    score=True also runs compute_score as the final stage.
+    shared lets several runs reuse WHOIS/TLS results for the same domain/host.
+    on_stage is called with each StageOutcome as soon as that stage settles (progressive output).
+    Stage and external-call durations are returned in result.debug["timings"].
+    """
+    if concurrent is None:
+        concurrent = _concurrency_enabled()
+    if deadline is None:
+        deadline = Deadline(REQUEST_BUDGET_SECONDS)
+
+    def on_complete(outcome: StageOutcome) -> None:
+        observe_stage(outcome.name, outcome.duration, outcome.status)
+        if on_stage is not None:
+            on_stage(outcome)
+
+    with collect_timings() as timings:
+        ctx = StageContext(url=url, deadline=deadline, options={"shared": shared})
+        executor = _get_executor() if concurrent else None
+        run_stages(build_stages(score=score), ctx, executor=executor, on_complete=on_complete)
 
+        if score and ctx.ok("scoring"):
+            result = ctx.value("scoring")
+        else:
+            result = _assemble_result(ctx)
+            if score:
+                lim = _stage_limitation("scoring", ctx.outcomes["scoring"])
+                if lim:
+                    result.limitations.append(lim)
+        result.debug["timings"] = timings.as_dict()
     return result
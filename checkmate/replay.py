@@ -0,0 +1,169 @@
+"""
+Record/replay of external interactions for offline benchmarks and regression runs.
+
+CHECKMATE_RECORD_MODE=record  every page fetch, WHOIS lookup, TLS probe, URLhaus feed
+                              download and Gemini call is saved to the archive
+CHECKMATE_RECORD_MODE=replay  the same calls are answered from the archive, sleeping for
+                              the recorded latency (scaled by CHECKMATE_REPLAY_LATENCY_SCALE)
+unset                         normal operation
+
+The archive (CHECKMATE_RECORD_ARCHIVE, default checkmate-archive.sqlite) is one SQLite file
+keyed by (kind, key); re-recording a key overwrites it. A replay of a key that was never
+recorded raises ReplayMiss, which the pipeline reports like any other failed stage.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = ""
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+Encoded = Tuple[Any, Optional[bytes]]
+
+
+class ReplayMiss(LookupError):
+    """Replay mode was asked for an interaction the archive does not contain."""
+
+
+class ReplayedError(RuntimeError):
+    """A recorded call raised; replay raises this with the original message."""
+
+
+class Archive:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, latency REAL NOT NULL, value TEXT, body BLOB, "
+            "error TEXT, recorded_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(
+        self, kind: str, key: str, latency: float, value: Any, body: Optional[bytes], error: Optional[str]
+    ) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO interactions (kind, key, latency, value, body, error, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (kind, key, latency, json.dumps(value), body, error, time.time()),
+        )
+
+    def load(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT latency, value, body, error FROM interactions WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"latency": row[0], "value": json.loads(row[1]) if row[1] else None, "body": row[2], "error": row[3]}
+
+    def count(self, kind: Optional[str] = None) -> int:
+        if kind is None:
+            return self._connect().execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+        return self._connect().execute("SELECT COUNT(*) FROM interactions WHERE kind = ?", (kind,)).fetchone()[0]
+
+
+_mode = MODE_OFF
+_archive: Optional[Archive] = None
+_latency_scale = 1.0
+
+
+def configure(mode: str, path: Optional[str] = None, latency_scale: float = 1.0) -> None:
+    """Switch record/replay on or off (read from the environment at import; tests call this directly)."""
+    global _mode, _archive, _latency_scale
+    mode = (mode or "").strip().lower()
+    if mode not in (MODE_OFF, MODE_RECORD, MODE_REPLAY):
+        raise ValueError(f"CHECKMATE_RECORD_MODE must be 'record' or 'replay', not {mode!r}")
+    _archive = Archive(path or "checkmate-archive.sqlite") if mode else None
+    _mode = mode
+    _latency_scale = max(0.0, latency_scale)
+    if mode:
+        logger.warning("External calls are in %s mode (archive %s)", mode, _archive.path)
+
+
+def current_mode() -> str:
+    return _mode
+
+
+def _identity_encode(value: Any) -> Encoded:
+    return value, None
+
+
+def _identity_decode(value: Any, body: Optional[bytes]) -> Any:
+    return value
+
+
+def replayable(
+    kind: str,
+    key: Callable[..., str],
+    encode: Callable[[Any], Encoded] = _identity_encode,
+    decode: Callable[[Any, Optional[bytes]], Any] = _identity_decode,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Route a function that talks to the outside world through the archive.
+    key(*args, **kwargs) names the interaction; encode/decode convert the return value to
+    (JSON-able value, optional bytes body) and back. With recording off this is a plain call.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            mode, archive = _mode, _archive
+            if not mode or archive is None:
+                return func(*args, **kwargs)
+            name = key(*args, **kwargs)
+
+            if mode == MODE_REPLAY:
+                entry = archive.load(kind, name)
+                if entry is None:
+                    logger.warning("Replay miss: %s %s", kind, name)
+                    raise ReplayMiss(f"{kind} {name} is not in the archive")
+                if _latency_scale and entry["latency"] > 0:
+                    time.sleep(entry["latency"] * _latency_scale)
+                if entry["error"] is not None:
+                    raise ReplayedError(entry["error"])
+                return decode(entry["value"], entry["body"])
+
+            start = time.monotonic()
+            try:
+                value = func(*args, **kwargs)
+            except Exception as exc:
+                archive.save(kind, name, time.monotonic() - start, None, None, f"{type(exc).__name__}: {exc}")
+                raise
+            latency = time.monotonic() - start
+            try:
+                encoded, body = encode(value)
+                archive.save(kind, name, latency, encoded, body, None)
+            except Exception as exc:
+                logger.warning("Could not record %s %s: %s", kind, name, exc)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+configure(
+    os.getenv("CHECKMATE_RECORD_MODE", ""),
+    os.getenv("CHECKMATE_RECORD_ARCHIVE", "").strip() or None,
+    float(os.getenv("CHECKMATE_REPLAY_LATENCY_SCALE", "1.0")),
+)
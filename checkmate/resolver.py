@@ -0,0 +1,75 @@
+"""
+Process-wide DNS cache shared by safe_fetch, the crawler and the TLS probe.
+
+Each hostname is resolved once per TTL; failures are cached too (for a shorter time)
+so a dead domain is not looked up again by every stage. Concurrent lookups of the
+same name share one getaddrinfo call.
+"""
+from __future__ import annotations
+
+import ipaddress
+import os
+import socket
+import time
+from typing import List, Optional
+
+from checkmate.cache import TTLCache
+from checkmate.metrics import timed_call
+from checkmate.singleflight import SingleFlight
+
+DNS_CACHE_TTL_SECONDS = float(os.getenv("CHECKMATE_DNS_TTL", "300"))
+DNS_NEGATIVE_TTL_SECONDS = float(os.getenv("CHECKMATE_DNS_NEGATIVE_TTL", "30"))
+DNS_CACHE_SIZE = int(os.getenv("CHECKMATE_DNS_CACHE_SIZE", "1024"))
+
+
+class Resolver:
+    def __init__(
+        self,
+        ttl: float = DNS_CACHE_TTL_SECONDS,
+        negative_ttl: float = DNS_NEGATIVE_TTL_SECONDS,
+        maxsize: int = DNS_CACHE_SIZE,
+    ):
+        self.negative_ttl = negative_ttl
+        # Value is the address list, or None for a cached failure
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="dns")
+        self._flight = SingleFlight()
+
+    def _lookup(self, hostname: str) -> Optional[List[str]]:
+        try:
+            with timed_call("dns"):
+                infos = socket.getaddrinfo(hostname, None)
+        except socket.gaierror:
+            addresses = None
+        else:
+            addresses = []
+            for _family, _, _, _, sockaddr in infos:
+                if sockaddr[0] not in addresses:
+                    addresses.append(sockaddr[0])
+        self._cache.set(hostname, addresses)
+        return addresses
+
+    def resolve(self, hostname: str) -> List[str]:
+        """All addresses for hostname, in resolver order. Raises socket.gaierror if it does not resolve."""
+        hostname = hostname.lower().rstrip(".")
+        try:
+            ipaddress.ip_address(hostname)
+            return [hostname]
+        except ValueError:
+            pass
+        entry = self._cache.get(hostname)
+        if entry is not None:
+            addresses, stored_at = entry
+            if addresses is not None or time.time() - stored_at <= self.negative_ttl:
+                if addresses is None:
+                    raise socket.gaierror(socket.EAI_NONAME, f"{hostname} did not resolve (cached)")
+                return list(addresses)
+        addresses, _ = self._flight.do(hostname, lambda: self._lookup(hostname))
+        if addresses is None:
+            raise socket.gaierror(socket.EAI_NONAME, f"{hostname} did not resolve")
+        return list(addresses)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+resolver = Resolver()
@@ -1,8 +1,77 @@
+import codecs
+import logging
 import socket
 import ipaddress
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.cookiejar import DefaultCookiePolicy
 import requests
-from urllib.parse import urlparse
-from typing import Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse
+from typing import Dict, Iterator, Optional, Tuple
+
+from checkmate.cache import PageCache
+from checkmate.metrics import FETCH_BYTES_TOTAL, REGISTRY, HTTP_POOL, timed_call
+from checkmate.replay import replayable
+from checkmate.resolver import resolver
+
+try:  # optional: brotli (or brotlicffi) enables "br" transfer encoding
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli  # type: ignore
+    except ImportError:
+        brotli = None  # type: ignore
+
+
+def _brotli_bounded() -> bool:
+    """True if the brotli binding can cap output per call (Decompressor.process output_buffer_limit)."""
+    if brotli is None:
+        return False
+    try:
+        brotli.Decompressor().process(b"", output_buffer_limit=1)
+    except Exception:
+        return False
+    return True
+
+
+BROTLI_BOUNDED = _brotli_bounded()
+
+logger = logging.getLogger(__name__)
+
+# Connection pool shared by every fetch in the process (keep-alive across analyses)
+POOL_MAX_HOSTS = int(os.getenv("CHECKMATE_HTTP_POOL_HOSTS", "32"))
+POOL_MAX_PER_HOST = int(os.getenv("CHECKMATE_HTTP_POOL_PER_HOST", "4"))
+# Leftover response bodies up to this size are read off so the connection can be reused;
+# anything larger (or of unknown length) closes the connection instead
+DRAIN_MAX_BYTES = 64 * 1024
+# Drop all pooled connections after this long without any fetch
+POOL_IDLE_TIMEOUT_SECONDS = float(os.getenv("CHECKMATE_HTTP_POOL_IDLE_TIMEOUT", "60"))
+
+USER_AGENT = "Mozilla/5.0"
+
+# Decoded page size cap, and cap on bytes received for a compressed page
+MAX_BODY_BYTES = int(os.getenv("CHECKMATE_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+MAX_WIRE_BYTES = int(os.getenv("CHECKMATE_FETCH_MAX_WIRE_BYTES", str(1024 * 1024)))
+# Decoded/wire ratio beyond which a compressed body is treated as a decompression bomb,
+# checked once at least RATIO_CHECK_MIN_BYTES have been decoded
+MAX_COMPRESSION_RATIO = 100
+RATIO_CHECK_MIN_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 16 * 1024
+# On-disk page cache for conditional re-fetches (ETag / Last-Modified); empty disables it
+PAGE_CACHE_DB = os.getenv("CHECKMATE_PAGE_CACHE_DB", "").strip()
+PAGE_CACHE_MAX_BYTES = int(os.getenv("CHECKMATE_PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# "br" is only advertised when its output can be bounded like gzip/deflate
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_BOUNDED else "gzip, deflate"
+# Starting buffer when the final body size is unknown (chunked or compressed responses)
+INITIAL_BUFFER_BYTES = 64 * 1024
+# How far into the page to look for <meta charset>
+META_SNIFF_BYTES = 4096
 
 # Blocked ranges
 BLOCKED_NETWORKS = [
@@ -15,61 +84,549 @@ BLOCKED_NETWORKS = [
     ipaddress.ip_network("240.0.0.0/4"),
 ]
 
-def is_safe_ip(hostname: str) -> bool:
+def _is_blocked(ip_str: str) -> bool:
     try:
-        ip_list = socket.getaddrinfo(hostname, None)
-        for family, _, _, _, sockaddr in ip_list:
-            ip_str = sockaddr[0]
+        ip_obj = ipaddress.ip_address(ip_str)
+    except ValueError:
+        return False
+
+    if ip_obj.is_loopback or ip_obj.is_private or ip_obj.is_multicast or ip_obj.is_reserved:
+        return True
+
+    for net in BLOCKED_NETWORKS:
+        if ip_obj in net:
+            return True
+
+    return str(ip_obj) == "169.254.169.254"
+
+
+def resolve_safe_ip(hostname: Optional[str]) -> Optional[str]:
+    """
+    The address to connect to for hostname, or None if it does not resolve or any of its
+    addresses is blocked. Lookups go through the shared DNS cache.
+    """
+    if not hostname:
+        return None
+    try:
+        addresses = resolver.resolve(hostname)
+    except (socket.gaierror, UnicodeError):
+        return None
+    if not addresses or any(_is_blocked(ip) for ip in addresses):
+        return None
+    return addresses[0]
+
+
+def is_safe_ip(hostname: str) -> bool:
+    return resolve_safe_ip(hostname) is not None
+
+
+class PinnedHostAdapter(HTTPAdapter):
+    """
+    HTTPAdapter for requests sent to an IP literal with the real name in the Host header
+    (see _pinned_url): TLS uses that name for SNI and certificate checks, so the
+    connection goes to exactly the address that passed the SSRF check.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        server_name = request.headers.get("Host", "")
+        if host_params.get("scheme") == "https" and server_name:
+            server_name = urlparse("//" + server_name).hostname
+            pool_kwargs["server_hostname"] = server_name
+            pool_kwargs["assert_hostname"] = server_name
+        return host_params, pool_kwargs
+
+
+def _pinned_url(parsed, ip: str) -> Tuple[str, str]:
+    """(URL addressed to ip, Host header value) for a parsed hostname URL."""
+    host = f"[{ip}]" if ":" in ip else ip
+    netloc = f"{host}:{parsed.port}" if parsed.port else host
+    host_header = parsed.hostname if not parsed.port else f"{parsed.hostname}:{parsed.port}"
+    return parsed._replace(netloc=netloc).geturl(), host_header
+
+
+class _HostSlots:
+    def __init__(self, size: int):
+        self.free = threading.BoundedSemaphore(size)
+        self.users = 0  # holders and waiters; the entry is dropped when this reaches 0
+
+
+class HTTPPool:
+    """
+    One requests.Session with a bounded HTTPAdapter, shared by all threads.
+    At most max_per_host fetches (so connections) per host are in flight at once; see host_slot().
+    Cookies are never stored, so nothing leaks from one analysis into the next.
+    If the pool sits idle past idle_timeout, its connections are closed and a fresh
+    session is built on the next fetch.
+    """
+
+    def __init__(
+        self,
+        max_hosts: int = POOL_MAX_HOSTS,
+        max_per_host: int = POOL_MAX_PER_HOST,
+        idle_timeout: float = POOL_IDLE_TIMEOUT_SECONDS,
+    ):
+        self.max_hosts = max_hosts
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._session: Optional[requests.Session] = None
+        self._last_used = 0.0
+        self._active = 0
+        self._sessions_created = 0
+        self._host_slots: Dict[str, _HostSlots] = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.headers["User-Agent"] = USER_AGENT
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # Connections are pinned to validated IPs; an environment proxy would bypass that
+        session.trust_env = False
+        # host_slot() keeps requests per host within pool_maxsize, so the pool never needs to block
+        adapter = PinnedHostAdapter(pool_connections=self.max_hosts, pool_maxsize=self.max_per_host, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self._sessions_created += 1
+        return session
+
+    @contextmanager
+    def session(self) -> Iterator[requests.Session]:
+        stale = None
+        with self._lock:
+            now = time.monotonic()
+            if self._session is not None and self._active == 0 and now - self._last_used > self.idle_timeout:
+                stale, self._session = self._session, None
+            if self._session is None:
+                self._session = self._new_session()
+            session = self._session
+            self._active += 1
+            self._last_used = now
+        if stale is not None:
+            stale.close()
+        try:
+            yield session
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._last_used = time.monotonic()
+
+    @contextmanager
+    def host_slot(self, host: str, timeout: float) -> Iterator[None]:
+        """
+        Hold one of the max_per_host connection slots for host while a request and its body
+        read are in progress. Raises TimeoutError if no slot frees up within timeout seconds.
+        """
+        with self._lock:
+            slots = self._host_slots.get(host)
+            if slots is None:
+                slots = self._host_slots[host] = _HostSlots(self.max_per_host)
+            slots.users += 1
+        try:
+            if not slots.free.acquire(timeout=timeout):
+                raise TimeoutError(f"No connection to {host} free within {timeout:.1f}s")
             try:
-                ip_obj = ipaddress.ip_address(ip_str)
-            except ValueError:
-                continue
+                yield
+            finally:
+                slots.free.release()
+        finally:
+            with self._lock:
+                slots.users -= 1
+                if slots.users == 0:
+                    del self._host_slots[host]
 
-            if ip_obj.is_loopback or ip_obj.is_private or ip_obj.is_multicast or ip_obj.is_reserved:
-                return False
+    def close(self) -> None:
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
 
-            for net in BLOCKED_NETWORKS:
-                if ip_obj in net:
-                    return False
+    def stats(self) -> Dict[str, int]:
+        """Pooled hosts, connections opened, requests sent and connections idle in the pool."""
+        with self._lock:
+            session = self._session
+            stats = {"sessions_created": self._sessions_created, "active_fetches": self._active}
+        stats.update({"hosts": 0, "connections_opened": 0, "requests": 0, "idle_connections": 0})
+        if session is None:
+            return stats
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats["hosts"] += 1
+                stats["connections_opened"] += pool.num_connections
+                stats["requests"] += pool.num_requests
+                stats["idle_connections"] += pool.pool.qsize() if pool.pool is not None else 0
+        return stats
+
+
+http_pool = HTTPPool()
 
-            if str(ip_obj) == "169.254.169.254":
-                return False
 
+def _export_pool_stats() -> None:
+    for stat, value in http_pool.stats().items():
+        HTTP_POOL.set(value, stat=stat)
+
+
+REGISTRY.add_collector(_export_pool_stats)
+
+
+def _release(response: requests.Response) -> None:
+    # Read off a small leftover body so the connection goes back to the pool; a large or
+    # unannounced one (possibly endless) is not worth the wait, so that connection is dropped
+    remaining = getattr(response.raw, "length_remaining", None)
+    if remaining is None or remaining > DRAIN_MAX_BYTES:
+        response.close()
+        return
+    try:
+        response.raw.drain_conn()
+        response.raw.release_conn()
+    except Exception:
+        response.close()
+
+
+class _BodyBuffer:
+    """Growable bytearray with a hard cap; each byte is copied into it once."""
+
+    def __init__(self, capacity: int, limit: int):
+        self.limit = limit
+        self.buf = bytearray(max(1, min(capacity, limit + 1)))
+        self.size = 0
+
+    def _grow(self) -> bool:
+        if len(self.buf) > self.limit:
+            return False
+        self.buf.extend(bytes(min(len(self.buf), self.limit + 1 - len(self.buf))))
         return True
-    except socket.gaierror:
-        return False
 
-def safe_fetch(url: str, timeout: int = 10) -> Tuple[Optional[str], Optional[int], Optional[str], Optional[str]]:
+    def room(self) -> int:
+        return self.limit + 1 - self.size
+
+    def readinto_from(self, raw) -> Optional[int]:
+        """One raw.readinto() straight into the buffer; None once the cap is exceeded."""
+        if self.size == len(self.buf) and not self._grow():
+            return None
+        with memoryview(self.buf)[self.size:] as target:
+            got = raw.readinto(target) or 0
+        self.size += got
+        return None if self.size > self.limit else got
+
+    def append(self, data: bytes) -> bool:
+        while self.size + len(data) > len(self.buf):
+            if not self._grow():
+                return False
+        self.buf[self.size:self.size + len(data)] = data
+        self.size += len(data)
+        return self.size <= self.limit
+
+    def view(self) -> memoryview:
+        del self.buf[self.size:]
+        return memoryview(self.buf)
+
+
+class _ZlibDecoder:
+    """gzip, or HTTP "deflate" (zlib-wrapped, falling back to raw deflate as some servers send)."""
+
+    def __init__(self, coding: str):
+        self.coding = coding
+        self._obj = zlib.decompressobj(zlib.MAX_WBITS | 16 if coding == "gzip" else zlib.MAX_WBITS)
+        self._first = coding != "gzip"
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        if self._first:
+            self._first = False
+            try:
+                return self._obj.decompress(data, max_length)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data, max_length)
+
+    @property
+    def pending(self) -> bytes:
+        return self._obj.unconsumed_tail
+
+
+class _BrotliDecoder:
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data: bytes, max_length: int) -> bytes:
+        # Input left over at the limit stays inside the decompressor; max_length is one byte
+        # over the caller's cap, so reaching it aborts the body and nothing more is read
+        return self._obj.process(data, output_buffer_limit=max_length)
+
+    @property
+    def pending(self) -> bytes:
+        return b""
+
+
+def _decoder_for(coding: str):
+    if coding in ("gzip", "x-gzip"):
+        return _ZlibDecoder("gzip")
+    if coding == "deflate":
+        return _ZlibDecoder("deflate")
+    if coding == "br" and BROTLI_BOUNDED:
+        return _BrotliDecoder()
+    return None
+
+
+def _read_body(
+    response: requests.Response,
+    max_decoded: int = MAX_BODY_BYTES,
+    max_wire: int = MAX_WIRE_BYTES,
+) -> Optional[Tuple[memoryview, int]]:
+    """
+    (decoded body, bytes on the wire), or None if a cap is exceeded, the compression ratio
+    looks like a decompression bomb, or the content coding is unsupported.
+    Identity bodies are read straight into the buffer (sized from Content-Length when known);
+    compressed bodies are decompressed chunk by chunk with the output bounded by max_decoded.
+    """
+    raw = response.raw
+    coding = (response.headers.get("Content-Encoding") or "identity").strip().lower()
+    decoder = None if coding == "identity" else _decoder_for(coding)
+    if coding != "identity" and decoder is None:
+        logger.info("Unsupported Content-Encoding %r for %s", coding, response.url)
+        return None
+    try:
+        announced: Optional[int] = int(response.headers.get("Content-Length", ""))
+    except ValueError:
+        announced = None
+    if announced is not None and announced > (max_decoded if decoder is None else max_wire):
+        return None
+
+    if decoder is None:
+        capacity = announced + 1 if announced is not None else INITIAL_BUFFER_BYTES
+        buffer = _BodyBuffer(capacity, max_decoded)
+        while True:
+            got = buffer.readinto_from(raw)
+            if got is None:
+                return None
+            if not got:
+                break
+        FETCH_BYTES_TOTAL.inc(buffer.size, kind="wire")
+        FETCH_BYTES_TOTAL.inc(buffer.size, kind="decoded")
+        return buffer.view(), buffer.size
+
+    buffer = _BodyBuffer(INITIAL_BUFFER_BYTES, max_decoded)
+    wire = 0
+    try:
+        while True:
+            chunk = raw.read(READ_CHUNK_BYTES, decode_content=False)
+            if not chunk:
+                break
+            wire += len(chunk)
+            if wire > max_wire:
+                return None
+            data = chunk
+            while data:
+                if not buffer.append(decoder.decompress(data, buffer.room())):
+                    return None
+                data = decoder.pending
+            if buffer.size >= RATIO_CHECK_MIN_BYTES and buffer.size > MAX_COMPRESSION_RATIO * wire:
+                logger.warning(
+                    "Aborting %s: compression ratio %.0f exceeds %d",
+                    response.url, buffer.size / wire, MAX_COMPRESSION_RATIO,
+                )
+                return None
+    except Exception as exc:
+        logger.info("Could not decode %s body for %s: %s", coding, response.url, exc)
+        return None
+    finally:
+        FETCH_BYTES_TOTAL.inc(wire, kind="wire")
+    FETCH_BYTES_TOTAL.inc(buffer.size, kind="decoded")
+    return buffer.view(), wire
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]{0,200}?charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.I)
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def _codec_name(label: Optional[str]) -> Optional[str]:
+    if not label:
+        return None
+    try:
+        name = codecs.lookup(label.strip().strip("\"'")).name
+    except LookupError:
+        return None
+    # Browsers treat these labels as windows-1252 (WHATWG encoding standard)
+    return "cp1252" if name in ("latin-1", "iso8859-1", "ascii") else name
+
+
+def detect_encoding(content_type: str, body: bytes) -> str:
+    """Page charset: byte-order mark, then the Content-Type charset, then a <meta> tag, else UTF-8."""
+    head = bytes(body[:4])
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    for param in (content_type or "").split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset":
+            name = _codec_name(value)
+            if name:
+                return name
+    match = _META_CHARSET.search(bytes(body[:META_SNIFF_BYTES]))
+    if match:
+        name = _codec_name(match.group(1).decode("ascii", errors="ignore"))
+        if name:
+            return name
+    return "utf-8"
+
+
+def decode_body(body, encoding: Optional[str] = None) -> str:
+    """Decode bytes / bytearray / memoryview straight to str (no intermediate bytes copy)."""
+    if isinstance(body, str):
+        return body
+    encoding = encoding or "utf-8"
+    if encoding == "utf-8" and bytes(body[:3]) == codecs.BOM_UTF8:
+        encoding = "utf-8-sig"
+    return str(body, encoding, "replace")
+
+
+@dataclass
+class FetchResult:
+    # The page bytes exactly once in memory; consumers decode transiently with decode_body
+    body: memoryview
+    encoding: str
+    status_code: int
+    content_type: str
+    final_url: str
+    # Bytes received; smaller than len(body) when the page was sent compressed
+    wire_bytes: int = 0
+    # True when the server answered 304 and the body came from the page cache
+    revalidated: bool = False
+
+    @property
+    def text(self) -> str:
+        return decode_body(self.body, self.encoding)
+
+
+def _build_page_cache() -> Optional[PageCache]:
+    if not PAGE_CACHE_DB:
+        return None
+    try:
+        return PageCache(PAGE_CACHE_DB, max_bytes=PAGE_CACHE_MAX_BYTES)
+    except Exception as exc:
+        logger.warning("Page cache disabled (%s): %s", PAGE_CACHE_DB, exc)
+        return None
+
+
+page_cache = _build_page_cache()
+
+
+def _store_page(url: str, response: requests.Response, result: FetchResult) -> None:
+    # Only pages that can be revalidated are worth keeping
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if result.status_code != 200 or not (etag or last_modified):
+        return
+    if "no-store" in response.headers.get("Cache-Control", "").lower():
+        return
+    page_cache.set(
+        url,
+        result.body,
+        final_url=result.final_url,
+        status_code=result.status_code,
+        content_type=result.content_type,
+        encoding=result.encoding,
+        etag=etag,
+        last_modified=last_modified,
+    )
+
+
+def _encode_fetch(result: Optional[FetchResult]):
+    if result is None:
+        return None, None
+    meta = {
+        "encoding": result.encoding,
+        "status_code": result.status_code,
+        "content_type": result.content_type,
+        "final_url": result.final_url,
+        "wire_bytes": result.wire_bytes,
+    }
+    return meta, bytes(result.body)
+
+
+def _decode_fetch(meta, body: Optional[bytes]) -> Optional[FetchResult]:
+    if meta is None:
+        return None
+    return FetchResult(body=memoryview(body or b""), **meta)
+
+
+@replayable("fetch", key=lambda url, timeout=10: url, encode=_encode_fetch, decode=_decode_fetch)
+def fetch_document(url: str, timeout: float = 10) -> Optional[FetchResult]:
+    """SSRF-safe fetch of an HTML/text page, or None if blocked, too large, not text or failed."""
     parsed = urlparse(url)
     if parsed.scheme not in ('http', 'https'):
-        return None, None, None, None
+        return None
 
-    if not parsed.hostname or not is_safe_ip(parsed.hostname):
-        return None, None, None, None
+    if not parsed.hostname:
+        return None
 
-    session = requests.Session()
-    session.max_redirects = 3
+    try:
+        with http_pool.session() as session:
+            return _fetch_with_redirects(session, url, timeout)
+    except Exception:
+        return None
 
-    current_url = url
 
-    try:
-        for _ in range(4):
-            parsed_curr = urlparse(current_url)
+def safe_fetch(url: str, timeout: int = 10) -> Tuple[Optional[str], Optional[int], Optional[str], Optional[str]]:
+    result = fetch_document(url, timeout=timeout)
+    if result is None:
+        return None, None, None, None
+    return result.text, result.status_code, result.content_type, result.final_url
+
+
+def _fetch_with_redirects(session: requests.Session, current_url: str, timeout: float) -> Optional[FetchResult]:
+    # Redirects are followed by hand (max 3) so every hop passes the SSRF check,
+    # and each hop connects to the exact address that was checked
+    for _ in range(4):
+        parsed_curr = urlparse(current_url)
+        if parsed_curr.scheme not in ('http', 'https'):
+            return None
 
-            if not is_safe_ip(parsed_curr.hostname):
-                return None, None, None, None
+        ip = resolve_safe_ip(parsed_curr.hostname)
+        if ip is None:
+            return None
+        request_url, host_header = _pinned_url(parsed_curr, ip)
+        headers = {"Host": host_header}
+        cached = page_cache.get(current_url) if page_cache is not None else None
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
 
+        with http_pool.host_slot(parsed_curr.hostname, timeout), timed_call("http_fetch"):
             response = session.get(
-                current_url,
+                request_url,
                 timeout=timeout,
                 verify=True,
                 allow_redirects=False,
                 stream=True,
-                headers={"User-Agent": "Mozilla/5.0"}
+                headers=headers,
             )
 
+            if cached is not None:
+                page_cache.record(response.status_code == 304)
+            if response.status_code == 304 and cached is not None:
+                _release(response)
+                page_cache.touch(
+                    current_url, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                )
+                return FetchResult(
+                    body=memoryview(cached["body"]),
+                    encoding=cached["encoding"],
+                    status_code=cached["status_code"],
+                    content_type=cached["content_type"],
+                    final_url=cached["final_url"],
+                    revalidated=True,
+                )
+
             if response.is_redirect:
                 location = response.headers.get('Location')
+                _release(response)
                 if not location:
                     break
                 if location.startswith('/'):
@@ -77,23 +634,30 @@ def safe_fetch(url: str, timeout: int = 10) -> Tuple[Optional[str], Optional[int
                 elif location.startswith('http'):
                     current_url = location
                 else:
-                    current_url = location
+                    current_url = urljoin(current_url, location)
                 continue
 
-            content = b""
-            for chunk in response.iter_content(chunk_size=8192):
-                content += chunk
-                if len(content) > 2 * 1024 * 1024:
-                    return None, None, None, None
-
             content_type = response.headers.get('Content-Type', '')
-            if 'text/html' in content_type or 'text/plain' in content_type:
-                text_content = content.decode('utf-8', errors='replace')
-                return text_content, response.status_code, content_type, response.url
-            else:
-                return None, None, None, None
+            if 'text/html' not in content_type and 'text/plain' not in content_type:
+                response.close()
+                return None
 
-        return None, None, None, None
+            read = _read_body(response)
+            if read is None:
+                # Abandon the connection rather than reading the rest of the body
+                response.close()
+                return None
+            body, wire_bytes = read
+            result = FetchResult(
+                body=body,
+                encoding=detect_encoding(content_type, body),
+                status_code=response.status_code,
+                content_type=content_type,
+                final_url=current_url,
+                wire_bytes=wire_bytes,
+            )
+            if page_cache is not None:
+                _store_page(current_url, response, result)
+            return result
 
-    except Exception:
-        return None, None, None, None
+    return None
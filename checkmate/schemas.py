@@ -3,6 +3,14 @@ from pydantic import BaseModel, Field
 
 class AnalyzeRequest(BaseModel):
     url: str
+    # Skip the result cache and re-run the full analysis
+    refresh: bool = False
+
+class AnalyzeBatchRequest(BaseModel):
+    urls: List[str]
+    # Parallel pipelines for this batch; capped server-side
+    concurrency: Optional[int] = None
+    refresh: bool = False
 
 class EvidenceItem(BaseModel):
     message: str
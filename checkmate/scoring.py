@@ -1,8 +1,10 @@
 # Updated scoring.py to match CheckMate pipeline structure
 from __future__ import annotations
 
+import datetime
 from typing import Any, Dict, Optional, Tuple
 
+from checkmate.keywords import keyword_scanner
 from checkmate.schemas import AnalysisResult, Subscores
 
 # (formatting, relevance, sources, risk) — must sum to 1.0
@@ -20,6 +22,11 @@ WEIGHT_BY_TYPE: Dict[str, Tuple[float, float, float, float]] = {
 }
 DEFAULT_WEIGHTS = WEIGHT_BY_TYPE["news_historical"]
 
+# Statistical recency from the page's publication date, when extraction found one:
+# 1.0 up to RECENT_DAYS old, falling linearly to 0.0 at STALE_DAYS. Otherwise Gemini's estimate is used.
+RECENT_DAYS = 365
+STALE_DAYS = 5 * 365
+
 
 def _weights_for_type(website_type: Optional[str]) -> Tuple[float, float, float, float]:
     if website_type and website_type in WEIGHT_BY_TYPE:
@@ -87,7 +94,7 @@ def _score_relevance(result: AnalysisResult, debug: Dict[str, Any]) -> int:
     relevance = 1.0 - marketing
     # For statistical sites, factor in how up-to-date the information is
     if result.website_type == "statistical":
-        recency = gemini.get("information_recency_0_1", 0.5)
+        recency, recency_source = _information_recency(result, gemini)
         relevance = 0.6 * relevance + 0.4 * recency
     relevance_score = int(relevance * 100)
     relevance_score = max(0, min(100, relevance_score))
@@ -96,9 +103,31 @@ def _score_relevance(result: AnalysisResult, debug: Dict[str, Any]) -> int:
         "score": relevance_score,
     }
     if result.website_type == "statistical":
-        debug["relevance"]["information_recency_0_1"] = gemini.get("information_recency_0_1", 0.5)
+        debug["relevance"]["information_recency_0_1"] = recency
+        debug["relevance"]["recency_source"] = recency_source
     return relevance_score
 
+def _date_recency(extracted_date: Optional[str], today: Optional[datetime.date] = None) -> Optional[float]:
+    """0-1 recency for a YYYY-MM-DD publication date (see RECENT_DAYS / STALE_DAYS), or None."""
+    if not extracted_date:
+        return None
+    try:
+        published = datetime.date.fromisoformat(extracted_date[:10])
+    except ValueError:
+        return None
+    age = ((today or datetime.date.today()) - published).days
+    if age <= RECENT_DAYS:
+        return 1.0
+    return max(0.0, 1.0 - (age - RECENT_DAYS) / (STALE_DAYS - RECENT_DAYS))
+
+def _information_recency(result: AnalysisResult, gemini: Dict[str, Any]) -> Tuple[float, str]:
+    # The analyzed page is the first entry of pages_analyzed
+    extracted_date = result.pages_analyzed[0].extracted_date if result.pages_analyzed else None
+    recency = _date_recency(extracted_date)
+    if recency is not None:
+        return round(recency, 3), "extracted_date"
+    return gemini.get("information_recency_0_1", 0.5), "gemini"
+
 def _score_sources(result: AnalysisResult, debug: Dict[str, Any]) -> int:
     gemini = result.debug.get("gemini", {}).get("signals", {})
     traceability = gemini.get("source_traceability_0_1", 0.5)
@@ -116,24 +145,8 @@ def _is_content_safety_risk(result: AnalysisResult, risk: Any) -> bool:
     title = (getattr(risk, "title", "") or "").strip().lower()
     if code == "CONTENT_SAFETY":
         return True
-    topic_keywords = (
-        "content safety",
-        "topic safety",
-        "dangerous topic",
-        "dangerous content",
-        "unsafe content",
-        "extreme weather",
-        "extreme cold",
-        "extreme heat",
-        "storm",
-        "hurricane",
-        "tornado",
-        "earthquake",
-        "wildfire",
-        "flood",
-        "disaster",
-    )
-    return any(keyword in title for keyword in topic_keywords)
+    # Topic keywords (storms, disasters, "dangerous content", ...) are the content_safety family
+    return bool(keyword_scanner.present(title, ("content_safety",)))
 
 def _score_risk(result: AnalysisResult, debug: Dict[str, Any]) -> int:
     # Risk score goes down with HIGH/MED risks and presence of payment/sensitive info
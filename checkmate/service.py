@@ -0,0 +1,289 @@
+"""
+Service layer behind the HTTP endpoints: canonical URL -> rendered analysis.
+
+Results are cached by canonical URL (memory LRU + optional SQLite tier shared by all
+workers), so repeat submissions of the same URL skip the fetch and both Gemini calls.
+Concurrent submissions of the same URL are coalesced into one pipeline run.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from checkmate.cache import SQLiteCache, TieredCache, TTLCache
+from checkmate.metrics import COALESCED_TOTAL
+from checkmate.modules.gemini_page import is_fallback_result
+from checkmate.pipeline import PIPELINE_MAX_WORKERS, REQUEST_BUDGET_SECONDS, SharedWork, run_pipeline
+from checkmate.render import render_output
+from checkmate.schemas import AnalysisResult
+from checkmate.stages import STATUS_OK, StageOutcome
+from checkmate.singleflight import SingleFlight, file_lock
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("CHECKMATE_RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("CHECKMATE_RESULT_CACHE_SIZE", "256"))
+# Path to a SQLite file for the shared on-disk tier; empty disables it
+RESULT_CACHE_DB = os.getenv("CHECKMATE_RESULT_CACHE_DB", "").strip()
+# Directory for per-URL lock files so gunicorn workers coalesce too (needs RESULT_CACHE_DB to share results)
+SINGLEFLIGHT_LOCK_DIR = os.getenv("CHECKMATE_SINGLEFLIGHT_LOCK_DIR", "").strip()
+
+# Batch analysis: default and maximum parallel pipelines per batch request. Every pipeline runs
+# its stages on the shared pool of PIPELINE_MAX_WORKERS threads, so a batch never runs more
+# pipelines than that pool has threads; beyond it stages would only wait in its queue while
+# their request deadline runs out. Raise CHECKMATE_PIPELINE_WORKERS for wider batches.
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("CHECKMATE_BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("CHECKMATE_BATCH_MAX_CONCURRENCY", "16"))
+BATCH_MAX_URLS = int(os.getenv("CHECKMATE_BATCH_MAX_URLS", "500"))
+
+# Streaming: SSE event name per pipeline stage, and idle interval between keep-alive comments
+STREAM_EVENTS = {
+    "fetch": "fetch",
+    "crawl": "crawl",
+    "extract": "features",
+    "classify": "website_type",
+    "threat_intel": "threat_intel",
+    "security": "security",
+    "domain": "domain",
+    "page_analysis": "gemini",
+}
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+# Query parameters that never change page content
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "ref_src"})
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Cache key for a URL: lowercase scheme/host, no default port, no fragment,
+    tracking parameters removed and the remaining query sorted.
+    """
+    raw = (url or "").strip()
+    parts = urlsplit(raw)
+    if not parts.scheme and not parts.netloc:
+        # Bare "example.com/path" — treat like the pipeline would see it over http(s)
+        parts = urlsplit("https://" + raw)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower().rstrip(".")
+    netloc = host
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username or parts.password:
+        userinfo = parts.username or ""
+        if parts.password:
+            userinfo += f":{parts.password}"
+        netloc = f"{userinfo}@{netloc}"
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def _build_result_cache() -> TieredCache:
+    memory = TTLCache(maxsize=RESULT_CACHE_MAX_ENTRIES, ttl=RESULT_CACHE_TTL_SECONDS)
+    disk = None
+    if RESULT_CACHE_DB:
+        try:
+            disk = SQLiteCache(RESULT_CACHE_DB, ttl=RESULT_CACHE_TTL_SECONDS, table="analysis_results")
+        except Exception as exc:
+            logger.warning("Result cache disk tier disabled (%s): %s", RESULT_CACHE_DB, exc)
+    return TieredCache(memory, disk, name="result")
+
+
+result_cache = _build_result_cache()
+_inflight = SingleFlight()
+
+
+def _cacheable(result: AnalysisResult) -> bool:
+    # Do not pin a degraded answer (fetch failure, stage timeouts) for a whole TTL
+    if result.status != "ok":
+        return False
+    stages = result.debug.get("stages", {})
+    if not all(status == "ok" for status in stages.values()):
+        return False
+    # Stages that fail soft still finish "ok": Gemini's fallback answer, a WHOIS error
+    if is_fallback_result(result.debug.get("gemini", {})):
+        return False
+    return not result.domain_info.get("whois_error")
+
+
+def _from_cache(key: str, newer_than: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    entry = result_cache.get(key)
+    if entry is None:
+        return None
+    data, stored_at = entry
+    if newer_than is not None and stored_at < newer_than:
+        return None
+    rendered = render_output(AnalysisResult(**data))
+    rendered["cache"] = {"hit": True, "age_seconds": round(max(0.0, time.time() - stored_at), 1)}
+    return rendered
+
+
+def _run_and_store(url: str, key: str, refresh: bool, shared: Optional[SharedWork]) -> Dict[str, Any]:
+    started = time.time()
+    with file_lock(SINGLEFLIGHT_LOCK_DIR, key, timeout=REQUEST_BUDGET_SECONDS) as locked:
+        if locked:
+            # Another worker may have finished this URL while we waited for its lock
+            cached = _from_cache(key, newer_than=started if refresh else None)
+            if cached is not None:
+                return cached
+        result = run_pipeline(url, score=True, shared=shared)
+        if _cacheable(result):
+            result_cache.set(key, result.model_dump(mode="json"))
+    rendered = render_output(result)
+    rendered["cache"] = {"hit": False, "age_seconds": 0.0}
+    return rendered
+
+
+def analyze_url(url: str, refresh: bool = False, shared: Optional[SharedWork] = None) -> Dict[str, Any]:
+    """
+    Full analysis of one URL, rendered for the API.
+    refresh=True bypasses the cache lookup (the fresh result still replaces the cached one).
+    Identical concurrent calls share one pipeline run; shared (batch) also reuses domain-level work.
+    The response carries cache = {"hit": bool, "age_seconds": float, "coalesced": bool}.
+    """
+    key = canonicalize_url(url)
+    if not refresh:
+        cached = _from_cache(key)
+        if cached is not None:
+            cached["cache"]["coalesced"] = False
+            return cached
+
+    rendered, coalesced = _inflight.do(key, lambda: _run_and_store(url, key, refresh, shared))
+    if coalesced:
+        COALESCED_TOTAL.inc()
+    # Every caller gets its own copy; the leader's dict is shared with the followers
+    rendered = copy.deepcopy(rendered)
+    rendered["cache"]["coalesced"] = coalesced
+    return rendered
+
+
+def analyze_batch(
+    urls: List[str], concurrency: Optional[int] = None, refresh: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze many URLs with bounded parallelism, yielding one dict per URL in completion order:
+    {"index": <position in urls>, "url": ..., "result": <rendered>} or {"index", "url", "error"}.
+    WHOIS/TLS results are shared between URLs of the same domain/host within the batch.
+    Closing the iterator early cancels URLs that have not started yet.
+    """
+    limit = min(BATCH_MAX_CONCURRENCY, PIPELINE_MAX_WORKERS)
+    workers = max(1, min(concurrency or BATCH_DEFAULT_CONCURRENCY, limit, len(urls) or 1))
+    shared = SharedWork()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="checkmate-batch")
+    try:
+        futures = {
+            executor.submit(analyze_url, url, refresh, shared): (index, url)
+            for index, url in enumerate(urls)
+        }
+        for future in as_completed(futures):
+            index, url = futures[future]
+            try:
+                yield {"index": index, "url": url, "result": future.result()}
+            except Exception as exc:
+                logger.exception("Batch analysis failed for %s: %s", url, exc)
+                yield {"index": index, "url": url, "error": str(exc)}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _stage_event(outcome: StageOutcome) -> Tuple[str, Dict[str, Any]]:
+    payload: Dict[str, Any] = {"status": outcome.status, "seconds": round(outcome.duration, 3)}
+    if outcome.status != STATUS_OK:
+        payload["error"] = outcome.error
+        return STREAM_EVENTS[outcome.name], payload
+    value = outcome.value
+    if outcome.name == "fetch":
+        payload["data"] = {
+            "final_url": value["final_url"],
+            "status_code": value["status_code"],
+            "content_type": value["content_type"],
+        }
+    elif outcome.name == "crawl":
+        payload["data"] = {
+            "pages": [page.url for page in value.pages],
+            "key_pages": value.key_pages,
+            "missing_pages": value.missing_pages,
+        }
+    elif outcome.name == "extract":
+        features = value["features"]
+        payload["data"] = {
+            "title": features.get("title"),
+            "headings": features.get("headings", [])[:10],
+            "emails": features.get("emails", []),
+            "phones": features.get("phones", []),
+            "internal_links": len(features.get("links_internal", [])),
+            "external_links": len(features.get("links_external", [])),
+            "keyword_hits": features.get("keyword_hits", {}),
+            "published_date": features.get("published_date"),
+        }
+    elif outcome.name == "classify":
+        payload["data"] = {"website_type": value}
+    else:
+        payload["data"] = value
+    return STREAM_EVENTS[outcome.name], payload
+
+
+def analyze_url_events(url: str, refresh: bool = False) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Progressive analysis: yields (event, payload) as each pipeline stage finishes, ending with
+    ("score", <rendered result>) or ("error", {...}). ("keepalive", None) is yielded while idle.
+    A cached result is returned as a single "score" event. Streams always run their own pipeline
+    (no coalescing) so every stage event is real; the final result still refreshes the cache.
+    """
+    key = canonicalize_url(url)
+    if not refresh:
+        cached = _from_cache(key)
+        if cached is not None:
+            cached["cache"]["coalesced"] = False
+            yield "score", cached
+            return
+
+    events: "queue.Queue[Tuple[str, Optional[Dict[str, Any]]]]" = queue.Queue()
+    done = object()
+
+    def on_stage(outcome: StageOutcome) -> None:
+        if outcome.name in STREAM_EVENTS:
+            events.put(_stage_event(outcome))
+
+    def worker() -> None:
+        try:
+            result = run_pipeline(url, score=True, on_stage=on_stage)
+            if _cacheable(result):
+                result_cache.set(key, result.model_dump(mode="json"))
+            rendered = render_output(result)
+            rendered["cache"] = {"hit": False, "age_seconds": 0.0, "coalesced": False}
+            events.put(("score", rendered))
+        except Exception as exc:
+            logger.exception("Streaming analysis failed for %s: %s", url, exc)
+            events.put(("error", {"status": "error", "error": str(exc)}))
+        finally:
+            events.put(done)  # type: ignore[arg-type]
+
+    # Runs to completion even if the client disconnects, so the result still lands in the cache
+    threading.Thread(target=worker, name="checkmate-stream", daemon=True).start()
+    while True:
+        try:
+            item = events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+        except queue.Empty:
+            yield "keepalive", None
+            continue
+        if item is done:
+            return
+        yield item
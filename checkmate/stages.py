@@ -0,0 +1,221 @@
+"""
+Small stage-graph executor used by the pipeline.
+
+Each stage declares the stages it depends on and its own timeout. Stages whose
+dependencies have settled are started on a shared executor, so independent
+network work overlaps. A request-level Deadline caps every stage; anything that
+cannot finish inside the budget is reported as "timeout" instead of blocking.
+"""
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"
+
+# How often the scheduler re-checks stages that are still queued on a busy executor
+QUEUED_POLL_SECONDS = 0.05
+
+
+class SkipStage(Exception):
+    """Raised by a stage that has nothing to do; its dependents are skipped too."""
+
+
+class Deadline:
+    """Monotonic request deadline. seconds=None means no overall budget."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def clamp(self, timeout: float) -> float:
+        """Shorten a per-call timeout so it never outlives the request budget."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return max(0.0, min(timeout, remaining))
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[["StageContext"], Any]
+    # Hard dependencies: must finish with status "ok", otherwise this stage is skipped.
+    deps: Tuple[str, ...] = ()
+    # Soft dependencies: must have settled (any status) before this stage starts.
+    after: Tuple[str, ...] = ()
+    timeout: float = 10.0
+
+
+@dataclass
+class StageOutcome:
+    name: str
+    status: str
+    value: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+@dataclass
+class StageContext:
+    url: str
+    deadline: Deadline
+    outcomes: Dict[str, StageOutcome] = field(default_factory=dict)
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def value(self, name: str, default: Any = None) -> Any:
+        outcome = self.outcomes.get(name)
+        if outcome is None or outcome.status != STATUS_OK:
+            return default
+        return outcome.value
+
+    def ok(self, name: str) -> bool:
+        outcome = self.outcomes.get(name)
+        return outcome is not None and outcome.status == STATUS_OK
+
+
+def _validate(stages: Sequence[Stage]) -> None:
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate stage names")
+    known = set(names)
+    for stage in stages:
+        for dep in stage.deps + stage.after:
+            if dep not in known:
+                raise ValueError(f"stage {stage.name!r} depends on unknown stage {dep!r}")
+    # Cycle check (Kahn): every stage must become ready at some point
+    settled: set = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [s for s in remaining if all(d in settled for d in s.deps + s.after)]
+        if not ready:
+            raise ValueError("stage graph has a cycle: " + ", ".join(s.name for s in remaining))
+        settled.update(s.name for s in ready)
+        remaining = [s for s in remaining if s.name not in settled]
+
+
+def _invoke(
+    stage: Stage, ctx: StageContext, started: Optional[Dict[str, float]] = None
+) -> Tuple[str, Any, Optional[str], float]:
+    start = time.monotonic()
+    if started is not None:
+        started[stage.name] = start
+    try:
+        value = stage.func(ctx)
+        return STATUS_OK, value, None, time.monotonic() - start
+    except SkipStage as exc:
+        return STATUS_SKIPPED, None, str(exc) or None, time.monotonic() - start
+    except Exception as exc:
+        logger.exception("Stage %s failed: %s", stage.name, exc)
+        return STATUS_ERROR, None, f"{type(exc).__name__}: {exc}", time.monotonic() - start
+
+
+def run_stages(
+    stages: Sequence[Stage],
+    ctx: StageContext,
+    executor: Optional[Executor] = None,
+    on_complete: Optional[Callable[[StageOutcome], None]] = None,
+) -> Dict[str, StageOutcome]:
+    """
+    Run the stage graph and return one StageOutcome per stage (also stored on ctx.outcomes).
+    With executor=None stages run inline in dependency order; per-stage timeouts are then only
+    enforced before a stage starts, since a running call cannot be interrupted.
+    A stage's own timeout counts from when it starts running, so time spent queued behind a busy
+    executor is bounded only by the request deadline.
+    """
+    _validate(stages)
+    outcomes = ctx.outcomes
+
+    def settle(outcome: StageOutcome) -> None:
+        outcomes[outcome.name] = outcome
+        if on_complete is not None:
+            try:
+                on_complete(outcome)
+            except Exception:
+                logger.exception("Stage callback failed for %s", outcome.name)
+
+    def blocked_reason(stage: Stage) -> Optional[str]:
+        for dep in stage.deps:
+            if outcomes[dep].status != STATUS_OK:
+                return f"dependency {dep} {outcomes[dep].status}"
+        if ctx.deadline.expired():
+            return "time budget exhausted"
+        return None
+
+    pending: List[Stage] = list(stages)
+    running: Dict[Future, Tuple[Stage, float]] = {}
+    started_at: Dict[str, float] = {}
+    deadline_at = ctx.deadline.expires_at if ctx.deadline.expires_at is not None else float("inf")
+
+    def expiry(stage: Stage) -> float:
+        started = started_at.get(stage.name)
+        if started is None:
+            return deadline_at
+        return min(started + stage.timeout, deadline_at)
+
+    while pending or running:
+        progressed = False
+        for stage in list(pending):
+            if any(d not in outcomes for d in stage.deps + stage.after):
+                continue
+            pending.remove(stage)
+            progressed = True
+            reason = blocked_reason(stage)
+            if reason is not None:
+                status = STATUS_TIMEOUT if reason == "time budget exhausted" else STATUS_SKIPPED
+                settle(StageOutcome(stage.name, status, error=reason))
+                continue
+            if executor is None:
+                status, value, error, duration = _invoke(stage, ctx)
+                settle(StageOutcome(stage.name, status, value, error, duration))
+                continue
+            # Copy contextvars so per-request state (timings, etc.) follows the stage onto the pool
+            future = executor.submit(contextvars.copy_context().run, _invoke, stage, ctx, started_at)
+            running[future] = (stage, time.monotonic())
+
+        if progressed and executor is None:
+            continue
+        if not running:
+            if pending and not progressed:
+                raise RuntimeError("stage graph stalled")
+            continue
+
+        now = time.monotonic()
+        next_expiry = min(expiry(stage) for stage, _ in running.values())
+        timeout = None if next_expiry == float("inf") else max(0.0, next_expiry - now)
+        if any(stage.name not in started_at for stage, _ in running.values()):
+            # A queued stage may start at any moment and bring its own, earlier expiry
+            timeout = QUEUED_POLL_SECONDS if timeout is None else min(timeout, QUEUED_POLL_SECONDS)
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage, _ = running.pop(future)
+            status, value, error, duration = future.result()
+            settle(StageOutcome(stage.name, status, value, error, duration))
+
+        now = time.monotonic()
+        for future, (stage, submitted) in list(running.items()):
+            if expiry(stage) <= now:
+                running.pop(future)
+                future.cancel()  # only helps if it never started; a running call is abandoned
+                started = started_at.get(stage.name, submitted)
+                logger.warning("Stage %s timed out after %.1fs", stage.name, now - started)
+                settle(StageOutcome(stage.name, STATUS_TIMEOUT, error="timed out", duration=now - started))
+
+    return outcomes
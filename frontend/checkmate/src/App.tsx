@@ -1,6 +1,6 @@
 import { useState, useCallback } from "react";
-import type { AnalyzeResponse } from "./api/types";
-import { postAnalyze } from "./api/client";
+import type { AnalyzeResponse, StreamStageEvent } from "./api/types";
+import { streamAnalyze } from "./api/client";
 import type { HomeState } from "./pages/Home";
 import { Home } from "./pages/Home";
 
@@ -16,16 +16,20 @@ function App() {
   const [lastRequestUrl, setLastRequestUrl] = useState<string | null>(null);
   const [data, setData] = useState<AnalyzeResponse | null>(null);
   const [error, setError] = useState<string | null>(null);
+  const [progress, setProgress] = useState<StreamStageEvent[]>([]);
 
   const onAnalyze = useCallback(async (url: string) => {
     const normalized = normalizeUrl(url);
     setError(null);
     setState("loading");
     setData(null);
+    setProgress([]);
     setLastRequestUrl(normalized);
 
     try {
-      const response = await postAnalyze(normalized);
+      const response = await streamAnalyze(normalized, (event) =>
+        setProgress((prev) => [...prev, event]),
+      );
       setData(response);
       setState(response.status === "na" ? "na" : "success");
     } catch (e) {
@@ -39,6 +43,7 @@ function App() {
     setLastRequestUrl(null);
     setData(null);
     setError(null);
+    setProgress([]);
   }, []);
 
   return (
@@ -49,6 +54,7 @@ function App() {
       data={data}
       error={error}
       lastRequestUrl={lastRequestUrl}
+      progress={progress}
       useMockForDemo={false}
     />
   );
@@ -5,7 +5,7 @@
  * In prod: set VITE_API_BASE_URL to your backend (e.g. https://api.example.com).
  */
 
-import type { AnalyzeResponse } from "./types";
+import type { AnalyzeResponse, StreamStage, StreamStageEvent } from "./types";
 
 const BASE_URL =
   import.meta.env.VITE_API_BASE_URL ??
@@ -50,3 +50,87 @@ export async function postAnalyze(url: string): Promise<AnalyzeResponse> {
     throw new Error("Network or server error. Try again or analyze another URL.");
   }
 }
+
+const STREAM_STAGES: readonly StreamStage[] = [
+  "fetch",
+  "crawl",
+  "features",
+  "website_type",
+  "threat_intel",
+  "security",
+  "domain",
+  "gemini",
+];
+
+/**
+ * Progressive analysis over server-sent events (POST /analyze/stream).
+ * onStage fires as each backend stage finishes; resolves with the final result (same shape as postAnalyze).
+ */
+export async function streamAnalyze(
+  url: string,
+  onStage: (event: StreamStageEvent) => void,
+): Promise<AnalyzeResponse> {
+  const controller = new AbortController();
+  const timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT_MS);
+
+  try {
+    const apiUrl = `${BASE_URL.replace(/\/$/, "")}/analyze/stream`;
+    const res = await fetch(apiUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json", Accept: "text/event-stream" },
+      body: JSON.stringify({ url }),
+      signal: controller.signal,
+    });
+    if (!res.ok || !res.body) {
+      const text = await res.text();
+      let message = `Request failed (${res.status})`;
+      try {
+        const json = JSON.parse(text);
+        if (typeof json?.error === "string") message = json.error;
+      } catch {
+        /* keep default message */
+      }
+      throw new Error(message);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf("\n\n");
+
+        let event = "message";
+        const dataLines: string[] = [];
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) dataLines.push(line.slice(5).trimStart());
+        }
+        if (!dataLines.length) continue; // keep-alive comment
+        const payload = JSON.parse(dataLines.join("\n"));
+
+        if (event === "score") {
+          clearTimeout(timeoutId);
+          return payload as AnalyzeResponse;
+        }
+        if (event === "error") throw new Error(payload?.error ?? "Analysis failed.");
+        if ((STREAM_STAGES as readonly string[]).includes(event)) {
+          onStage({ stage: event as StreamStage, ...payload });
+        }
+      }
+    }
+    throw new Error("The analysis stream ended before a result was received.");
+  } catch (err) {
+    if (err instanceof Error && err.name === "AbortError")
+      throw new Error("Request timed out. The analysis can take up to 90 seconds—please try again.");
+    throw err instanceof Error ? err : new Error("Network or server error. Try again or analyze another URL.");
+  } finally {
+    clearTimeout(timeoutId);
+  }
+}
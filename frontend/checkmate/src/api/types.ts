@@ -2,6 +2,8 @@
 
 export interface AnalyzeRequest {
   url: string;
+  /** Bypass the server-side result cache */
+  refresh?: boolean;
 }
 
 export type AnalyzeStatus = "ok" | "na" | "error";
@@ -47,6 +49,32 @@ export interface DebugInfo {
   scoring?: ScoringDebugInfo;
 }
 
+export interface CacheInfo {
+  hit: boolean;
+  age_seconds: number;
+  /** True when this response was shared with an identical in-flight request */
+  coalesced?: boolean;
+}
+
+/** SSE event names emitted by POST /analyze/stream, in rough arrival order */
+export type StreamStage =
+  | "fetch"
+  | "crawl"
+  | "features"
+  | "website_type"
+  | "threat_intel"
+  | "security"
+  | "domain"
+  | "gemini";
+
+export interface StreamStageEvent {
+  stage: StreamStage;
+  status: "ok" | "error" | "timeout" | "skipped";
+  seconds: number;
+  data?: Record<string, unknown>;
+  error?: string | null;
+}
+
 export interface AnalyzeResponse {
   status: AnalyzeStatus;
   overall_score: number | null;
@@ -61,4 +89,5 @@ export interface AnalyzeResponse {
   security_info?: Record<string, unknown>;
   threat_intel?: Record<string, unknown>;
   debug?: DebugInfo;
+  cache?: CacheInfo;
 }
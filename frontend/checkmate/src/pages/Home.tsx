@@ -1,5 +1,5 @@
 import { useState, useCallback } from "react";
-import type { AnalyzeResponse } from "../api/types";
+import type { AnalyzeResponse, StreamStage, StreamStageEvent } from "../api/types";
 import { UrlInputCard } from "../components/UrlInputCard";
 import { ScoreHero } from "../components/ScoreHero";
 import { ScoreBar } from "../components/ScoreBar";
@@ -59,6 +59,17 @@ export const MOCK_RESULT: AnalyzeResponse = {
 
 export type HomeState = "idle" | "loading" | "success" | "error" | "na";
 
+const STAGE_LABELS: Record<StreamStage, string> = {
+  fetch: "Page fetched",
+  crawl: "Site pages crawled",
+  features: "Content extracted",
+  website_type: "Website type identified",
+  threat_intel: "Threat intel checked",
+  security: "Certificate checked",
+  domain: "Domain registration looked up",
+  gemini: "Content analyzed",
+};
+
 export interface HomeProps {
   onAnalyze: (url: string) => void;
   onReset: () => void;
@@ -69,6 +80,8 @@ export interface HomeProps {
   lastRequestUrl?: string | null;
   /** When true, use mock result for dashboard instead of real data (for demo without backend) */
   useMockForDemo?: boolean;
+  /** Stages already finished while state is "loading" (streaming mode) */
+  progress?: StreamStageEvent[];
 }
 
 export function Home({
@@ -79,6 +92,7 @@ export function Home({
   error,
   lastRequestUrl = null,
   useMockForDemo = false,
+  progress = [],
 }: HomeProps) {
   const [useMock, setUseMock] = useState(useMockForDemo);
   const displayData =
@@ -136,6 +150,21 @@ export function Home({
               <p className="mt-1.5 text-sm text-slate-500">
                 This can take up to 35 seconds. Please wait.
               </p>
+              {progress.length > 0 && (
+                <ul className="mt-4 space-y-1 text-sm text-slate-600">
+                  {progress.map((event) => (
+                    <li key={event.stage} className="flex items-center gap-2">
+                      <span aria-hidden className={event.status === "ok" ? "text-emerald-600" : "text-amber-600"}>
+                        {event.status === "ok" ? "✓" : "!"}
+                      </span>
+                      {STAGE_LABELS[event.stage]}
+                      {event.stage === "website_type" && typeof event.data?.website_type === "string"
+                        ? `: ${event.data.website_type.replace("_", " / ")}`
+                        : ""}
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
           )}
 
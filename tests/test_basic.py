@@ -1,3 +1,5 @@
+import socket
+
 import pytest
 import responses
 from unittest.mock import patch, MagicMock
@@ -22,9 +24,13 @@ def test_is_safe_ip_allows_public():
         assert is_safe_ip("google.com") == True
 
 def test_safe_fetch_blocks_ssrf():
-    with patch('checkmate.safe_fetch.is_safe_ip', return_value=False):
-        content, _, _, _ = safe_fetch("http://localhost:5000")
-        assert content is None
+    # A public-looking name that resolves to a private address must not be fetched
+    with patch('checkmate.safe_fetch.resolver.resolve', return_value=['10.0.0.5']) as mock_resolve, \
+            responses.RequestsMock(assert_all_requests_are_fired=False) as mock_http:
+        content, status, _, _ = safe_fetch("http://news.example.com/article")
+        assert content is None and status is None
+        assert len(mock_http.calls) == 0
+    mock_resolve.assert_called_with("news.example.com")
 
 # --- Schema Tests ---
 from checkmate.schemas import AnalysisResult, RiskItem
@@ -0,0 +1,57 @@
+import time
+
+from checkmate.cache import SQLiteCache, TieredCache, TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a")[0] == 1  # touch a, so b is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == 1
+    assert cache.get("c")[0] == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1, stored_at=time.time() - 11)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_sqlite_tier_is_shared_and_promoted(tmp_path):
+    db = str(tmp_path / "results.sqlite")
+    writer = TieredCache(TTLCache(maxsize=4), SQLiteCache(db))
+    writer.set("k", {"score": 80})
+
+    # A second process/worker only shares the file
+    reader = TieredCache(TTLCache(maxsize=4), SQLiteCache(db))
+    value, stored_at = reader.get("k")
+    assert value == {"score": 80}
+    assert reader.memory.get("k")[1] == stored_at
+
+
+def test_sqlite_prune_keeps_newest(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "c.sqlite"), ttl=None, max_entries=2)
+    for i in range(4):
+        cache.set(f"k{i}", i, stored_at=1000 + i)
+    cache.prune()
+    assert cache.get("k0") is None and cache.get("k1") is None
+    assert cache.get("k3")[0] == 3
+
+
+def test_page_cache_evicts_least_recently_used_bytes(tmp_path):
+    from checkmate.cache import PageCache
+
+    cache = PageCache(str(tmp_path / "pages.sqlite"), max_bytes=250)
+    for name in ("a", "b"):
+        cache.set(name, b"x" * 100, name, 200, "text/html", "utf-8", '"e"', None)
+        time.sleep(0.01)
+    cache.touch("a")  # a is now the most recently used
+    cache.set("c", b"x" * 100, "c", 200, "text/html", "utf-8", None, "Mon, 01 Jan 2024 00:00:00 GMT")
+    assert cache.get("b") is None
+    assert cache.get("a")["etag"] == '"e"'
+    assert cache.get("c")["body"] == b"x" * 100
+    assert cache.total_bytes() == 200
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from checkmate.crawl import classify_key_page, crawl_site
+
+HOME = """<html><head><title>Home</title></head><body>
+<a href="/blog/1">Blog</a><a href="/products">Products</a>
+<a href="/legal/privacy-policy">Privacy</a><a href="/help">Contact us</a>
+<a href="https://other.example/about">Elsewhere</a><a href="/brochure.pdf">PDF</a>
+<a href="mailto:hi@acme.com">Mail</a>
+</body></html>"""
+
+
+def _site(pages, delay=0.0):
+    fetched = []
+
+    def fetch(url, timeout=10):
+        fetched.append(url)
+        time.sleep(delay)
+        html = pages.get(url)
+        if html is None:
+            return None, None, None, None
+        # A page is its HTML, or (HTML, status code) for an error page
+        html, status = html if isinstance(html, tuple) else (html, 200)
+        return html, status, "text/html", url
+
+    return fetch, fetched
+
+
+def test_classify_key_page():
+    assert classify_key_page("https://a.com/privacy") == "privacy"
+    assert classify_key_page("https://a.com/tos") == "terms"
+    assert classify_key_page("https://a.com/help", "Contact us") == "contact"
+    assert classify_key_page("https://a.com/company/who-we-are") == "about"
+    assert classify_key_page("https://a.com/blog/1", "Blog") is None
+
+
+def test_crawl_fetches_key_pages_first_and_reports_missing():
+    pages = {
+        "https://acme.com/legal/privacy-policy": "<html><title>Privacy</title></html>",
+        "https://acme.com/help": "<html><a href='/deep'>deep</a></html>",
+        "https://acme.com/products": "<html></html>",
+        "https://acme.com/blog/1": "<html></html>",
+    }
+    fetch, fetched = _site(pages)
+    result = crawl_site("https://acme.com/", root_content=HOME, root_status=200, fetch=fetch, workers=1)
+    assert fetched[:2] == ["https://acme.com/legal/privacy-policy", "https://acme.com/help"]
+    assert "https://other.example/about" not in fetched
+    assert not any(url.endswith(".pdf") for url in fetched)
+    assert result.key_pages == {
+        "privacy": "https://acme.com/legal/privacy-policy",
+        "contact": "https://acme.com/help",
+    }
+    assert result.missing_pages == ["About", "Terms of Service"]
+    assert [p.title for p in result.pages if p.key_page == "privacy"] == ["Privacy"]
+    assert "https://acme.com/deep" in fetched  # depth 2 is followed
+
+
+def test_error_pages_do_not_count_as_key_pages():
+    pages = {
+        "https://acme.com/legal/privacy-policy": "<html><title>Privacy</title></html>",
+        "https://acme.com/help": ("<html><title>Not found</title></html>", 404),
+    }
+    fetch, _ = _site(pages)
+    result = crawl_site("https://acme.com/", root_content=HOME, root_status=200, fetch=fetch, workers=1)
+    assert result.key_pages == {"privacy": "https://acme.com/legal/privacy-policy"}
+    assert "Contact" in result.missing_pages
+
+
+def test_crawl_respects_page_and_depth_limits():
+    fetch, fetched = _site({"https://acme.com/products": "<html><a href='/deeper'>x</a></html>"})
+    result = crawl_site("https://acme.com/", root_content=HOME, fetch=fetch, max_pages=3, max_depth=1)
+    assert len(fetched) == 2  # start page counts towards max_pages
+    assert "https://acme.com/deeper" not in fetched
+    assert result.stopped == "page_budget"
+
+
+def test_crawl_stops_at_time_budget_without_false_missing():
+    fetch, fetched = _site({}, delay=0.5)
+    start = time.monotonic()
+    result = crawl_site("https://acme.com/", root_content=HOME, fetch=fetch, budget=0.2, workers=2)
+    assert time.monotonic() - start < 0.45
+    assert result.stopped == "time_budget"
+    # privacy/contact were still in flight, so only unlinked pages are reported missing
+    assert result.missing_pages == ["About", "Terms of Service"]
+
+
+def test_crawl_fetches_concurrently():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fetch(url, timeout=10):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return "<html></html>", 200, "text/html", url
+
+    crawl_site("https://acme.com/", root_content=HOME, fetch=fetch, workers=4)
+    assert peak[0] > 1
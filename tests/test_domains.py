@@ -0,0 +1,55 @@
+import socket
+
+import pytest
+
+from checkmate import domains
+from checkmate.domains import hostname, registered_domain
+from checkmate.modules.extraction import extract_page_features
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("https://shop.Example.co.uk:8443/cart?x=1", "example.co.uk"),
+        ("example.com/path", "example.com"),
+        ("user:pw@www.bbc.co.uk", "bbc.co.uk"),
+        ("HTTPS://Best-Store.BIZ/", "best-store.biz"),
+        ("http://127.0.0.1/admin", None),
+        ("localhost", None),
+        ("co.uk", None),
+        ("http://[broken", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_registered_domain(value, expected):
+    assert registered_domain(value) == expected
+
+
+def test_hostname():
+    assert hostname("https://User@WWW.Example.com.:443/a") == "www.example.com"
+    assert hostname("//cdn.example.com/x.js") == "cdn.example.com"
+
+
+def test_lookups_are_memoized_per_host_and_offline(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("suffix lookup must not touch the network")
+
+    monkeypatch.setattr(socket, "create_connection", no_network)
+    domains.clear_cache()
+    for path in range(50):
+        assert registered_domain(f"https://news.example.org/story/{path}") == "example.org"
+    info = domains.cache_info()
+    assert info.misses == 1
+    assert info.hits == 49
+
+
+def test_link_classification_uses_registered_domain():
+    html = (
+        '<a href="https://blog.acme.co.uk/post">Blog</a>'
+        '<a href="HTTPS://WWW.ACME.CO.UK/shop">Shop</a>'
+        '<a href="https://acme.com/">Other TLD</a>'
+    )
+    features = extract_page_features(html, "https://www.acme.co.uk/")
+    assert features["links_internal"] == ["HTTPS://WWW.ACME.CO.UK/shop", "https://blog.acme.co.uk/post"]
+    assert features["links_external"] == ["https://acme.com/"]
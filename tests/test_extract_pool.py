@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from checkmate import extract_pool
+
+PAGE = os.path.join(os.path.dirname(__file__), "fixtures", "pages", "portal_boilerplate.html")
+BASE_URL = "https://valleyherald.example/"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(extract_pool, "EXTRACT_PROCESSES", 2)
+    yield
+    extract_pool.shutdown_pool()
+
+
+def _body():
+    with open(PAGE, "rb") as f:
+        return memoryview(bytearray(f.read()))
+
+
+STUCK_URL = "https://stuck.example/"
+
+
+def _stuck_extract(body, base_url, *args):
+    # Stands in for _extract_compact in the worker: pages from STUCK_URL never finish
+    if base_url == STUCK_URL:
+        time.sleep(60)
+    return extract_pool._extract_compact(body, base_url, *args)
+
+
+def test_process_pool_matches_inline_extraction(pool):
+    body = _body()
+    offloaded = extract_pool.extract(body, BASE_URL, "utf-8", 12000, 200, timeout=60)
+    inline = extract_pool._extract(body, BASE_URL, "utf-8", 12000, 200)
+    assert offloaded == inline
+    assert offloaded["features"]["main_text"].startswith("Heat pump rebates")
+
+
+def test_whole_fetch_buffer_is_passed_without_copying():
+    body = _body()
+    assert extract_pool._payload(body) is body.obj
+    assert extract_pool._payload(body[10:]) == bytes(body[10:])
+
+
+def test_worker_timeout_raises(pool):
+    with pytest.raises(FutureTimeout):
+        extract_pool.extract(_body(), BASE_URL, "utf-8", timeout=0)
+
+
+def test_stuck_task_does_not_block_the_next_one(pool, monkeypatch):
+    monkeypatch.setattr(extract_pool, "EXTRACT_PROCESSES", 1)
+    extract_pool.shutdown_pool()
+    extract_pool.extract(_body(), BASE_URL, "utf-8", timeout=60)  # start the worker
+    worker = extract_pool._get_pool()
+
+    with monkeypatch.context() as m:
+        m.setattr(extract_pool, "_extract_compact", _stuck_extract)
+        with pytest.raises(FutureTimeout):
+            extract_pool.extract(_body(), STUCK_URL, "utf-8", timeout=1)
+
+    # Would time out too if the stuck task still held the only worker
+    extracted = extract_pool.extract(_body(), BASE_URL, "utf-8", timeout=30)
+    assert extracted["features"]["main_text"].startswith("Heat pump rebates")
+    assert extract_pool._get_pool() is worker
+
+
+def test_stuck_task_leaves_concurrent_extractions_alone(pool, monkeypatch):
+    extract_pool.extract(_body(), BASE_URL, "utf-8", timeout=60)  # start the workers
+    worker = extract_pool._get_pool()
+    monkeypatch.setattr(extract_pool, "_extract_compact", _stuck_extract)
+    outcomes = {}
+
+    def run(name, url, timeout):
+        try:
+            outcomes[name] = extract_pool.extract(_body(), url, "utf-8", timeout=timeout)
+        except Exception as exc:
+            outcomes[name] = exc
+
+    threads = [
+        threading.Thread(target=run, args=("stuck", STUCK_URL, 1)),
+        threading.Thread(target=run, args=("healthy", BASE_URL, 30)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert isinstance(outcomes["stuck"], FutureTimeout)
+    assert outcomes["healthy"]["features"]["main_text"].startswith("Heat pump rebates")
+    assert extract_pool._get_pool() is worker
+
+
+def test_broken_pool_falls_back_inline_and_spares_a_newer_pool(pool, monkeypatch):
+    class NewerPool:
+        def shutdown(self, *args, **kwargs):
+            pass
+
+    newer = NewerPool()
+
+    class BrokenPool:
+        def submit(self, *args, **kwargs):
+            extract_pool._pool = newer  # another thread restarted the pool meanwhile
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, *args, **kwargs):
+            raise AssertionError("only the current pool may be shut down")
+
+    monkeypatch.setattr(extract_pool, "_pool", BrokenPool())
+    extracted = extract_pool.extract(_body(), BASE_URL, "utf-8", timeout=30)
+    assert extracted == extract_pool._extract(_body(), BASE_URL, "utf-8", 12000, 1000)
+    assert extract_pool._pool is newer
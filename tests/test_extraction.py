@@ -1,5 +1,21 @@
+import os
+
 import pytest
-from checkmate.modules.extraction import extract_page_features, truncate_clean_text
+from checkmate.modules.extraction import (
+    _find_emails,
+    _find_phones,
+    _PageWalk,
+    extract_page_features,
+    make_soup,
+    truncate_clean_text,
+)
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+
+
+def _load(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        return f.read()
 
 HTML_LEGIT = """
 <html>
@@ -54,3 +70,129 @@ def test_truncate():
     long_text = "a" * 15000
     truncated = truncate_clean_text(long_text, max_chars=12000)
     assert len(truncated) == 12000
+
+def test_extract_keeps_blocks():
+    features = extract_page_features(HTML_LEGIT, "https://legit.com")
+    assert features["blocks"][:3] == [
+        "Legit Corp",
+        "Welcome to Legit Corp",
+        "Contact us at support@legit.com or call +1-650-253-0000.",
+    ]
+    assert " ".join(features["blocks"]) == features["clean_text"]
+
+def test_truncate_keeps_priority_blocks_in_page_order():
+    filler = [f"Story paragraph {i} with nothing in particular to report today." for i in range(300)]
+    blocks = ["Intro"] + filler[:150] + ["Refunds within 30 days, see our policy."] + filler[150:] + [
+        "Menu", "Menu", "Revenue grew 40% last year.", "Write to billing@shop.example"
+    ]
+    text = " ".join(blocks)
+    out = truncate_clean_text(text, "Shop", ["Intro", "Refunds"], max_chars=2000, blocks=blocks)
+    lines = out.split("\n")
+    assert len(out) <= 2000
+    assert lines[:3] == ["TITLE: Shop", "HEADINGS: Intro | Refunds", "Intro"]
+    assert lines[-3:] == [
+        "Refunds within 30 days, see our policy.",
+        "Revenue grew 40% last year.",
+        "Write to billing@shop.example",
+    ]
+    assert lines.count("Menu") <= 1
+    # Short text is passed through untouched
+    assert truncate_clean_text("short", "T", ["H"], blocks=["short"]) == "short"
+
+HTML_CHROME = """
+<html><head><title>Shop</title><meta name="description" content=" Deals "></head>
+<body>
+<header><h1>Shop <em>Name</em></h1><a href="/home">Home</a> Header text</header>
+<!-- hidden comment -->
+<main><h2>Products <span>new</span></h2><p>Body text</p><a href="/p/1">One</a>
+<script>var secret = "script text";</script><noscript><h3>Enable JS</h3></noscript></main>
+<footer><h3>Footer heading</h3><a href="/privacy">Privacy</a></footer>
+</body></html>
+"""
+
+def test_single_walk_matches_old_rules_and_leaves_tree_intact():
+    soup = make_soup(HTML_CHROME)
+    before = str(soup)
+    page = _PageWalk(soup)
+    assert str(soup) == before
+    assert page.title == "Shop"
+    # Headings inside header/footer still count; their text and links do not
+    assert page.headings == ["ShopName", "Productsnew", "Footer heading"]
+    assert page.meta == {"description": "Deals"}
+    assert page.hrefs == ["/p/1"]
+    text = " ".join(" ".join(page.text_parts).split())
+    assert text == "Shop Products new Body text One"
+    # Dropped subtrees (script, noscript) are never entered
+    assert page.visited < sum(1 for _ in soup.descendants)
+
+def test_find_emails_matches_findall_semantics():
+    text = "mail a@b@c.com, x@a.com.y@b.com or Sales@Shop.example.co.uk; not @handle or user@localhost"
+    assert _find_emails(text) == sorted(["b@c.com", "x@a.com", ".y@b.com", "Sales@Shop.example.co.uk"])
+    assert len(_find_emails(" ".join(f"user{i}@example.com" for i in range(100)), limit=10)) == 10
+
+def test_find_phones_region_and_cap():
+    text = "Call 020 7946 0018 or +1 (650) 253-0000. Order 2024-11-14, SKU 1234567."
+    assert _find_phones(text, "US") == ["+16502530000"]
+    assert _find_phones(text, "GB") == ["+16502530000", "+442079460018"]
+    many = " ".join(f"+1 650 555 01{i:02d}" for i in range(40))
+    assert len(_find_phones(many, "US", limit=5)) == 5
+
+def test_phone_region_parameter():
+    html = "<p>Ring us on 020 7946 0018</p>"
+    assert extract_page_features(html, "https://example.co.uk")["phones"] == []
+    assert extract_page_features(html, "https://example.co.uk", phone_region="gb")["phones"] == ["+442079460018"]
+
+def test_contact_extraction_stays_linear_on_long_runs():
+    import time
+    text = "a" * 200000 + " " + "1 " * 50000
+    started = time.monotonic()
+    assert _find_emails(text) == []
+    _find_phones(text)
+    assert time.monotonic() - started < 2
+
+def test_main_content_is_split_from_menus_and_sidebars():
+    body = _load("portal_boilerplate.html")
+    features = extract_page_features(body, "https://valleyherald.example/", encoding="utf-8")
+    main, boilerplate = features["main_text"], features["boilerplate_text"]
+    assert main.startswith("Heat pump rebates expand to renters across the state By Dana Whitfield")
+    assert "How to apply" in main and "fallen by about 15 percent since last year." in main
+    for menu_text in ("Obituaries", "Accept all cookies", "Most read", "Snowpack below average", "Privacy policy"):
+        assert menu_text in boilerplate and menu_text not in main
+    # Nothing is lost: every block of clean_text is in one of the two parts
+    assert len(main) + len(boilerplate) + 1 == len(features["clean_text"])
+
+def test_page_without_clear_main_content_is_kept_whole():
+    features = extract_page_features(HTML_LEGIT, "https://legit.com")
+    assert features["main_text"] == features["clean_text"]
+    assert features["boilerplate_text"] == ""
+
+def test_publication_date_prefers_structured_sources():
+    html = """<html><head>
+    <meta property="article:published_time" content="2023-05-02T08:00:00Z">
+    <script type="application/ld+json">{"@graph": [{"@type": "WebPage"},
+        {"@type": "NewsArticle", "dateModified": "2024-01-09", "datePublished": "2023-05-01T07:00:00+02:00"}]}</script>
+    </head><body><header><time datetime="2030-01-01">Today</time></header>
+    <p><time datetime="2023-04-30">April 30</time> Story text.</p></body></html>"""
+    features = extract_page_features(html, "https://news.example/2022/12/31/story")
+    assert (features["published_date"], features["published_date_source"]) == ("2023-05-01", "json_ld")
+
+    without_json_ld = html.replace("datePublished", "headline")
+    assert extract_page_features(without_json_ld, "https://news.example/")["published_date"] == "2023-05-02"
+
+def test_publication_date_from_time_and_url_rejects_impossible_dates(monkeypatch):
+    from checkmate.modules import extraction
+    monkeypatch.setattr(extraction, "DATE_FALLBACK_CHARS", 0)
+    html = '<p><time datetime="2023-02-30">Feb 30</time><time datetime="2099-01-01">Future</time></p>'
+    assert extract_page_features(html, "https://news.example/")["published_date"] is None
+    features = extract_page_features(html, "https://news.example/2021/07/04/fireworks.html")
+    assert (features["published_date"], features["published_date_source"]) == ("2021-07-04", "url")
+    html = '<p><time pubdate datetime="2020-03-01T10:00">March 1</time></p>'
+    assert extract_page_features(html, "https://news.example/")["published_date"] == "2020-03-01"
+
+def test_publication_date_falls_back_to_htmldate_on_page_text(monkeypatch):
+    html = '<html><body><p class="byline">By Dana Whitfield, March 3, 2025</p><p>Story text.</p></body></html>'
+    features = extract_page_features(html, "https://news.example/story")
+    assert (features["published_date"], features["published_date_source"]) == ("2025-03-03", "htmldate")
+    from checkmate.modules import extraction
+    monkeypatch.setattr(extraction, "DATE_FALLBACK_CHARS", 0)
+    assert extract_page_features(html, "https://news.example/story")["published_date"] is None
@@ -68,3 +68,39 @@ def test_analyze_page_parses_json_and_validates_evidence(monkeypatch):
     # risk evidence NOT in clean_text -> severity downgraded + evidence removed
     assert res["risks"][0]["severity"] == "UNCERTAIN"
     assert res["risks"][0]["evidence_snippets"] == []
+
+
+def test_boilerplate_is_sent_after_main_text_and_counts_as_evidence(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    prompts = []
+    fake_output = {
+        "page_url": "https://x.com",
+        "page_type": "article",
+        "signals": {},
+        "numeric_claims": [],
+        "risks": [
+            {"severity": "LOW", "code": "TEST_RISK", "title": "Footer", "evidence_snippets": ["Terms of use"], "notes": ""}
+        ],
+    }
+
+    def fake_call(prompt, schema, api_key, model):
+        prompts.append(prompt)
+        return json.dumps(fake_output)
+
+    with patch("checkmate.modules.gemini_page._call_gemini_json", side_effect=fake_call):
+        res = analyze_page_with_gemini(
+            page_url="https://x.com",
+            page_title="X",
+            clean_text="Main story text.",
+            extracted_emails=[],
+            extracted_phones=[],
+            extracted_date=None,
+            link_stats={},
+            boilerplate_text="Home News Terms of use",
+        )
+
+    payload = json.loads(prompts[0].split("INPUT_JSON:\n", 1)[1].split("\n\n", 1)[0])
+    assert payload["clean_text"] == "Main story text."
+    assert payload["boilerplate_text"] == "Home News Terms of use"
+    assert res["risks"][0]["severity"] == "LOW"
+    assert res["risks"][0]["evidence_snippets"] == ["Terms of use"]
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from checkmate.cache import SQLiteCache
+from checkmate.jobs import JOB_DONE, JOB_ERROR, QueueFull, JobQueue
+
+
+def _wait_finished(queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (JOB_DONE, JOB_ERROR):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_job_runs_and_reports_result():
+    queue = JobQueue(lambda url, refresh=False: {"status": "ok", "url": url}, workers=2)
+    job = queue.submit("https://example.com")
+    assert job["status"] in ("queued", "running")
+    finished = _wait_finished(queue, job["id"])
+    assert finished["status"] == JOB_DONE
+    assert finished["result"] == {"status": "ok", "url": "https://example.com"}
+    assert queue.get("nope") is None
+
+
+def test_job_error_is_recorded():
+    def boom(url, refresh=False):
+        raise RuntimeError("fetch exploded")
+
+    queue = JobQueue(boom, workers=1)
+    finished = _wait_finished(queue, queue.submit("https://example.com")["id"])
+    assert finished["status"] == JOB_ERROR
+    assert finished["error"] == "fetch exploded"
+
+
+def test_queue_depth_limit_and_retention():
+    release = threading.Event()
+
+    def blocked(url, refresh=False):
+        release.wait(5)
+        return {"url": url}
+
+    queue = JobQueue(blocked, workers=1, max_queued=2, retention=0.05)
+    first = queue.submit("https://a.example")
+    time.sleep(0.05)  # first job is running, not queued
+    queue.submit("https://b.example")
+    queue.submit("https://c.example")
+    with pytest.raises(QueueFull):
+        queue.submit("https://d.example")
+    release.set()
+    _wait_finished(queue, first["id"])
+    time.sleep(0.1)
+    assert queue.get(first["id"]) is None  # past retention
+
+
+def test_job_store_shared_between_queues(tmp_path):
+    store = SQLiteCache(str(tmp_path / "jobs.db"), ttl=60, table="jobs")
+    producer = JobQueue(lambda url, refresh=False: {"url": url}, store=store)
+    job_id = producer.submit("https://example.com")["id"]
+    _wait_finished(producer, job_id)
+    other_worker = JobQueue(lambda url, refresh=False: {}, store=store)
+    assert other_worker.get(job_id)["result"] == {"url": "https://example.com"}
+
+
+def test_jobs_endpoints():
+    from unittest.mock import patch
+
+    from app import app
+    from checkmate import jobs
+
+    queue = JobQueue(lambda url, refresh=False: {"status": "ok", "overall_score": 80}, workers=1)
+    with patch.object(jobs, "job_queue", queue), patch("app.job_queue", queue):
+        client = app.test_client()
+        created = client.post("/jobs", json={"url": "https://example.com"})
+        assert created.status_code == 202
+        job_id = created.get_json()["job_id"]
+        assert created.headers["Location"] == f"/jobs/{job_id}"
+        _wait_finished(queue, job_id)
+        polled = client.get(f"/jobs/{job_id}").get_json()
+        assert polled["status"] == "done"
+        assert polled["result"]["overall_score"] == 80
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.post("/jobs", json={}).status_code == 400
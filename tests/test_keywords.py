@@ -0,0 +1,68 @@
+import json
+
+from checkmate.keywords import KEYWORD_FAMILIES, KeywordScanner, keyword_scanner, load_keyword_table
+from checkmate.modules.extraction import extract_page_features
+
+
+def test_all_families_in_one_scan_with_positions():
+    text = "Enter your Social  Security code and CREDIT CARD number. Limited time!"
+    hits = keyword_scanner.scan(text)
+    assert set(hits) >= {"login_prompt", "ssn", "cvv", "credit_card", "payment_pressure"}
+    ssn = hits["ssn"][0]
+    assert (ssn.term, text[ssn.start:ssn.end]) == ("social security", "Social  Security")
+    # Overlapping terms are both found
+    cvv = hits["cvv"][0]
+    assert text[cvv.start:cvv.end] == "Security code"
+    # A term that is a prefix of another at the same position is reported too
+    assert [hit.term for hit in hits["credit_card"]] == ["credit card", "card number"]
+
+
+def test_word_boundaries_and_wildcards():
+    scanner = KeywordScanner({"login": ["enter"], "password": ["password*"], "weather": ["*storm*"]})
+    assert scanner.present("Visit our data center") == frozenset()
+    assert scanner.present("Forgot passwords? Thunderstorms ahead") == {"password", "weather"}
+    assert scanner.present("ENTER") == {"login"}
+
+
+def test_scan_filters_families_and_caps_hits():
+    scanner = KeywordScanner({"a": ["alpha"], "b": ["beta"]})
+    text = "alpha beta alpha alpha"
+    assert list(scanner.scan(text, families=["a"])) == ["a"]
+    assert len(scanner.scan(text, max_hits=2)["a"]) == 2
+
+
+def test_offsets_survive_case_changes_that_alter_length():
+    text = "İstanbul storm"
+    hit = keyword_scanner.scan(text, ["content_safety"])["content_safety"][0]
+    assert text[hit.start:hit.end] == "storm"
+
+
+def test_dotted_capital_i_inside_a_term_and_elsewhere():
+    text = "İstanbul PRİVACY policy"
+    hits = keyword_scanner.scan(text, ["priority_block"])["priority_block"]
+    assert [(hit.term, text[hit.start:hit.end]) for hit in hits] == [("privacy", "PRİVACY"), ("policy", "policy")]
+    assert KeywordScanner({"city": ["İstanbul"]}).present("ISTANBUL and İSTANBUL") == {"city"}
+    features = extract_page_features("<p>İstanbul PRİVACY notice</p>", "https://example.com")
+    assert "İstanbul PRİVACY notice" in features["clean_text"]
+
+
+def test_keyword_file_extends_table(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"crypto": ["bitcoin*", "seed phrase"], "cvv": ["cvv", "cvc"]}))
+    table = load_keyword_table(str(path))
+    assert table["crypto"] == ("bitcoin*", "seed phrase")
+    assert table["cvv"] == ("cvv", "cvc")
+    assert table["ssn"] == KEYWORD_FAMILIES["ssn"]
+    path.write_text("[1, 2]")
+    assert load_keyword_table(str(path)) == KEYWORD_FAMILIES
+
+
+def test_extraction_keyword_evidence():
+    html = "<p>Enter your password and card number now. Offer expires soon.</p>"
+    features = extract_page_features(html, "https://example.com")
+    assert features["keyword_hits"]["asks_password"] is True
+    assert features["keyword_hits"]["asks_credit_card"] is True
+    assert features["keyword_hits"]["payment_pressure_terms"] is True
+    assert features["keyword_hits"]["asks_ssn"] is False
+    evidence = features["keyword_evidence"]["password"][0]
+    assert features["clean_text"][evidence["start"]:evidence["end"]] == "password"
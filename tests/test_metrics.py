@@ -0,0 +1,45 @@
+import pytest
+
+from checkmate import metrics
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def test_timed_call_records_histogram_and_request_timings():
+    with metrics.collect_timings() as timings:
+        with metrics.timed_call("whois"):
+            pass
+        with pytest.raises(ValueError):
+            with metrics.timed_call("whois"):
+                raise ValueError("boom")
+    assert metrics.EXTERNAL_CALL_SECONDS.count(call="whois", outcome="ok") == 1
+    assert metrics.EXTERNAL_CALL_SECONDS.count(call="whois", outcome="ValueError") == 1
+    assert [c["outcome"] for c in timings.as_dict()["calls"]] == ["ok", "ValueError"]
+
+
+def test_prometheus_text_format():
+    metrics.observe_stage("fetch", 0.2, "ok")
+    metrics.GEMINI_429_TOTAL.inc()
+    metrics.record_cache("result", hit=True)
+    text = metrics.render_prometheus()
+    assert "# TYPE checkmate_stage_duration_seconds histogram" in text
+    assert 'checkmate_stage_duration_seconds_bucket{stage="fetch",outcome="ok",le="0.25"} 1' in text
+    assert 'checkmate_stage_duration_seconds_bucket{stage="fetch",outcome="ok",le="0.1"} 0' in text
+    assert 'checkmate_stage_duration_seconds_count{stage="fetch",outcome="ok"} 1' in text
+    assert "checkmate_gemini_429_total 1" in text
+    assert 'checkmate_cache_requests_total{cache="result",result="hit"} 1' in text
+
+
+def test_metrics_endpoint():
+    from app import app
+
+    with metrics.track_in_flight("analyze"):
+        body = app.test_client().get("/metrics").get_data(as_text=True)
+    assert 'checkmate_in_flight_requests{endpoint="analyze"} 1' in body
+    # Connection pool gauges are refreshed by a collector at render time
+    assert 'checkmate_http_pool{stat="idle_connections"}' in body
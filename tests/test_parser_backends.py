@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from checkmate.modules import extraction
+from checkmate.modules.extraction import available_parsers, extract_page_features, resolve_parser
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+PAGES = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith(".html"))
+BASE_URL = "https://www.example.com/section/page.html"
+
+# Everything the scorer and Gemini prompt rely on must not depend on the parser backend
+COMPARED = ("title", "headings", "meta", "links_internal", "links_external", "emails", "phones", "published_date")
+
+needs_lxml = pytest.mark.skipif("lxml" not in available_parsers(), reason="lxml not installed")
+
+
+def _load(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        return f.read()
+
+
+@needs_lxml
+@pytest.mark.parametrize("name", PAGES)
+def test_backends_extract_same_features(name):
+    body = _load(name)
+    fast = extract_page_features(body, BASE_URL, encoding="utf-8", parser="lxml")
+    compat = extract_page_features(body, BASE_URL, encoding="utf-8", parser="html.parser")
+    for key in COMPARED:
+        assert fast[key] == compat[key], f"{name}: {key} differs between lxml and html.parser"
+    assert fast["title"]
+    assert fast["headings"]
+
+
+def test_corpus_sanity():
+    features = extract_page_features(_load("news_article.html"), "https://www.riversidedaily.com/news/")
+    assert features["title"] == "City Council Approves New Transit Budget | Riverside Daily"
+    assert features["emails"] == ["corrections@riversidedaily.com", "transit@riverside.gov"]
+    assert features["phones"] == ["+19518265311"]
+    assert "https://www.census.gov/quickfacts/riversidecitycalifornia" in features["links_external"]
+    assert "https://www.riversidedaily.com/news/2024/10/transit-hearing" in features["links_internal"]
+
+
+def test_resolve_parser(monkeypatch):
+    assert resolve_parser("html.parser") == "html.parser"
+    assert resolve_parser("auto") == available_parsers()[0]
+    monkeypatch.setattr(extraction, "_AVAILABLE_PARSERS", ["html.parser"])
+    assert resolve_parser("auto") == "html.parser"
+    assert resolve_parser("lxml") == "html.parser"
+    with pytest.raises(ValueError):
+        resolve_parser("html5lib-typo")
+
+
+def test_unknown_configured_parser_falls_back_to_auto_once(caplog):
+    assert extraction._configured_parser(" LXML ") == "lxml"
+    assert extraction._configured_parser("") == "auto"
+    with caplog.at_level("WARNING", logger=extraction.logger.name):
+        assert extraction._configured_parser("html5lib-typo") == "auto"
+    assert "html5lib-typo" in caplog.text
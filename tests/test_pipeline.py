@@ -0,0 +1,173 @@
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+
+from checkmate.crawl import CrawlResult
+from checkmate.pipeline import run_pipeline
+from checkmate.safe_fetch import FetchResult
+
+HTML = "<html><head><title>Acme</title></head><body><h1>Acme</h1><p>Hello.</p></body></html>"
+PAGES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "pages")
+
+
+def _load(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def _slow(value, delay=0.3):
+    def fn(*args, **kwargs):
+        time.sleep(delay)
+        return value
+    return fn
+
+
+def _crawled(url, **kwargs):
+    # Every key page found, so no test depends on the network or on missing_pages
+    return CrawlResult(key_pages={kind: url + kind for kind in ("contact", "about", "privacy", "terms")})
+
+
+def _patched_stages(body=HTML.encode(), url="https://acme.com/"):
+    gemini = {"signals": {}, "risks": [], "numeric_claims": [], "limitations": []}
+    return [
+        patch("checkmate.pipeline.fetch_document", return_value=FetchResult(
+            memoryview(body), "utf-8", 200, "text/html", url
+        )),
+        patch("checkmate.pipeline.crawl_site", side_effect=_crawled),
+        patch("checkmate.pipeline.classify_website_type_with_gemini", side_effect=_slow("company")),
+        patch("checkmate.pipeline.analyze_page_with_gemini", side_effect=_slow(gemini)),
+        patch("checkmate.pipeline.get_domain_info", side_effect=_slow({"registered_domain": "acme.com"})),
+        patch("checkmate.pipeline.check_security", side_effect=_slow({"uses_https": True})),
+        patch("checkmate.pipeline.match_url", side_effect=_slow({"url_match": False})),
+    ]
+
+
+@contextmanager
+def _stubbed_pipeline(*extra, **page):
+    """checkmate.pipeline with _patched_stages(**page) applied, then the extra patches."""
+    from checkmate import pipeline
+
+    with ExitStack() as stack:
+        for p in _patched_stages(**page) + list(extra):
+            stack.enter_context(p)
+        yield pipeline
+
+
+def _run(concurrent):
+    with _stubbed_pipeline():
+        start = time.monotonic()
+        result = run_pipeline("https://acme.com", concurrent=concurrent)
+        return result, time.monotonic() - start
+
+
+def test_concurrent_pipeline_overlaps_stages(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    result, elapsed = _run(concurrent=True)
+    assert elapsed < 1.0  # five 0.3s stages, sequential would take >= 1.5s
+    assert result.website_type == "company"
+    assert result.domain_info == {"registered_domain": "acme.com"}
+    assert result.security_info == {"uses_https": True}
+    assert result.threat_intel == {"url_match": False}
+    timings = result.debug["timings"]
+    assert set(timings["stages"]) >= {"fetch", "extract", "classify", "page_analysis", "domain", "security"}
+    assert timings["stages"]["domain"]["outcome"] == "ok"
+
+
+def test_sequential_and_concurrent_results_match(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    concurrent_result, _ = _run(concurrent=True)
+    sequential_result, _ = _run(concurrent=False)
+    concurrent_result.debug.pop("timings")
+    sequential_result.debug.pop("timings")
+    assert concurrent_result.model_dump() == sequential_result.model_dump()
+
+
+def test_stage_over_budget_becomes_limitation(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    with _stubbed_pipeline(
+        patch("checkmate.pipeline.get_domain_info", side_effect=_slow({}, delay=2.0)),
+        patch.dict("checkmate.pipeline.STAGE_TIMEOUTS", {"domain": 0.5}),
+    ):
+        start = time.monotonic()
+        result = run_pipeline("https://acme.com", concurrent=True, score=True)
+        assert time.monotonic() - start < 1.5
+    assert result.status == "ok"
+    assert result.overall_score is not None
+    assert result.domain_info == {}
+    assert "Domain registration lookup skipped: time budget exceeded." in result.limitations
+
+
+def test_shared_work_reuses_whois_and_tls_per_domain(monkeypatch):
+    from checkmate.pipeline import SharedWork
+
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    with _stubbed_pipeline() as pipeline:
+        shared = SharedWork()
+        run_pipeline("https://acme.com/a", shared=shared)
+        run_pipeline("https://acme.com/b", shared=shared)
+        run_pipeline("https://shop.acme.com/c", shared=shared)
+        assert pipeline.get_domain_info.call_count == 1
+        assert pipeline.check_security.call_count == 2  # acme.com and shop.acme.com
+
+
+def test_long_page_is_truncated_by_priority_with_limitation(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    filler = "".join(f"<p>Paragraph {i} of the story goes on and on without saying much at all.</p>" for i in range(400))
+    html = f"<html><head><title>Acme</title></head><body><h1>Acme</h1>{filler}<p>Contact us at help@acme.com</p></body></html>"
+    with _stubbed_pipeline(body=html.encode()) as pipeline:
+        result = run_pipeline("https://acme.com", concurrent=False)
+        sent = pipeline.analyze_page_with_gemini.call_args.kwargs["clean_text"]
+    assert len(sent) <= 12000
+    assert sent.startswith("TITLE: Acme\nHEADINGS: Acme\n")
+    assert "Contact us at help@acme.com" in sent
+    assert result.debug["content_truncated"] is True
+    assert "Page text was long; only the most relevant sections were analyzed." in result.limitations
+
+
+def test_gemini_gets_main_content_first_and_a_short_boilerplate_tail(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    with _stubbed_pipeline(
+        patch("checkmate.pipeline.BOILERPLATE_PROMPT_CHARS", 200),
+        body=_load("portal_boilerplate.html"),
+        url="https://valleyherald.example/",
+    ) as pipeline:
+        result = run_pipeline("https://valleyherald.example/", concurrent=False)
+        kwargs = pipeline.analyze_page_with_gemini.call_args.kwargs
+    assert kwargs["clean_text"].startswith("Heat pump rebates expand to renters")
+    assert "Obituaries" not in kwargs["clean_text"]
+    # The tail keeps contact/legal lines first within its small budget
+    assert len(kwargs["boilerplate_text"]) <= 200
+    assert "Privacy policy" in kwargs["boilerplate_text"]
+    assert "Obituaries" not in kwargs["boilerplate_text"]
+    assert result.debug["content_truncated"] is False
+    assert not any(lim.startswith("Page text was long") for lim in result.limitations)
+
+
+def test_identical_bodies_are_extracted_once(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    from checkmate import extract_pool, metrics, pipeline
+
+    pipeline.extract_cache.clear()
+    before = metrics.CACHE_REQUESTS_TOTAL.value(cache="extract", result="hit")
+    real_extract = extract_pool.extract_page_features
+    with _stubbed_pipeline(patch("checkmate.extract_pool.extract_page_features", side_effect=real_extract)):
+        first = run_pipeline("https://acme.com", concurrent=False)
+        second = run_pipeline("https://acme.com", concurrent=False)
+        calls = extract_pool.extract_page_features.call_count
+        # Same bytes under another base URL classify links differently, so they are a new entry
+        run_pipeline("https://other.example", concurrent=False)
+        other_calls = extract_pool.extract_page_features.call_count
+    assert calls == 1
+    assert other_calls == 2
+    assert second.pages_analyzed == first.pages_analyzed
+    assert metrics.CACHE_REQUESTS_TOTAL.value(cache="extract", result="hit") == before + 1
+
+
+def test_publication_date_reaches_gemini_and_page_summary(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    with _stubbed_pipeline(body=_load("news_article.html"), url="https://riversidedaily.example/transit") as pipeline:
+        result = run_pipeline("https://riversidedaily.example/transit", concurrent=False)
+        sent_date = pipeline.analyze_page_with_gemini.call_args.kwargs["extracted_date"]
+    assert sent_date == "2024-11-14"
+    assert result.pages_analyzed[0].extracted_date == "2024-11-14"
@@ -0,0 +1,53 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from checkmate import replay
+from checkmate.safe_fetch import FetchResult, fetch_document
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    yield str(tmp_path / "archive.sqlite")
+    replay.configure("")
+
+
+def test_record_then_replay_with_latency(archive_path):
+    calls = []
+
+    @replay.replayable("demo", key=lambda name: name)
+    def lookup(name):
+        calls.append(name)
+        time.sleep(0.1)
+        if name == "bad":
+            raise ValueError("upstream said no")
+        return {"name": name}
+
+    replay.configure("record", archive_path)
+    assert lookup("a") == {"name": "a"}
+    with pytest.raises(ValueError):
+        lookup("bad")
+
+    replay.configure("replay", archive_path, latency_scale=1.0)
+    start = time.monotonic()
+    assert lookup("a") == {"name": "a"}
+    assert time.monotonic() - start >= 0.09  # recorded latency is reproduced
+    with pytest.raises(replay.ReplayedError, match="upstream said no"):
+        lookup("bad")
+    with pytest.raises(replay.ReplayMiss):
+        lookup("never-recorded")
+    assert calls == ["a", "bad"]
+
+
+def test_page_fetch_round_trips_through_archive(archive_path):
+    page = FetchResult(memoryview("Café".encode("cp1252")), "cp1252", 200, "text/html", "https://acme.com/", 4)
+    replay.configure("record", archive_path, latency_scale=0)
+    with patch("checkmate.safe_fetch._fetch_with_redirects", return_value=page):
+        fetch_document("https://acme.com")
+
+    replay.configure("replay", archive_path, latency_scale=0)
+    with patch("checkmate.safe_fetch._fetch_with_redirects", side_effect=AssertionError("network used")):
+        replayed = fetch_document("https://acme.com")
+    assert replayed.text == "Café"
+    assert (replayed.status_code, replayed.final_url, replayed.wire_bytes) == (200, "https://acme.com/", 4)
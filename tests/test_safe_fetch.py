@@ -0,0 +1,240 @@
+import gzip
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from checkmate.safe_fetch import HTTPPool, safe_fetch
+
+
+GZIP_TEXT = "<p>" + " ".join(str(i * 7919) for i in range(40_000)) + "</p>"
+PAGES = {
+    "/latin1": ("text/html; charset=ISO-8859-1", None, "<p>Caf\xe9</p>".encode("latin-1")),
+    "/meta": ("text/html", None, '<meta charset="windows-1251"><p>\u041f\u0440\u0438\u0432\u0435\u0442</p>'.encode("cp1251")),
+    "/gzip": ("text/html", "gzip", gzip.compress(GZIP_TEXT.encode())),
+    "/huge": ("text/html", None, b"x" * (2 * 1024 * 1024 + 1)),
+    "/deflate-raw": ("text/html", "deflate", zlib.compress(b"<p>raw deflate</p>")[2:-4]),
+    "/bomb": ("text/html", "gzip", gzip.compress(b"\0" * (8 * 1024 * 1024))),
+    "/unknown": ("text/html", "zstd", b"\x28\xb5\x2f\xfd"),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            body = "<p>Caf\xe9 v1</p>".encode("latin-1")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=latin-1")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path in PAGES:
+            content_type, encoding, body = PAGES[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            if encoding:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/page")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"<html><title>ok</title></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # clients that abort oversized bodies reset the connection on purpose
+
+
+@pytest.fixture
+def server():
+    httpd = _Server(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = HTTPPool(max_hosts=4, max_per_host=2, idle_timeout=60)
+    # The local test server is loopback, which the real SSRF check (rightly) refuses
+    with patch("checkmate.safe_fetch.http_pool", pool), \
+            patch("checkmate.safe_fetch.resolve_safe_ip", return_value="127.0.0.1"):
+        yield pool
+    pool.close()
+
+
+def test_repeated_fetches_reuse_one_connection(server, pool):
+    for _ in range(3):
+        content, status, _, _ = safe_fetch(server + "/redirect")
+        assert status == 200 and "ok" in content
+    stats = pool.stats()
+    assert stats["requests"] == 6  # three redirects + three pages
+    assert stats["connections_opened"] == 1
+    assert stats["sessions_created"] == 1
+
+
+def test_pool_stores_no_cookies(server, pool):
+    safe_fetch(server + "/page")
+    with pool.session() as session:
+        assert len(session.cookies) == 0
+
+
+def test_idle_pool_is_rebuilt(server, pool):
+    safe_fetch(server + "/page")
+    pool.idle_timeout = 0
+    safe_fetch(server + "/page")
+    assert pool.stats()["sessions_created"] == 2
+
+
+def test_connection_is_pinned_to_validated_ip(server, pool):
+    port = server.rsplit(":", 1)[1]
+    # "pinned.invalid" never resolves; the fetch only works if it connects to the checked address
+    content, status, _, final_url = safe_fetch(f"http://pinned.invalid:{port}/page")
+    assert status == 200 and "ok" in content
+    assert final_url == f"http://pinned.invalid:{port}/page"
+
+
+def test_fetches_per_host_are_bounded():
+    pool = HTTPPool(max_hosts=4, max_per_host=1, idle_timeout=60)
+    with pool.host_slot("a.example", timeout=1):
+        with pytest.raises(TimeoutError):
+            with pool.host_slot("a.example", timeout=0.1):
+                pass
+        with pool.host_slot("b.example", timeout=0.1):
+            pass
+    with pool.host_slot("a.example", timeout=0.1):
+        pass
+    assert pool._host_slots == {}
+
+
+def test_release_drains_only_small_leftovers():
+    from unittest.mock import MagicMock
+
+    from checkmate.safe_fetch import _release
+
+    small, large, unknown = MagicMock(), MagicMock(), MagicMock()
+    small.raw.length_remaining = 100
+    large.raw.length_remaining = 50 * 1024 * 1024
+    unknown.raw.length_remaining = None  # chunked: could be endless
+    for response in (small, large, unknown):
+        _release(response)
+    assert small.raw.drain_conn.called and not small.close.called
+    for response in (large, unknown):
+        assert response.close.called and not response.raw.drain_conn.called
+
+
+def test_resolver_caches_positive_and_negative_answers():
+    import socket
+
+    from checkmate.resolver import Resolver
+
+    resolver = Resolver(ttl=60, negative_ttl=60)
+    answers = {"good.example": [(socket.AF_INET, 0, 0, "", ("93.184.216.34", 0))]}
+
+    def getaddrinfo(host, port):
+        if host not in answers:
+            raise socket.gaierror(socket.EAI_NONAME, "nope")
+        return answers[host]
+
+    with patch("socket.getaddrinfo", side_effect=getaddrinfo) as lookup:
+        assert resolver.resolve("Good.Example.") == ["93.184.216.34"]
+        assert resolver.resolve("good.example") == ["93.184.216.34"]
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                resolver.resolve("missing.example")
+        assert resolver.resolve("10.0.0.1") == ["10.0.0.1"]  # literals skip DNS
+    assert lookup.call_count == 2
+
+
+def test_fetch_document_detects_charset_and_reads_compressed_bodies(server, pool):
+    from checkmate.safe_fetch import fetch_document
+
+    latin = fetch_document(server + "/latin1")
+    assert latin.encoding == "cp1252" and "Café" in latin.text
+    meta = fetch_document(server + "/meta")
+    assert meta.encoding == "cp1251" and "Привет" in meta.text
+    compressed = fetch_document(server + "/gzip")
+    assert isinstance(compressed.body, memoryview)
+    assert len(compressed.body) == len(GZIP_TEXT)
+    assert fetch_document(server + "/huge") is None
+
+
+def test_compressed_bodies_are_bounded(server, pool):
+    from checkmate import metrics
+    from checkmate.safe_fetch import fetch_document
+
+    with pool.session() as session:
+        assert "gzip" in session.headers["Accept-Encoding"]
+
+    wire_before = metrics.FETCH_BYTES_TOTAL.value(kind="wire")
+    decoded_before = metrics.FETCH_BYTES_TOTAL.value(kind="decoded")
+    page = fetch_document(server + "/gzip")
+    assert 0 < page.wire_bytes < len(page.body)
+    assert metrics.FETCH_BYTES_TOTAL.value(kind="wire") - wire_before == page.wire_bytes
+    assert metrics.FETCH_BYTES_TOTAL.value(kind="decoded") - decoded_before == len(page.body)
+
+    assert fetch_document(server + "/deflate-raw").text == "<p>raw deflate</p>"
+    assert fetch_document(server + "/bomb") is None  # ratio far above the limit
+    assert fetch_document(server + "/unknown") is None
+
+
+def test_brotli_is_only_used_when_its_output_can_be_bounded(monkeypatch):
+    from checkmate import safe_fetch
+
+    class UnboundedDecompressor:
+        def process(self, data):
+            return data
+
+    class BoundedDecompressor:
+        def process(self, data, output_buffer_limit=None):
+            return data[:output_buffer_limit]
+
+    monkeypatch.setattr(safe_fetch, "brotli", type("Binding", (), {"Decompressor": UnboundedDecompressor}))
+    assert safe_fetch._brotli_bounded() is False
+    monkeypatch.setattr(safe_fetch, "brotli", type("Binding", (), {"Decompressor": BoundedDecompressor}))
+    assert safe_fetch._brotli_bounded() is True
+    assert safe_fetch._BrotliDecoder().decompress(b"x" * 10, max_length=4) == b"xxxx"
+
+
+def test_unchanged_page_is_served_from_page_cache(server, pool, tmp_path):
+    from checkmate.cache import PageCache
+    from checkmate.safe_fetch import fetch_document
+
+    cache = PageCache(str(tmp_path / "pages.sqlite"))
+    with patch("checkmate.safe_fetch.page_cache", cache):
+        first = fetch_document(server + "/etag")
+        second = fetch_document(server + "/etag")
+        fetch_document(server + "/page")  # no validators: not stored
+    assert first.revalidated is False and first.wire_bytes > 0
+    assert second.revalidated is True and second.wire_bytes == 0
+    assert second.text == first.text == "<p>Café v1</p>"
+    assert cache.get(server + "/page") is None
@@ -0,0 +1,28 @@
+import datetime
+
+import pytest
+
+from checkmate.schemas import AnalysisResult, PageSummary
+from checkmate.scoring import _date_recency, compute_score
+
+
+def test_date_recency_decays_after_a_year():
+    today = datetime.date(2025, 6, 1)
+    assert _date_recency("2025-01-15", today) == 1.0
+    assert _date_recency("2022-06-01", today) == pytest.approx(0.5, abs=0.01)
+    assert _date_recency("2010-01-01", today) == 0.0
+    assert _date_recency(None, today) is None
+    assert _date_recency("not a date", today) is None
+
+
+def test_statistical_relevance_uses_extracted_date_before_gemini():
+    def scored(extracted_date):
+        result = AnalysisResult(status="ok", website_type="statistical")
+        result.pages_analyzed.append(PageSummary(url="https://stats.example/", extracted_date=extracted_date))
+        result.debug["gemini"] = {"signals": {"marketing_heaviness_0_1": 0.0, "information_recency_0_1": 0.2}}
+        return compute_score(result).debug["scoring"]["relevance"]
+
+    fresh = scored(datetime.date.today().isoformat())
+    assert (fresh["information_recency_0_1"], fresh["recency_source"], fresh["score"]) == (1.0, "extracted_date", 100)
+    unknown = scored(None)
+    assert (unknown["information_recency_0_1"], unknown["recency_source"]) == (0.2, "gemini")
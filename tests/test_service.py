@@ -0,0 +1,182 @@
+from unittest.mock import patch
+
+import pytest
+
+from checkmate import service
+from checkmate.pipeline import SharedWork
+from checkmate.schemas import AnalysisResult
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    service.result_cache.clear()
+    yield
+    service.result_cache.clear()
+
+
+def test_canonicalize_url():
+    canon = service.canonicalize_url
+    assert canon("HTTPS://Example.COM:443/a?b=2&a=1#frag") == "https://example.com/a?a=1&b=2"
+    assert canon("https://example.com/?utm_source=x&fbclid=y") == "https://example.com/"
+    assert canon("http://example.com:8080") == "http://example.com:8080/"
+    assert canon("example.com/path") == "https://example.com/path"
+
+
+def _ok_result(*args, **kwargs):
+    return AnalysisResult(status="ok", overall_score=70, debug={"stages": {"fetch": "ok"}})
+
+
+def test_analyze_url_serves_repeat_from_cache():
+    with patch("checkmate.service.run_pipeline", side_effect=_ok_result) as run:
+        first = service.analyze_url("https://example.com/?utm_medium=mail")
+        second = service.analyze_url("https://EXAMPLE.com")
+    assert run.call_count == 1
+    assert first["cache"]["hit"] is False
+    assert second["cache"]["hit"] is True
+    assert second["overall_score"] == 70
+
+
+def test_analyze_url_refresh_and_degraded_results():
+    degraded = AnalysisResult(status="ok", debug={"stages": {"domain": "timeout"}})
+    with patch("checkmate.service.run_pipeline", return_value=degraded) as run:
+        service.analyze_url("https://example.com")
+        service.analyze_url("https://example.com")
+    assert run.call_count == 2  # timed-out stages are not cached
+
+    with patch("checkmate.service.run_pipeline", side_effect=_ok_result) as run:
+        service.analyze_url("https://example.com")
+        refreshed = service.analyze_url("https://example.com", refresh=True)
+    assert run.call_count == 2
+    assert refreshed["cache"]["hit"] is False
+
+
+def test_fail_soft_stage_answers_are_not_cached():
+    gemini_failed = AnalysisResult(
+        status="ok",
+        debug={
+            "stages": {"page_analysis": "ok"},
+            "gemini": {"limitations": ["Page analysis could not be completed: API error (check server log for details)."]},
+        },
+    )
+    whois_failed = AnalysisResult(
+        status="ok", domain_info={"whois_error": "timed out"}, debug={"stages": {"domain": "ok"}}
+    )
+    for degraded in (gemini_failed, whois_failed):
+        service.result_cache.clear()
+        with patch("checkmate.service.run_pipeline", return_value=degraded) as run:
+            service.analyze_url("https://example.com")
+            second = service.analyze_url("https://example.com")
+        assert run.call_count == 2
+        assert second["cache"]["hit"] is False
+
+
+def test_concurrent_identical_requests_run_pipeline_once():
+    import threading
+    import time
+
+    def slow_result(*args, **kwargs):
+        time.sleep(0.2)
+        return _ok_result()
+
+    responses = []
+    with patch("checkmate.service.run_pipeline", side_effect=slow_result) as run:
+        threads = [
+            threading.Thread(target=lambda: responses.append(service.analyze_url("https://example.com/a")))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    assert run.call_count == 1
+    assert sum(r["cache"]["coalesced"] for r in responses) == 3
+
+
+def test_analyze_batch_streams_in_completion_order():
+    import time
+
+    def result_after(url, **kwargs):
+        time.sleep(0.3 if url.endswith("slow") else 0.01)
+        return _ok_result()
+
+    with patch("checkmate.service.run_pipeline", side_effect=result_after):
+        lines = list(service.analyze_batch(["https://a.com/slow", "https://b.com/fast"], concurrency=2))
+    assert [line["index"] for line in lines] == [1, 0]
+    assert lines[0]["url"] == "https://b.com/fast"
+    assert lines[1]["result"]["overall_score"] == 70
+
+
+def test_batch_concurrency_is_capped_by_the_stage_pool(monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setattr(service, "PIPELINE_MAX_WORKERS", 2)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def tracked(url, **kwargs):
+        with lock:
+            active.append(url)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(url)
+        return _ok_result()
+
+    urls = [f"https://site{i}.example/" for i in range(6)]
+    with patch("checkmate.service.run_pipeline", side_effect=tracked):
+        lines = list(service.analyze_batch(urls, concurrency=16))
+    assert len(lines) == 6
+    assert max(peak) == 2
+
+
+def test_batch_shares_domain_work_with_lock_dir_set(monkeypatch, tmp_path):
+    monkeypatch.setattr(service, "SINGLEFLIGHT_LOCK_DIR", str(tmp_path))
+    with patch("checkmate.service.run_pipeline", side_effect=_ok_result) as run:
+        lines = list(service.analyze_batch(["https://a.com/1", "https://a.com/2"], concurrency=2))
+    assert len(lines) == 2 and all("result" in line for line in lines)
+    shared = [call.kwargs["shared"] for call in run.call_args_list]
+    assert len(shared) == 2
+    assert isinstance(shared[0], SharedWork) and shared[0] is shared[1]
+
+
+def test_batch_endpoint_returns_json_lines():
+    import json
+
+    from app import app
+
+    with patch("checkmate.service.run_pipeline", side_effect=_ok_result):
+        resp = app.test_client().post("/analyze/batch", json={"urls": ["https://a.com", "https://b.com"]})
+        body = resp.get_data(as_text=True)
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert app.test_client().post("/analyze/batch", json={"urls": []}).status_code == 400
+
+
+def test_stream_emits_stage_events_before_final_score(monkeypatch):
+    from tests.test_pipeline import _stubbed_pipeline
+
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    with _stubbed_pipeline():
+        events = [event for event, _ in service.analyze_url_events("https://acme.com")]
+    assert events[0] == "fetch"
+    assert events.index("features") < min(events.index("website_type"), events.index("gemini"))
+    assert set(events[1:-1]) == {"crawl", "features", "website_type", "gemini", "domain", "security", "threat_intel"}
+    assert events[-1] == "score"
+
+    # Second request is a cache hit: one final event
+    cached = list(service.analyze_url_events("https://acme.com"))
+    assert [event for event, _ in cached] == ["score"]
+    assert cached[0][1]["cache"]["hit"] is True
+
+
+def test_stream_endpoint_formats_sse():
+    from app import app
+
+    with patch("checkmate.service.run_pipeline", side_effect=_ok_result):
+        resp = app.test_client().get("/analyze/stream?url=https://example.com")
+        body = resp.get_data(as_text=True)
+    assert resp.mimetype == "text/event-stream"
+    assert body.startswith("event: score\ndata: {")
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from checkmate.singleflight import SingleFlight, file_lock
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"score": 42}
+
+    def caller():
+        results.append(flight.do("https://example.com/", work))
+
+    threads = [threading.Thread(target=caller) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert [value for value, _ in results] == [{"score": 42}] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_to_waiters_and_next_call_reruns():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = {}
+
+    def fail():
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    def caller(name, fn):
+        try:
+            flight.do("k", fn)
+        except RuntimeError as exc:
+            errors[name] = exc
+
+    leader = threading.Thread(target=caller, args=("leader", fail))
+    leader.start()
+    while flight.in_flight() == 0:
+        time.sleep(0.01)
+    waiter = threading.Thread(target=caller, args=("waiter", lambda: "ran its own call"))
+    waiter.start()
+    time.sleep(0.1)  # let the waiter block on the leader's call
+    release.set()
+    leader.join()
+    waiter.join()
+
+    assert set(errors) == {"leader", "waiter"}
+    assert errors["waiter"] is errors["leader"]
+    assert flight.in_flight() == 0
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_file_lock_excludes_second_holder(tmp_path):
+    with file_lock(str(tmp_path), "https://example.com/", timeout=1) as first:
+        assert first is True
+        with file_lock(str(tmp_path), "https://example.com/", timeout=0.1) as second:
+            assert second is False
+    with file_lock(str(tmp_path), "https://example.com/", timeout=0.1) as again:
+        assert again is True
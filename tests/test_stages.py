@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from checkmate.stages import Deadline, SkipStage, Stage, StageContext, run_stages
+
+
+def _ctx(budget=None):
+    return StageContext(url="https://example.com", deadline=Deadline(budget))
+
+
+def test_stages_run_after_dependencies():
+    order = []
+
+    def record(name):
+        def fn(ctx):
+            order.append(name)
+            return name
+        return fn
+
+    stages = [
+        Stage("b", record("b"), deps=("a",)),
+        Stage("a", record("a")),
+        Stage("c", record("c"), deps=("a", "b")),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outcomes = run_stages(stages, _ctx(), executor=pool)
+    assert order == ["a", "b", "c"]
+    assert all(o.status == "ok" for o in outcomes.values())
+
+
+def test_skip_cascades_to_dependents_but_not_soft_deps():
+    def fetch(ctx):
+        raise SkipStage("nothing fetched")
+
+    stages = [
+        Stage("fetch", fetch),
+        Stage("extract", lambda ctx: "x", deps=("fetch",)),
+        Stage("report", lambda ctx: sorted(ctx.outcomes), after=("fetch", "extract")),
+    ]
+    outcomes = run_stages(stages, _ctx())
+    assert outcomes["fetch"].status == "skipped"
+    assert outcomes["extract"].status == "skipped"
+    assert outcomes["report"].status == "ok"
+    assert outcomes["report"].value == ["extract", "fetch"]
+
+
+def test_slow_stage_times_out_without_blocking():
+    stages = [
+        Stage("slow", lambda ctx: time.sleep(1.0), timeout=0.1),
+        Stage("fast", lambda ctx: "done"),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        start = time.monotonic()
+        outcomes = run_stages(stages, _ctx(), executor=pool)
+        assert time.monotonic() - start < 0.8
+    assert outcomes["slow"].status == "timeout"
+    assert outcomes["fast"].status == "ok"
+
+
+def test_expired_deadline_skips_remaining_stages():
+    stages = [
+        Stage("first", lambda ctx: time.sleep(0.2)),
+        Stage("second", lambda ctx: "never", deps=("first",)),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        outcomes = run_stages(stages, _ctx(budget=0.05), executor=pool)
+    assert outcomes["first"].status == "timeout"
+    assert outcomes["second"].status == "skipped"
+
+
+def test_cycle_is_rejected():
+    stages = [Stage("a", lambda ctx: 1, deps=("b",)), Stage("b", lambda ctx: 2, deps=("a",))]
+    with pytest.raises(ValueError):
+        run_stages(stages, _ctx())